@@ -0,0 +1,263 @@
+"""
+batch_cli.py
+
+Пакетная кластеризация без GUI: тот же конвейер, что и в приложении (схлопывание дубликатов,
+эмбеддинги, HDBSCAN, ранжирование терминов и генерация названий), но без Qt и интерактивной
+авторизации. Посты читаются из файлов JSON/JSONL или из локального хранилища постов (PostStore),
+результат — кластеры с названиями — сохраняется в JSON. Несколько входных файлов обрабатываются
+параллельно в пуле процессов. Модуль не импортирует PyQt5. Примеры запуска из корня репозитория:
+
+    python batch_cli.py feeds/*.jsonl --output-dir clusters --workers 4
+    python batch_cli.py --store posts.db --store-limit 500 --output-dir clusters
+
+Входной файл — список постов в JSON (или объект с ключом "posts") либо по одному посту в строке
+JSONL. Пост — словарь с полями как у news_processor.submission_to_post (обязательно только title).
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import news_processor
+from dedup import DUPLICATES_KEY, collapse_near_duplicates
+from dim_reduction import DEFAULT_REDUCTION, REDUCTION_METHODS, create_reducer
+from embedding_backends import DEFAULT_EMBEDDING_BACKEND, EMBEDDING_BACKENDS
+from embedding_cache import EmbeddingCache
+from post_store import POST_STORE_FILE, PostStore
+from post_table import Post, PostTable
+from tracing import tracer
+
+DEFAULT_OUTPUT_DIR = "clusters"
+OUTPUT_SUFFIX = ".clusters.json"
+
+def load_posts(path):
+    """
+    Читает посты из файла JSON или JSONL (формат определяется по расширению .jsonl).
+
+    :param path: Путь к входному файлу.
+    :return: Список постов.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            posts = [json.loads(line) for line in f if line.strip()]
+        else:
+            data = json.load(f)
+            posts = data.get("posts", []) if isinstance(data, dict) else data
+    if not isinstance(posts, list) or not all(isinstance(post, dict) for post in posts):
+        raise ValueError(f"{path}: ожидается список постов-объектов.")
+    return [Post(post, title=post.get("title") or "", selftext=post.get("selftext") or "") for post in posts]
+
+def _post_summary(post):
+    return {key: post.get(key) for key in ("id", "permalink", "title", "url", "created")}
+
+def cluster_feed(posts, min_cluster_size=3, reduction=DEFAULT_REDUCTION, embedding_cache=None):
+    """
+    Кластеризует ленту и генерирует названия кластеров.
+
+    :param posts: Список постов.
+    :param min_cluster_size: Минимальный размер кластера для HDBSCAN.
+    :param reduction: Метод понижения размерности перед HDBSCAN (см. dim_reduction).
+    :param embedding_cache: Кэш эмбеддингов (EmbeddingCache) или None.
+    :return: Словарь с числом постов, кластерами (название, термины, посты) и шумом.
+    """
+    representatives = collapse_near_duplicates(posts)
+    if not representatives:
+        return {"posts": 0, "representatives": 0, "clusters": [], "noise": []}
+    embeddings = news_processor.embed_posts(representatives, embedding_cache)
+    labels = news_processor.cluster_embeddings(embeddings, min_cluster_size=min_cluster_size,
+                                               reducer=create_reducer(reduction))
+    clusters = PostTable(representatives, labels).clusters()
+    cluster_terms = news_processor.rank_cluster_terms(
+        news_processor.build_cluster_docs(clusters),
+        stop_words=news_processor.get_combined_stopwords()
+    )
+    cluster_names = news_processor.improved_hybrid_generate_cluster_names(
+        clusters,
+        cluster_vectors=news_processor.group_embeddings_by_cluster(labels, embeddings),
+        cluster_terms=cluster_terms
+    )
+
+    def describe(members):
+        return [
+            dict(_post_summary(post), duplicates=[_post_summary(dup) for dup in post.get(DUPLICATES_KEY, [])])
+            for post in members
+        ]
+
+    return {
+        "posts": len(posts),
+        "representatives": len(representatives),
+        "clusters": [
+            {
+                "id": cluster_id,
+                "name": cluster_names.get(cluster_id),
+                "size": len(members),
+                "terms": [term for term, _ in cluster_terms.get(cluster_id, [])],
+                "posts": describe(members),
+            }
+            for cluster_id, members in sorted(clusters.items()) if cluster_id != -1
+        ],
+        "noise": describe(clusters.get(-1, [])),
+    }
+
+def output_path(output_dir, name):
+    """
+    Возвращает путь результата для входа name (имя файла без расширения + OUTPUT_SUFFIX).
+    """
+    base = os.path.basename(name)
+    for ext in (".jsonl", ".json"):
+        if base.endswith(ext):
+            base = base[:-len(ext)]
+            break
+    return os.path.join(output_dir, base + OUTPUT_SUFFIX)
+
+def write_result(path, result):
+    """
+    Атомарно сохраняет результат в JSON (через временный файл).
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def process_posts(name, posts, options):
+    """
+    Кластеризует посты одного входа и сохраняет результат.
+
+    :param name: Имя входа (путь к файлу или метка хранилища).
+    :param posts: Список постов.
+    :param options: Словарь параметров (output_dir, min_cluster_size, reduction, cache_dir, backend).
+    :return: Кортеж (путь результата, число постов, число кластеров, секунды).
+    """
+    start = time.perf_counter()
+    embedding_cache = None
+    if options.get("cache_dir"):
+        # Кэш не рассчитан на запись из нескольких процессов: у каждого процесса свой каталог
+        # Тег кэша — по фактически созданному бэкенду (onnx может замениться на torch)
+        backend = news_processor.model_registry.get_embedding_backend()
+        embedding_cache = EmbeddingCache(cache_dir=os.path.join(options["cache_dir"], f"worker-{os.getpid()}"),
+                                         model_name=backend.cache_tag)
+    try:
+        result = cluster_feed(posts, min_cluster_size=options["min_cluster_size"],
+                              reduction=options["reduction"], embedding_cache=embedding_cache)
+    finally:
+        if embedding_cache is not None:
+            embedding_cache.save()
+    result["input"] = name
+    result["created_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    path = output_path(options["output_dir"], name)
+    write_result(path, result)
+    return path, result["posts"], len(result["clusters"]), time.perf_counter() - start
+
+def process_file(input_path, options):
+    """
+    Точка входа процесса пула: читает и кластеризует один входной файл.
+    """
+    return process_posts(input_path, load_posts(input_path), options)
+
+# Переменные окружения, которые библиотеки BLAS/OpenMP читают один раз при загрузке
+THREAD_ENV_VARIABLES = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+def init_worker(threads, backend):
+    """
+    Инициализатор процесса пула. Ограничивает число потоков PyTorch/ONNX Runtime, чтобы
+    процессы не конкурировали за ядра, выбирает бэкенд эмбеддингов и отключает журнал трассировки
+    (его ротация не рассчитана на запись из нескольких процессов). Потоки BLAS ограничиваются
+    переменными окружения ещё до запуска процесса (см. run_parallel).
+
+    :param threads: Число потоков на процесс.
+    :param backend: Имя бэкенда эмбеддингов.
+    """
+    news_processor.model_registry.configure_embeddings(backend, threads=threads)
+    tracer.enabled = False
+
+def run_parallel(inputs, options, workers, threads=None):
+    """
+    Обрабатывает входные файлы в пуле процессов. Ошибка в одном файле не прерывает остальные.
+
+    :param threads: Число потоков на процесс (по умолчанию ядра делятся поровну между процессами).
+    :return: Число файлов, которые не удалось обработать.
+    """
+    threads = threads or max(1, (os.cpu_count() or 1) // workers)
+    failures = 0
+    # spawn: дочерние процессы не наследуют состояние родителя (в том числе потоки PyTorch).
+    # Окружение же наследуется при запуске процесса, до импорта numpy в нём, поэтому
+    # ограничение потоков BLAS задаётся здесь, а не в init_worker
+    previous = {variable: os.environ.get(variable) for variable in THREAD_ENV_VARIABLES}
+    os.environ.update({variable: str(threads) for variable in THREAD_ENV_VARIABLES})
+    context = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=init_worker, initargs=(threads, options["backend"])) as pool:
+            futures = {pool.submit(process_file, path, options): path for path in inputs}
+            for future in as_completed(futures):
+                try:
+                    report(*future.result())
+                except Exception as e:
+                    failures += 1
+                    print(f"Ошибка при обработке {futures[future]}: {e}", file=sys.stderr)
+    finally:
+        for variable, value in previous.items():
+            if value is None:
+                os.environ.pop(variable, None)
+            else:
+                os.environ[variable] = value
+    return failures
+
+def report(path, post_count, cluster_count, seconds):
+    print(f"{path}: {post_count} постов, {cluster_count} кластеров за {seconds:.2f} с")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетная кластеризация лент ClusterNews без GUI.")
+    parser.add_argument("inputs", nargs="*", help="Файлы постов .json или .jsonl.")
+    parser.add_argument("--store", nargs="?", const=POST_STORE_FILE,
+                        help=f"Кластеризовать последние посты из хранилища (по умолчанию {POST_STORE_FILE}).")
+    parser.add_argument("--store-limit", type=int, default=None, help="Сколько последних постов взять из хранилища.")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR, help="Каталог для результатов.")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1),
+                        help="Число процессов для параллельной обработки файлов.")
+    parser.add_argument("--min-cluster-size", type=int, default=3, help="min_cluster_size для HDBSCAN.")
+    parser.add_argument("--reduction", choices=REDUCTION_METHODS, default=DEFAULT_REDUCTION,
+                        help="Понижение размерности перед HDBSCAN.")
+    parser.add_argument("--backend", choices=EMBEDDING_BACKENDS, default=DEFAULT_EMBEDDING_BACKEND,
+                        help="Бэкенд эмбеддингов (int8 и onnx — для CPU).")
+    parser.add_argument("--threads", type=int, default=None, help="Число потоков вычислений на процесс.")
+    parser.add_argument("--cache-dir", help="Каталог кэша эмбеддингов (по умолчанию кэш не используется).")
+    args = parser.parse_args(argv)
+    if not args.inputs and not args.store:
+        parser.error("укажите входные файлы или --store")
+
+    options = {
+        "output_dir": args.output_dir,
+        "min_cluster_size": args.min_cluster_size,
+        "reduction": args.reduction,
+        "cache_dir": args.cache_dir,
+        "backend": args.backend,
+    }
+    news_processor.model_registry.configure_embeddings(args.backend, threads=args.threads)
+    failures = 0
+    if args.store:
+        store = PostStore(args.store, ttl_seconds=None)
+        try:
+            posts = store.recent_posts(args.store_limit)
+        finally:
+            store.close()
+        report(*process_posts(os.path.splitext(os.path.basename(args.store))[0], posts, options))
+    workers = max(1, min(args.workers, len(args.inputs)))
+    if workers == 1:
+        for path in args.inputs:
+            try:
+                report(*process_file(path, options))
+            except Exception as e:
+                failures += 1
+                print(f"Ошибка при обработке {path}: {e}", file=sys.stderr)
+    elif args.inputs:
+        failures = run_parallel(args.inputs, options, workers, threads=args.threads)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+benchmarks/backend_benchmark.py
+
+Сравнение бэкендов эмбеддингов (embedding_backends) на синтетической многоязычной ленте:
+время загрузки, пропускная способность кодирования (текстов в секунду), косинусная близость
+эмбеддингов к эталонному бэкенду torch и согласие кластеров HDBSCAN (ARI) с его разметкой.
+Бэкенд onnx требует onnxruntime и локальную ONNX-модель в models/<имя модели>.
+Запуск из корня репозитория:
+
+    python -m benchmarks.backend_benchmark --size 2000 --backends torch int8 onnx --threads 4
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import news_processor
+from benchmarks.synthetic_corpus import make_submissions
+from dim_reduction import create_reducer, l2_normalize
+from embedding_backends import EMBEDDING_BACKENDS, create_embedding_backend
+
+def encode_texts(backend, texts, batch_size, repeats):
+    """
+    Кодирует тексты repeats раз и возвращает эмбеддинги и лучшее время.
+    """
+    backend.encode(texts[:batch_size], batch_size=batch_size)  # прогрев
+    best = None
+    embeddings = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        embeddings = backend.encode(texts, batch_size=batch_size)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return embeddings, best
+
+def main():
+    from sklearn.metrics import adjusted_rand_score
+
+    parser = argparse.ArgumentParser(description="Бенчмарк бэкендов эмбеддингов.")
+    parser.add_argument("--size", type=int, default=2000, help="Число постов.")
+    parser.add_argument("--seed", type=int, default=0, help="Зерно синтетической ленты.")
+    parser.add_argument("--backends", nargs="+", choices=EMBEDDING_BACKENDS, default=list(EMBEDDING_BACKENDS),
+                        help="Сравниваемые бэкенды (эталон — torch).")
+    parser.add_argument("--threads", type=int, default=None, help="Число потоков внутри операций.")
+    parser.add_argument("--batch-size", type=int, default=32, help="Размер пакета кодирования.")
+    parser.add_argument("--repeats", type=int, default=3, help="Число повторов замера.")
+    parser.add_argument("--min-cluster-size", type=int, default=5, help="min_cluster_size для HDBSCAN.")
+    args = parser.parse_args()
+
+    posts = [news_processor.submission_to_post(s) for s in make_submissions(args.size, seed=args.seed)]
+    texts = news_processor.build_post_texts(posts)
+    model_name = news_processor.DEFAULT_EMBEDDING_MODEL
+    print(f"{len(texts)} текстов, модель {model_name}, потоков {args.threads or 'по умолчанию'}")
+
+    reference = None
+    for name in ["torch"] + [b for b in args.backends if b != "torch"]:
+        start = time.perf_counter()
+        backend = create_embedding_backend(name, model_name, threads=args.threads)
+        load_seconds = time.perf_counter() - start
+        if backend.name != name:
+            print(f"  {name:<6} недоступен, пропуск")
+            continue
+        embeddings, seconds = encode_texts(backend, texts, args.batch_size, args.repeats)
+        labels = news_processor.cluster_embeddings(embeddings, min_cluster_size=args.min_cluster_size,
+                                                   reducer=create_reducer("pca"))
+        line = (f"  {name:<6} загрузка {load_seconds:6.2f} с, кодирование {seconds:7.2f} с "
+                f"({len(texts) / seconds:8.1f} текстов/с), кластеров {len(set(labels.tolist()) - {-1}):3d}")
+        if reference is None:
+            reference = (l2_normalize(embeddings), labels, seconds)
+        else:
+            cosine = np.sum(l2_normalize(embeddings) * reference[0], axis=1)
+            line += (f", ускорение x{reference[2] / seconds:.2f}, косинус с torch: средний {cosine.mean():.4f}, "
+                     f"минимальный {cosine.min():.4f}, ARI с torch {adjusted_rand_score(reference[1], labels):.3f}")
+        print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+benchmarks/delta_fetch_benchmark.py
+
+Проверка дельта-загрузки на имитации Reddit без сети: полная загрузка ленты,
+появление новых постов и повторное обновление. Выводит число запросов к API
+и статистику DeltaFetcher для каждого обновления. Запуск из корня репозитория:
+
+    python -m benchmarks.delta_fetch_benchmark --limit 500 --new-posts 30
+"""
+
+import argparse
+
+from benchmarks.fake_reddit import FakeReddit
+from delta_fetch import DeltaFetcher
+
+def refresh(fetcher, reddit, limit):
+    requests_before = reddit.requests
+    posts = [post for page, _ in fetcher.iter_pages(reddit, limit=limit) for post in page]
+    return posts, reddit.requests - requests_before
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк дельта-загрузки листингов.")
+    parser.add_argument("--limit", type=int, default=500, help="Размер ленты (post_limit).")
+    parser.add_argument("--new-posts", type=int, default=30, help="Сколько постов появляется между обновлениями.")
+    parser.add_argument("--refreshes", type=int, default=3, help="Число повторных обновлений.")
+    args = parser.parse_args()
+
+    reddit = FakeReddit(size=args.limit * 2)
+    fetcher = DeltaFetcher()
+    posts, requests = refresh(fetcher, reddit, args.limit)
+    print(f"Первая загрузка: {len(posts)} постов, запросов к API: {requests}")
+    for i in range(1, args.refreshes + 1):
+        reddit.front.hot.advance(args.new_posts)
+        posts, requests = refresh(fetcher, reddit, args.limit)
+        print(f"Обновление {i}: {len(posts)} постов, запросов к API: {requests}")
+        print("  " + fetcher.report("front/hot"))
+
+if __name__ == "__main__":
+    main()
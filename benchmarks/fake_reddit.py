@@ -0,0 +1,97 @@
+"""
+benchmarks/fake_reddit.py
+
+Имитация клиента PRAW без сети для бенчмарков. Поддерживает reddit.front.hot(...)
+и reddit.subreddit(name).hot/new/rising(...), постраничную выдачу по 100 постов
+с подсчётом запросов к «API», курсоры before/after и появление новых постов
+между обновлениями (advance).
+"""
+
+import random
+
+PAGE_SIZE = 100
+
+WORDS = (
+    "apple rocket election soccer market climate vaccine server python launch budget "
+    "senate league battery orbit startup crypto storm museum festival"
+).split()
+
+class FakeSubmission:
+    """
+    Минимальный аналог praw.models.Submission.
+    """
+    def __init__(self, index, rng, source):
+        self.id = f"{source}{index:x}"
+        self.name = f"t3_{self.id}"
+        self.title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 10))).capitalize()
+        self.selftext = " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 40)))
+        self.url = f"https://example.com/{self.id}"
+        self.permalink = f"/r/{source}/comments/{self.id}/"
+        self.thumbnail = "self"
+        self.created_utc = 1_700_000_000 + index * 60
+
+class FakeListing:
+    """
+    Листинг одного источника. Новые посты добавляются в начало.
+    """
+    def __init__(self, client, source, size, seed):
+        self.client = client
+        self.source = source
+        self.rng = random.Random(seed)
+        self.next_index = 0
+        self.items = []
+        self.advance(size)
+
+    def advance(self, count):
+        """
+        Добавляет count новых постов в начало листинга.
+        """
+        new_items = [FakeSubmission(self.next_index + i, self.rng, self.source) for i in range(count)]
+        self.next_index += count
+        self.items = list(reversed(new_items)) + self.items
+
+    def __call__(self, limit=100, params=None):
+        items = self.items
+        before = (params or {}).get("before")
+        after = (params or {}).get("after")
+        if before or after:
+            names = [item.name for item in items]
+        if before:
+            items = items[:names.index(before)] if before in names else items
+        elif after:
+            items = items[names.index(after) + 1:] if after in names else []
+        return self._generate(items[:limit] if limit is not None else items)
+
+    def _generate(self, items):
+        # Как ListingGenerator: следующая страница запрашивается, только когда она нужна
+        for start in range(0, len(items), PAGE_SIZE):
+            self.client.requests += 1
+            for item in items[start:start + PAGE_SIZE]:
+                yield item
+
+class FakeSubreddit:
+    def __init__(self, client, name):
+        self.hot = client.listing(f"{name}-hot")
+        self.new = client.listing(f"{name}-new")
+        self.rising = client.listing(f"{name}-rising")
+
+class FakeReddit:
+    """
+    Имитация praw.Reddit с детерминированным содержимым.
+
+    :ivar requests: Число выполненных «запросов к API» (страниц листингов).
+    """
+    def __init__(self, size=1000, seed=0):
+        self.size = size
+        self.seed = seed
+        self.requests = 0
+        self._listings = {}
+        self.front = FakeSubreddit(self, "front")
+
+    def listing(self, source):
+        if source not in self._listings:
+            self._listings[source] = FakeListing(self, source, self.size, hash((self.seed, source)) & 0xFFFF)
+        return self._listings[source]
+
+    def subreddit(self, name):
+        return FakeSubreddit(self, name)
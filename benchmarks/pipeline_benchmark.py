@@ -0,0 +1,202 @@
+"""
+benchmarks/pipeline_benchmark.py
+
+Сквозной бенчмарк конвейера на синтетической многоязычной ленте (benchmarks.synthetic_corpus):
+загрузка через fetch_user_news с имитацией PRAW, кластеризация cluster_posts_advanced
+(эмбеддинги + HDBSCAN), кластеризация cluster_posts (TF-IDF + KMeans) и генерация названий
+improved_hybrid_generate_cluster_names. Для каждого этапа измеряются время, пиковый RSS
+и пропускная способность (постов в секунду); результаты сохраняются в JSON и могут
+сравниваться с прошлым запуском. Запуск из корня репозитория:
+
+    python -m benchmarks.pipeline_benchmark --sizes 100 1000 10000 50000 --output pipeline.json
+    python -m benchmarks.pipeline_benchmark --sizes 1000 --compare pipeline.json
+
+Без доступа к модели SentenceTransformer можно указать --encoder hashing: эмбеддинги
+строятся хэшированием n-грамм, и замеряются накладные расходы конвейера без трансформера.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+import news_processor
+from benchmarks.synthetic_corpus import CorpusReddit, make_submissions
+from dim_reduction import DEFAULT_REDUCTION, create_reducer
+from embedding_cache import EmbeddingCache
+
+STAGES = ["fetch", "cluster_advanced", "cluster_tfidf", "name"]
+
+class PeakRssSampler:
+    """
+    Фоновый замер пикового RSS процесса за время выполнения блока with.
+    """
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        rss = news_processor.current_rss_bytes()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return False
+
+class HashingEncoder:
+    """
+    Детерминированный кодировщик без нейросети: хэширование символьных n-грамм в 384 признака.
+    """
+    def __init__(self, dim=384):
+        from sklearn.feature_extraction.text import HashingVectorizer
+        self.vectorizer = HashingVectorizer(n_features=dim, analyzer="char_wb", ngram_range=(3, 4), norm="l2")
+
+    def encode(self, sentences, convert_to_numpy=True, **kwargs):
+        return self.vectorizer.transform(sentences).toarray().astype(np.float32)
+
+def measure(stage, items, func):
+    """
+    Выполняет этап и возвращает его результат и метрики.
+    """
+    with PeakRssSampler() as sampler:
+        start = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - start
+    return result, {
+        "seconds": round(seconds, 4),
+        "peak_rss_bytes": sampler.peak,
+        "posts_per_second": round(items / seconds, 1) if seconds > 0 else None,
+    }
+
+def run_size(size, args, cache_dir):
+    """
+    Прогоняет конвейер на ленте заданного размера.
+
+    :return: Словарь с метриками этапов.
+    """
+    reddit = CorpusReddit(make_submissions(size, seed=args.seed))
+    stages = {}
+
+    (posts, _), stages["fetch"] = measure("fetch", size, lambda: news_processor.fetch_user_news(reddit, limit=size))
+    stages["fetch"]["api_requests"] = reddit.requests
+
+    cache = EmbeddingCache(cache_dir=os.path.join(cache_dir, str(size)), model_name=args.encoder)
+    reducer = create_reducer(args.reduction)
+    (clustered, labels), stages["cluster_advanced"] = measure(
+        "cluster_advanced", size,
+        lambda: news_processor.cluster_posts_advanced([dict(post) for post in posts], min_cluster_size=args.min_cluster_size,
+                                                      embedding_cache=cache, reducer=reducer,
+                                                      collapse_duplicates=True)
+    )
+    stages["cluster_advanced"]["representatives"] = len(clustered)
+    stages["cluster_advanced"]["clusters"] = len(set(labels.tolist()) - {-1})
+
+    if size <= args.kmeans_limit:
+        (_, kmeans_labels), stages["cluster_tfidf"] = measure(
+            "cluster_tfidf", size,
+            lambda: news_processor.cluster_posts([dict(post) for post in posts], n_clusters=args.kmeans_clusters)
+        )
+        stages["cluster_tfidf"]["clusters"] = len(set(kmeans_labels.tolist()))
+
+    def name_clusters():
+        clusters = news_processor.group_posts_by_cluster(clustered)
+        # Эмбеддинги представителей уже в кэше после cluster_posts_advanced
+        embeddings = news_processor.embed_posts(clustered, cache)
+        return news_processor.improved_hybrid_generate_cluster_names(
+            clusters, cluster_vectors=news_processor.group_embeddings_by_cluster(labels, embeddings)
+        )
+    names, stages["name"] = measure("name", len(clustered), name_clusters)
+    stages["name"]["examples"] = [names[key] for key in sorted(names)[:5]]
+    return stages
+
+def compare(results, previous):
+    """
+    Печатает изменение времени этапов относительно прошлого запуска.
+    """
+    previous_by_size = {run["size"]: run["stages"] for run in previous.get("runs", [])}
+    for run in results["runs"]:
+        old = previous_by_size.get(run["size"])
+        if not old:
+            continue
+        print(f"\nСравнение, {run['size']} постов:")
+        for stage in STAGES:
+            if stage in run["stages"] and stage in old:
+                before, after = old[stage]["seconds"], run["stages"][stage]["seconds"]
+                change = (after - before) / before * 100 if before else 0.0
+                print(f"  {stage:<17} {before:9.3f} с -> {after:9.3f} с ({change:+.1f}%)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Сквозной бенчмарк конвейера ClusterNews.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000], help="Размеры ленты.")
+    parser.add_argument("--seed", type=int, default=0, help="Зерно синтетической ленты.")
+    parser.add_argument("--encoder", choices=["model", "hashing"], default="model",
+                        help="model — SentenceTransformer, hashing — хэширование n-грамм без нейросети.")
+    parser.add_argument("--reduction", default=DEFAULT_REDUCTION, help="Понижение размерности перед HDBSCAN.")
+    parser.add_argument("--min-cluster-size", type=int, default=5, help="min_cluster_size для HDBSCAN.")
+    parser.add_argument("--kmeans-clusters", type=int, default=10, help="Число кластеров для cluster_posts.")
+    parser.add_argument("--kmeans-limit", type=int, default=50000,
+                        help="Не запускать cluster_posts для лент больше этого размера.")
+    parser.add_argument("--output", default="pipeline_benchmark.json", help="Путь для сохранения результатов в JSON.")
+    parser.add_argument("--compare", help="JSON прошлого запуска для сравнения.")
+    args = parser.parse_args()
+
+    if args.encoder == "hashing":
+        news_processor.model_registry.get(
+            f"sentence_transformer:{news_processor.DEFAULT_EMBEDDING_MODEL}", HashingEncoder
+        )
+
+    results = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "encoder": args.encoder,
+        "reduction": args.reduction,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "runs": [],
+    }
+    cache_dir = tempfile.mkdtemp(prefix="pipeline_benchmark_")
+    try:
+        for size in args.sizes:
+            print(f"\n=== {size} постов ===")
+            stages = run_size(size, args, cache_dir)
+            results["runs"].append({"size": size, "stages": stages})
+            for stage in STAGES:
+                if stage not in stages:
+                    continue
+                metrics = stages[stage]
+                rss = f"{metrics['peak_rss_bytes'] / 2 ** 20:.0f} МБ" if metrics["peak_rss_bytes"] else "н/д"
+                print(f"  {stage:<17} {metrics['seconds']:9.3f} с, пиковый RSS {rss}, "
+                      f"{metrics['posts_per_second']} постов/с")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4, ensure_ascii=False)
+    print(f"\nРезультаты сохранены в {args.output}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+benchmarks/reduction_benchmark.py
+
+Сравнение кластеризации HDBSCAN на исходных эмбеддингах и после понижения размерности
+(PCA, усечённый SVD и UMAP, если установлен umap-learn). Эмбеддинги синтетические:
+смесь анизотропных гауссовых тем в пространстве размерности MiniLM, поэтому модель
+загружать не нужно. Для каждого размера выводится время обучения проекции и кластеризации,
+а также согласие кластеров (ARI) с разметкой на исходных векторах и с истинными темами.
+Запуск из корня репозитория:
+
+    python -m benchmarks.reduction_benchmark --sizes 1000 5000 20000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from dim_reduction import EmbeddingReducer, l2_normalize
+
+EMBEDDING_DIM = 384
+
+def make_embeddings(n, topics=40, dim=EMBEDDING_DIM, noise_share=0.1, seed=0):
+    """
+    Синтетические эмбеддинги: topics тем, у каждой — свой центр и несколько главных направлений,
+    плюс доля равномерного шума.
+
+    :return: Кортеж (embeddings, topic_labels), у шумовых точек метка -1.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(topics, dim))
+    directions = rng.normal(size=(topics, 8, dim)) * 0.35
+    labels = rng.integers(0, topics, size=n)
+    weights = rng.normal(size=(n, 8))
+    vectors = centers[labels] + np.einsum("nk,nkd->nd", weights, directions[labels])
+    vectors += rng.normal(scale=0.6, size=(n, dim))
+    noise = rng.random(n) < noise_share
+    vectors[noise] = rng.normal(scale=2.0, size=(noise.sum(), dim))
+    labels[noise] = -1
+    return l2_normalize(vectors), labels
+
+def run_hdbscan(vectors, min_cluster_size):
+    import hdbscan
+    start = time.perf_counter()
+    labels = hdbscan.HDBSCAN(min_cluster_size=min_cluster_size).fit_predict(vectors)
+    return labels, time.perf_counter() - start
+
+def cluster_count(labels):
+    return len(set(labels.tolist()) - {-1})
+
+def main():
+    from sklearn.metrics import adjusted_rand_score
+
+    parser = argparse.ArgumentParser(description="Бенчмарк понижения размерности перед HDBSCAN.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000], help="Размеры корпуса.")
+    parser.add_argument("--methods", nargs="+", default=["pca", "svd", "umap"], help="Методы проекции.")
+    parser.add_argument("--components", type=int, default=50, help="Размерность после проекции.")
+    parser.add_argument("--min-cluster-size", type=int, default=10, help="min_cluster_size для HDBSCAN.")
+    parser.add_argument("--raw-limit", type=int, default=20000,
+                        help="Не кластеризовать исходные векторы для корпусов больше этого размера.")
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        embeddings, topics = make_embeddings(n)
+        print(f"\n{n} постов, размерность {embeddings.shape[1]}")
+        raw_labels = None
+        if n <= args.raw_limit:
+            raw_labels, seconds = run_hdbscan(embeddings, args.min_cluster_size)
+            print(f"  {'raw':<6} проекция      -      кластеризация {seconds:7.2f} с, "
+                  f"кластеров {cluster_count(raw_labels):3d}, ARI с темами {adjusted_rand_score(topics, raw_labels):.3f}")
+        for method in args.methods:
+            reducer = EmbeddingReducer(method, n_components=args.components)
+            reduced = reducer.fit_transform(embeddings)
+            if reducer.fitted_method != method:
+                print(f"  {method:<6} недоступен (использован {reducer.fitted_method}), пропуск")
+                continue
+            labels, seconds = run_hdbscan(reduced, args.min_cluster_size)
+            start = time.perf_counter()
+            reducer.transform(embeddings[:100])
+            transform_ms = (time.perf_counter() - start) * 1000
+            agreement = f", ARI с raw {adjusted_rand_score(raw_labels, labels):.3f}" if raw_labels is not None else ""
+            print(f"  {method:<6} проекция {reducer.fit_seconds:5.2f} с, кластеризация {seconds:7.2f} с, "
+                  f"кластеров {cluster_count(labels):3d}, ARI с темами {adjusted_rand_score(topics, labels):.3f}"
+                  f"{agreement}; проекция 100 новых постов {transform_ms:.1f} мс")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+benchmarks/startup_benchmark.py
+
+Замер скорости запуска приложения: стоимость импорта каждого модуля проекта
+(по данным python -X importtime) и время до показа главного окна.
+
+Каждый замер выполняется в отдельном процессе, чтобы не учитывать уже импортированные модули.
+Запуск из корня репозитория:
+
+    python -m benchmarks.startup_benchmark --repeat 5 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Модули проекта, стоимость импорта которых отслеживается
+PROJECT_MODULES = ["embedding_cache", "news_processor", "gui.news_worker", "gui.main_window", "main"]
+
+# Сторонние модули, появление которых при старте означает потерю ленивого импорта
+HEAVY_MODULES = ["torch", "sentence_transformers", "hdbscan", "keybert", "sklearn", "nltk"]
+
+# Скрипт дочернего процесса: показывает MainWindow с пустой заглушкой Reddit
+# и печатает момент, когда окно показано и цикл событий запущен.
+FIRST_WINDOW_SCRIPT = """
+import sys, time
+sys.path.insert(0, {root!r})
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QTimer
+from gui.main_window import MainWindow
+
+class _EmptyListing:
+    def hot(self, limit=None, **kwargs):
+        return iter([])
+
+class _StubReddit:
+    front = _EmptyListing()
+    def subreddit(self, name):
+        return _EmptyListing()
+
+app = QApplication(sys.argv)
+window = MainWindow(_StubReddit())
+window.show()
+
+def report():
+    print("FIRST_WINDOW", time.time(), flush=True)
+    app.quit()
+
+QTimer.singleShot(0, report)
+app.exec_()
+"""
+
+def _child_env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = REPO_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return env
+
+def measure_import(module):
+    """
+    Измеряет стоимость импорта модуля в чистом процессе.
+
+    :param module: Имя модуля.
+    :return: Словарь с общим временем импорта (мс) и списком загруженных тяжёлых зависимостей.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, env=_child_env(), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"}
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            cumulative_us = int(parts[1].strip())
+        except ValueError:
+            continue
+        cumulative[parts[2].strip()] = cumulative_us
+    return {
+        "cumulative_ms": cumulative.get(module, 0) / 1000.0,
+        "heavy_modules_loaded": [name for name in HEAVY_MODULES if name in cumulative],
+    }
+
+def measure_first_window():
+    """
+    Измеряет время от запуска процесса до показа главного окна.
+
+    :return: Время в секундах или None, если окно не удалось показать.
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        start = time.time()
+        result = subprocess.run(
+            [sys.executable, "-c", FIRST_WINDOW_SCRIPT.format(root=REPO_ROOT)],
+            cwd=workdir, env=_child_env(), capture_output=True, text=True, timeout=120
+        )
+    for line in result.stdout.splitlines():
+        if line.startswith("FIRST_WINDOW"):
+            return float(line.split()[1]) - start
+    print(result.stderr, file=sys.stderr)
+    return None
+
+def run(repeat):
+    imports = {}
+    for module in PROJECT_MODULES:
+        samples = [measure_import(module) for _ in range(repeat)]
+        timings = [s["cumulative_ms"] for s in samples if "cumulative_ms" in s]
+        imports[module] = {
+            "median_ms": statistics.median(timings) if timings else None,
+            "heavy_modules_loaded": samples[-1].get("heavy_modules_loaded", []),
+            "error": samples[-1].get("error"),
+        }
+    windows = [t for t in (measure_first_window() for _ in range(repeat)) if t is not None]
+    return {
+        "python": sys.version.split()[0],
+        "repeat": repeat,
+        "imports": imports,
+        "first_window_s": statistics.median(windows) if windows else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер времени запуска ClusterNews.")
+    parser.add_argument("--repeat", type=int, default=3, help="Число повторов каждого замера.")
+    parser.add_argument("--output", help="Путь для сохранения результатов в JSON.")
+    args = parser.parse_args()
+
+    report = run(args.repeat)
+    for module, info in report["imports"].items():
+        if info["error"]:
+            print(f"{module:<20} ошибка: {info['error']}")
+            continue
+        heavy = ", ".join(info["heavy_modules_loaded"]) or "—"
+        print(f"{module:<20} {info['median_ms']:8.1f} мс   тяжёлые зависимости: {heavy}")
+    first_window = report["first_window_s"]
+    print(f"Время до первого окна: {first_window:.2f} с" if first_window is not None
+          else "Не удалось показать окно.")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
+
+if __name__ == "__main__":
+    main()
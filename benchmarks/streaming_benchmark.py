@@ -0,0 +1,54 @@
+"""
+benchmarks/streaming_benchmark.py
+
+Пиковая память при вычислении эмбеддингов всей ленты одним вызовом модели и потоковым
+кодированием порциями (streaming_encoder). Для каждого размера ленты выводится прирост
+пикового RSS сверх размера итогового массива эмбеддингов: у потокового режима он должен
+оставаться примерно постоянным. Запуск из корня репозитория:
+
+    python -m benchmarks.streaming_benchmark --sizes 1000 10000 50000 --encoder hashing
+"""
+
+import argparse
+import gc
+
+import news_processor
+from benchmarks.pipeline_benchmark import HashingEncoder, PeakRssSampler
+from benchmarks.synthetic_corpus import make_submissions
+
+def measure(func):
+    gc.collect()
+    base = news_processor.current_rss_bytes()
+    with PeakRssSampler() as sampler:
+        result = func()
+    overhead = None
+    if base is not None and sampler.peak is not None:
+        overhead = sampler.peak - base - result.nbytes
+    return result, overhead
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк памяти потокового кодирования.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000], help="Размеры ленты.")
+    parser.add_argument("--chunk-size", type=int, default=256, help="Число постов в порции.")
+    parser.add_argument("--encoder", choices=["model", "hashing"], default="model",
+                        help="model — бэкенд эмбеддингов, hashing — хэширование n-грамм без нейросети.")
+    args = parser.parse_args()
+
+    if args.encoder == "hashing":
+        news_processor.model_registry.get(
+            f"sentence_transformer:{news_processor.DEFAULT_EMBEDDING_MODEL}", HashingEncoder
+        )
+    backend = news_processor.model_registry.get_embedding_backend()
+
+    for size in args.sizes:
+        posts = [news_processor.submission_to_post(s) for s in make_submissions(size)]
+        _, one_shot = measure(lambda: backend.encode(news_processor.build_post_texts(posts)))
+        _, streaming = measure(lambda: news_processor.embed_posts(posts, chunk_size=args.chunk_size))
+        print(f"{size:>7} постов: накладные расходы одним вызовом {format_mb(one_shot)}, "
+              f"порциями по {args.chunk_size} {format_mb(streaming)}")
+
+def format_mb(value):
+    return "н/д" if value is None else f"{value / 2 ** 20:8.1f} МБ"
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+benchmarks/synthetic_corpus.py
+
+Детерминированная синтетическая многоязычная лента для бенчмарков и имитация клиента PRAW
+поверх неё. Посты распределены по темам на нескольких языках (en, ru, de, es, fr);
+часть постов — репосты с небольшой правкой и кросспосты, как в настоящих горячих лентах.
+"""
+
+import random
+
+from benchmarks.fake_reddit import PAGE_SIZE
+
+# Тематические словари: у каждой темы свои слова на каждом языке
+TOPICS = {
+    "space": {
+        "en": "rocket launch orbit mars moon satellite astronaut nasa telescope galaxy",
+        "ru": "ракета запуск орбита марс луна спутник космонавт телескоп галактика станция",
+        "de": "rakete start umlaufbahn mars mond satellit astronaut teleskop galaxie raumfahrt",
+        "es": "cohete lanzamiento órbita marte luna satélite astronauta telescopio galaxia espacio",
+        "fr": "fusée lancement orbite mars lune satellite astronaute télescope galaxie espace",
+    },
+    "politics": {
+        "en": "election senate vote president campaign parliament minister law policy debate",
+        "ru": "выборы сенат голосование президент кампания парламент министр закон политика дебаты",
+        "de": "wahl senat abstimmung präsident kampagne parlament minister gesetz politik debatte",
+        "es": "elección senado voto presidente campaña parlamento ministro ley política debate",
+        "fr": "élection sénat vote président campagne parlement ministre loi politique débat",
+    },
+    "sports": {
+        "en": "soccer league match goal coach team season championship player transfer",
+        "ru": "футбол лига матч гол тренер команда сезон чемпионат игрок трансфер",
+        "de": "fußball liga spiel tor trainer mannschaft saison meisterschaft spieler transfer",
+        "es": "fútbol liga partido gol entrenador equipo temporada campeonato jugador fichaje",
+        "fr": "football ligue match but entraîneur équipe saison championnat joueur transfert",
+    },
+    "tech": {
+        "en": "python server startup cloud chip software release bug update developer",
+        "ru": "питон сервер стартап облако чип программа релиз ошибка обновление разработчик",
+        "de": "python server startup cloud chip software version fehler update entwickler",
+        "es": "python servidor startup nube chip software versión error actualización desarrollador",
+        "fr": "python serveur startup nuage puce logiciel version bogue mise développeur",
+    },
+    "economy": {
+        "en": "market inflation budget bank stocks crypto prices trade tax growth",
+        "ru": "рынок инфляция бюджет банк акции криптовалюта цены торговля налог рост",
+        "de": "markt inflation haushalt bank aktien krypto preise handel steuer wachstum",
+        "es": "mercado inflación presupuesto banco acciones cripto precios comercio impuesto crecimiento",
+        "fr": "marché inflation budget banque actions crypto prix commerce impôt croissance",
+    },
+    "climate": {
+        "en": "climate storm flood heat drought emissions energy solar wind weather",
+        "ru": "климат шторм наводнение жара засуха выбросы энергия солнце ветер погода",
+        "de": "klima sturm flut hitze dürre emissionen energie solar wind wetter",
+        "es": "clima tormenta inundación calor sequía emisiones energía solar viento tiempo",
+        "fr": "climat tempête inondation chaleur sécheresse émissions énergie solaire vent météo",
+    },
+}
+
+# Служебные слова каждого языка (разбавляют тематические)
+FILLER = {
+    "en": "the a of and to in is for on with new after over says report",
+    "ru": "и в на не что это как по для после новый заявил отчёт",
+    "de": "der die das und zu in ist für mit nach neue sagt bericht",
+    "es": "el la de y a en es para con tras nuevo dice informe",
+    "fr": "le la de et à en est pour avec après nouveau dit rapport",
+}
+
+LANGUAGES = tuple(FILLER)
+
+class SyntheticSubmission:
+    """
+    Минимальный аналог praw.models.Submission.
+    """
+    def __init__(self, index, title, selftext, url, topic, language, crosspost_parent=None):
+        self.id = f"s{index:x}"
+        self.name = f"t3_{self.id}"
+        self.title = title
+        self.selftext = selftext
+        self.url = url
+        self.permalink = f"/r/{topic}_{language}/comments/{self.id}/"
+        self.thumbnail = "self"
+        self.created_utc = 1_700_000_000 - index * 30
+        self.topic = topic
+        self.language = language
+        if crosspost_parent:
+            self.crosspost_parent = crosspost_parent
+
+def _sentence(rng, topic_words, filler_words, length):
+    words = [rng.choice(topic_words) if rng.random() < 0.6 else rng.choice(filler_words) for _ in range(length)]
+    return " ".join(words)
+
+def make_submissions(count, seed=0, languages=LANGUAGES, repost_share=0.05, crosspost_share=0.03):
+    """
+    Генерирует детерминированную многоязычную ленту.
+
+    :param count: Число постов.
+    :param seed: Зерно генератора.
+    :param languages: Языки ленты.
+    :param repost_share: Доля репостов (копия текста с небольшой правкой и другим URL).
+    :param crosspost_share: Доля кросспостов (ссылка на исходный пост через crosspost_parent).
+    :return: Список SyntheticSubmission.
+    """
+    rng = random.Random(seed)
+    topics = sorted(TOPICS)
+    submissions = []
+    for index in range(count):
+        roll = rng.random()
+        if submissions and roll < repost_share:
+            original = rng.choice(submissions)
+            submission = SyntheticSubmission(index, original.title, original.selftext + " upd",
+                                             f"https://example.com/post/{index}", original.topic, original.language)
+        elif submissions and roll < repost_share + crosspost_share:
+            original = rng.choice(submissions)
+            submission = SyntheticSubmission(index, original.title, "", original.url, original.topic,
+                                             original.language, crosspost_parent=original.name)
+        else:
+            topic = rng.choice(topics)
+            language = rng.choice(languages)
+            topic_words = TOPICS[topic][language].split()
+            filler_words = FILLER[language].split()
+            title = _sentence(rng, topic_words, filler_words, rng.randint(5, 12)).capitalize()
+            selftext = ". ".join(_sentence(rng, topic_words, filler_words, rng.randint(6, 18))
+                                 for _ in range(rng.randint(0, 5)))
+            submission = SyntheticSubmission(index, title, selftext, f"https://example.com/post/{index}",
+                                             topic, language)
+        submissions.append(submission)
+    return submissions
+
+class CorpusListing:
+    """
+    Листинг поверх готового списка постов с постраничной выдачей и подсчётом запросов.
+    """
+    def __init__(self, client, submissions):
+        self.client = client
+        self.submissions = submissions
+
+    def __call__(self, limit=100, params=None):
+        items = self.submissions[:limit] if limit is not None else self.submissions
+        for start in range(0, len(items), PAGE_SIZE):
+            self.client.requests += 1
+            yield from items[start:start + PAGE_SIZE]
+
+class CorpusFront:
+    """
+    Набор листингов (hot/new/rising) одного источника.
+    """
+    def __init__(self, listing):
+        self.hot = listing
+        self.new = listing
+        self.rising = listing
+
+class CorpusReddit:
+    """
+    Имитация praw.Reddit, чья персональная лента (front.hot) — синтетический корпус.
+
+    :ivar requests: Число выполненных «запросов к API».
+    """
+    def __init__(self, submissions):
+        self.requests = 0
+        self.front = CorpusFront(CorpusListing(self, submissions))
+
+    def subreddit(self, name):
+        return self.front
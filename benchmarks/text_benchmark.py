@@ -0,0 +1,102 @@
+"""
+benchmarks/text_benchmark.py
+
+Микробенчмарк нормализации текста на синтетической ленте (по умолчанию 10 000 постов).
+
+Сравнивает прежний подход (отдельные проходы re.sub в каждом потребителе и поиск
+стоп-слов в списке) с движком text_engine: однократная нормализация с кэшем в посте
+и frozenset стоп-слов. Запуск из корня репозитория:
+
+    python -m benchmarks.text_benchmark --posts 10000
+"""
+
+import argparse
+import random
+import re
+import time
+
+import text_engine
+import news_processor
+
+WORDS = (
+    "apple rocket election soccer market climate vaccine server python launch budget "
+    "senate league battery orbit startup crypto storm museum festival the a of and to in is "
+    "новости выборы ракета рынок погода футбол это и в на не"
+).split()
+
+def make_posts(count, seed=42):
+    """
+    Генерирует детерминированную синтетическую ленту.
+    """
+    rng = random.Random(seed)
+    posts = []
+    for i in range(count):
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 12))).capitalize() + "!"
+        body = " ".join(rng.choice(WORDS) + rng.choice(["", ",", ".", "**", "  "]) for _ in range(rng.randint(0, 80)))
+        if rng.random() < 0.3:
+            body += " [ссылка](https://example.com/%d)" % i
+        posts.append({"title": title, "selftext": body, "permalink": f"/r/bench/{i}"})
+    return posts
+
+def legacy_clean_text(text):
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^a-zA-Zа-яА-Я0-9\s]', '', text)
+    return text.lower().strip()
+
+def legacy_consumers(posts):
+    """
+    Прежний порядок работы: каждый потребитель заново склеивает и очищает текст.
+    """
+    for post in posts:  # тексты для эмбеддингов
+        (post.get('title', '') + " " + post.get('selftext', '')).strip()
+    for post in posts:  # preprocess_posts
+        legacy_clean_text((post.get('title', '') + " " + post.get('selftext', '')).strip())
+    for post in posts:  # тексты кластеров для названий
+        legacy_clean_text((post.get('title', '') + " " + post.get('selftext', '')).strip())
+
+def engine_consumers(posts):
+    news_processor.build_post_texts(posts)
+    news_processor.preprocess_posts(posts)
+    news_processor.build_cluster_docs({0: posts})
+
+def legacy_rake(text, stop_words):
+    sentences = re.split(r'[.?!;\n]', text)
+    phrases = []
+    for sentence in sentences:
+        phrase = []
+        for word in sentence.split():
+            if word in stop_words:
+                if phrase:
+                    phrases.append(" ".join(phrase))
+                    phrase = []
+            else:
+                phrase.append(word)
+        if phrase:
+            phrases.append(" ".join(phrase))
+    return phrases
+
+def timed(label, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<45} {elapsed * 1000:9.1f} мс")
+
+def main():
+    parser = argparse.ArgumentParser(description="Микробенчмарк нормализации текста.")
+    parser.add_argument("--posts", type=int, default=10000, help="Размер синтетической ленты.")
+    args = parser.parse_args()
+
+    stop_list = news_processor.get_combined_stopwords()
+    stop_set = text_engine.as_stopword_set(stop_list)
+    texts = [p["title"] + " " + p["selftext"] for p in make_posts(args.posts)]
+
+    legacy_posts = make_posts(args.posts)
+    timed("прежний подход: 3 потребителя", lambda: legacy_consumers(legacy_posts))
+    posts = make_posts(args.posts)
+    timed("движок: 3 потребителя (холодный кэш)", lambda: engine_consumers(posts))
+    timed("движок: 3 потребителя (тёплый кэш)", lambda: engine_consumers(posts))
+    timed("RAKE, стоп-слова в списке", lambda: [legacy_rake(t, stop_list) for t in texts])
+    timed("RAKE, стоп-слова во frozenset", lambda: [text_engine.extract_phrases_rake(t, stop_set) for t in texts])
+
+if __name__ == "__main__":
+    main()
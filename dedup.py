@@ -0,0 +1,190 @@
+"""
+dedup.py
+
+Схлопывание почти одинаковых постов (репостов и кросспостов) до вычисления эмбеддингов.
+
+Для каждого поста строится MinHash-сигнатура по словесным шинглам нормализованного текста
+(того же кэша text_engine, что используют preprocess_posts и эмбеддинги). Кандидаты в дубликаты
+ищутся через LSH по полосам сигнатуры, а сходство подтверждается оценкой коэффициента Жаккара.
+Кроме того, дубликатами считаются посты с одинаковым URL и кросспосты одного исходного поста.
+
+Дубликаты не удаляются: они прикрепляются к представителю группы (первому посту группы
+в порядке ленты) в поле DUPLICATES_KEY, и дальше по конвейеру идёт только представитель.
+"""
+
+import zlib
+import numpy as np
+
+from text_engine import normalize_post
+
+# Поле представителя со списком схлопнутых в него постов
+DUPLICATES_KEY = "duplicates"
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+SHINGLE_SIZE = 3
+
+_MERSENNE_PRIME = (1 << 31) - 1
+
+def shingles(tokens, size=SHINGLE_SIZE):
+    """
+    Возвращает множество словесных шинглов длины size (для коротких текстов — сами токены).
+    """
+    if len(tokens) < size:
+        return set(tokens)
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+class MinHasher:
+    """
+    MinHash на семействе хэш-функций (a * x + b) mod p.
+    """
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, seed=1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, features):
+        """
+        :param features: Множество строковых признаков (шинглов).
+        :return: Массив uint64 длины num_perm или None для пустого множества.
+        """
+        if not features:
+            return None
+        hashes = np.fromiter((zlib.crc32(f.encode("utf-8")) & _MERSENNE_PRIME for f in features),
+                             dtype=np.uint64, count=len(features))
+        values = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _MERSENNE_PRIME
+        return values.min(axis=1)
+
+def identity_keys(post):
+    """
+    Ключи, совпадение которых означает один и тот же материал: URL ссылки,
+    fullname поста и fullname исходного поста для кросспостов.
+    """
+    keys = []
+    if post.get("url"):
+        keys.append("url:" + post["url"].rstrip("/"))
+    if post.get("id"):
+        keys.append("t3_" + post["id"])
+    if post.get("crosspost_parent"):
+        keys.append(post["crosspost_parent"])
+    return keys
+
+class NearDuplicateIndex:
+    """
+    Инкрементальный индекс представителей групп почти одинаковых постов.
+
+    Посты добавляются порциями (например, постранично по мере загрузки ленты); каждый новый пост
+    сравнивается со всеми ранее добавленными представителями.
+
+    :ivar checked: Число проверенных постов.
+    :ivar collapsed: Число постов, схлопнутых в представителей.
+    """
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM, bands=DEFAULT_BANDS):
+        """
+        :param threshold: Минимальная оценка коэффициента Жаккара шинглов для дубликата.
+        :param num_perm: Длина MinHash-сигнатуры.
+        :param bands: Число полос LSH (num_perm должно делиться на bands).
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm должно делиться на bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+        self._buckets = {}     # (полоса, байты полосы) -> [индексы представителей]
+        self._by_key = {}      # ключ идентичности -> индекс представителя
+        self._representatives = []
+        self._signatures = []
+        self.checked = 0
+        self.collapsed = 0
+
+    def __len__(self):
+        return len(self._representatives)
+
+    def _band_keys(self, signature):
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def _find(self, post, signature):
+        for key in identity_keys(post):
+            index = self._by_key.get(key)
+            if index is not None:
+                return index
+        if signature is None:
+            return None
+        candidates = set()
+        for band_key in self._band_keys(signature):
+            candidates.update(self._buckets.get(band_key, ()))
+        best, best_score = None, self.threshold
+        for index in candidates:
+            score = float(np.mean(self._signatures[index] == signature))
+            if score >= best_score:
+                best, best_score = index, score
+        return best
+
+    def collapse(self, posts):
+        """
+        Добавляет посты в индекс.
+
+        :param posts: Список постов.
+        :return: Список постов из posts, ставших представителями (в исходном порядке).
+            Остальные посты добавлены в поле DUPLICATES_KEY своих представителей.
+        """
+        # Те же объекты постов могут прийти повторно (переиспользованный хвост ленты при
+        # обновлении), поэтому группы прошлого схлопывания сбрасываются и строятся заново
+        for post in posts:
+            post.pop(DUPLICATES_KEY, None)
+        unique = []
+        for post in posts:
+            self.checked += 1
+            signature = self.hasher.signature(shingles(normalize_post(post).tokens))
+            index = self._find(post, signature)
+            if index is not None:
+                self._representatives[index].setdefault(DUPLICATES_KEY, []).append(post)
+                self.collapsed += 1
+                continue
+            index = len(self._representatives)
+            self._representatives.append(post)
+            self._signatures.append(signature)
+            for key in identity_keys(post):
+                self._by_key.setdefault(key, index)
+            if signature is not None:
+                for band_key in self._band_keys(signature):
+                    self._buckets.setdefault(band_key, []).append(index)
+            unique.append(post)
+        return unique
+
+def collapse_near_duplicates(posts, threshold=DEFAULT_THRESHOLD):
+    """
+    Схлопывает почти одинаковые посты списка.
+
+    :param posts: Список постов.
+    :param threshold: Минимальная оценка коэффициента Жаккара шинглов для дубликата.
+    :return: Список представителей групп в исходном порядке.
+    """
+    return NearDuplicateIndex(threshold).collapse(posts)
+
+def duplicate_group(post):
+    """
+    Возвращает группу поста: сам пост и схлопнутые в него дубликаты.
+    """
+    return [post] + post.get(DUPLICATES_KEY, [])
+
+def expand_groups(posts):
+    """
+    Разворачивает представителей обратно в полные группы для повторного схлопывания:
+    collapse сбрасывает группы своих входных постов и строит их заново.
+
+    :param posts: Список постов (представителей прошлого схлопывания и, возможно, других постов).
+    :return: Список постов групп в порядке ленты (представитель, затем его дубликаты), без повторов по permalink.
+    """
+    expanded = []
+    seen = set()
+    for post in posts:
+        for member in duplicate_group(post):
+            key = member.get("permalink") or id(member)
+            if key not in seen:
+                seen.add(key)
+                expanded.append(member)
+    return expanded
@@ -0,0 +1,256 @@
+"""
+delta_fetch.py
+
+Дельта-загрузка листингов Reddit. Для каждого источника (например, "front/hot")
+запоминаются fullname уже виденных постов, курсор самого нового поста и результат
+прошлой загрузки. При обновлении листинг читается сверху, пока не встретится серия
+из stop_after_known уже известных постов; дальше страницы не запрашиваются, а хвост
+ленты берётся из прошлого результата. Для листингов "new" используется курсор before,
+и API возвращает только посты новее последнего виденного.
+"""
+
+import math
+import threading
+from collections import OrderedDict
+
+from news_processor import LISTING_PAGE_SIZE, submission_to_post
+
+# Сколько известных постов подряд должно встретиться, чтобы прекратить чтение листинга
+DEFAULT_STOP_AFTER_KNOWN = 25
+
+# Сколько fullname хранить на источник
+MAX_KNOWN_FULLNAMES = 5000
+
+# Примерный размер одного поста в JSON-ответе листинга Reddit, байт (для оценки экономии)
+APPROX_LISTING_ITEM_BYTES = 4096
+
+def post_fullname(post):
+    """
+    Возвращает fullname поста Reddit (t3_<id>) или None, если id неизвестен.
+    """
+    post_id = post.get("id")
+    return f"t3_{post_id}" if post_id else None
+
+class ListingState:
+    """
+    Состояние одного источника между обновлениями.
+    """
+    __slots__ = ("known", "newest", "posts")
+
+    def __init__(self):
+        self.known = OrderedDict()  # fullname -> None, в порядке появления
+        self.newest = None          # fullname самого нового поста (курсор before)
+        self.posts = []             # результат прошлой загрузки
+
+    def remember(self, posts):
+        for post in posts:
+            fullname = post_fullname(post)
+            if fullname:
+                self.known[fullname] = None
+                self.known.move_to_end(fullname)
+        while len(self.known) > MAX_KNOWN_FULLNAMES:
+            self.known.popitem(last=False)
+
+class DeltaFetcher:
+    """
+    Загрузчик листингов, скачивающий при обновлении только изменившееся начало ленты.
+
+    Статистика последней загрузки каждого источника доступна в last_stats:
+    число запрошенных и сэкономленных страниц API и оценка сэкономленных байтов.
+    """
+    def __init__(self, stop_after_known=DEFAULT_STOP_AFTER_KNOWN, page_size=LISTING_PAGE_SIZE):
+        """
+        :param stop_after_known: Число известных постов подряд, после которого чтение прекращается.
+        :param page_size: Размер страницы API (постов за один запрос).
+        """
+        self.stop_after_known = stop_after_known
+        self.page_size = page_size
+        self.states = {}
+        self.last_stats = {}
+        self.last_source = None
+        self._lock = threading.Lock()
+
+    def reset(self, source=None):
+        """
+        Забывает состояние источника (или всех источников), следующая загрузка будет полной.
+        """
+        with self._lock:
+            if source is None:
+                self.states.clear()
+            else:
+                self.states.pop(source, None)
+
+    def _bytes_estimate(self, pages_saved):
+        # Оценка по сэкономленным страницам (полные страницы по page_size постов), а не измерение
+        return pages_saved * self.page_size * APPROX_LISTING_ITEM_BYTES
+
+    def _state(self, source):
+        with self._lock:
+            return self.states.setdefault(source, ListingState())
+
+    def iter_source(self, source, listing, limit=50, sort="hot", page_size=LISTING_PAGE_SIZE):
+        """
+        Постранично выдаёт посты источника, загружая из сети только новые.
+
+        :param source: Ключ источника (например, "front/hot" или "r/python/new").
+        :param listing: Функция listing(limit=..., params=...) — метод листинга PRAW, например front.hot.
+        :param limit: Максимальное число постов в итоговой ленте.
+        :param sort: Порядок листинга; для "new" используется курсор before.
+        :param page_size: Число постов в одной выдаваемой странице.
+        :return: Генератор страниц (списков постов). Последняя страница может содержать
+            посты прошлой загрузки, которые не запрашивались повторно.
+        """
+        state = self._state(source)
+        # Досрочная остановка возможна, только если прошлый результат покрывает нужный объём ленты
+        can_reuse = len(state.posts) >= limit
+        use_cursor = sort == "new" and state.newest is not None and can_reuse
+        params = {"before": state.newest} if use_cursor else {}
+        seen = set()
+        fresh = []
+        page = []
+        fetched = 0
+        known_run = 0
+        stopped_early = False
+        for submission in listing(limit=limit, params=params):
+            fetched += 1
+            post = submission_to_post(submission)
+            fullname = post_fullname(post)
+            if fullname is not None:
+                if fullname in seen:
+                    continue
+                seen.add(fullname)
+            fresh.append(post)
+            page.append(post)
+            if len(page) >= page_size:
+                yield page
+                page = []
+            if can_reuse and not use_cursor and fullname in state.known:
+                known_run += 1
+                if known_run >= self.stop_after_known:
+                    stopped_early = True
+                    break
+            else:
+                known_run = 0
+
+        # Хвост ленты берём из прошлой загрузки, если листинг был прочитан не полностью
+        tail = []
+        if stopped_early or use_cursor:
+            for post in state.posts:
+                if len(fresh) + len(tail) >= limit:
+                    break
+                if post_fullname(post) not in seen:
+                    tail.append(post)
+        page.extend(tail)
+        if page:
+            yield page
+
+        full_pages = math.ceil(limit / self.page_size)
+        pages = max(math.ceil(fetched / self.page_size), 1)
+        new_items = sum(1 for post in fresh if post_fullname(post) not in state.known)
+        pages_saved = max(full_pages - pages, 0)
+        with self._lock:
+            self.last_stats[source] = {
+                "pages_fetched": pages,
+                "pages_saved": pages_saved,
+                "items_fetched": fetched,
+                "items_new": new_items,
+                "items_reused": len(tail),
+                "bytes_saved_estimate": self._bytes_estimate(pages_saved),
+            }
+            state.remember(fresh)
+            merged = fresh + tail
+            state.posts = merged
+            if merged and post_fullname(merged[0]):
+                state.newest = post_fullname(merged[0])
+
+    def extend_source(self, source, listing, count, page_size=LISTING_PAGE_SIZE):
+        """
+        Дозагружает count постов, следующих за концом прошлого результата источника
+        (курсор after), например при увеличении лимита постов.
+
+        :param source: Ключ источника.
+        :param listing: Функция listing(limit=..., params=...).
+        :param count: Сколько постов дозагрузить.
+        :param page_size: Число постов в одной выдаваемой странице.
+        :return: Генератор страниц только с новыми для источника постами.
+        """
+        state = self._state(source)
+        after = post_fullname(state.posts[-1]) if state.posts else None
+        if after is None or count <= 0:
+            return
+        seen = {post_fullname(post) for post in state.posts}
+        fresh = []
+        page = []
+        fetched = 0
+        for submission in listing(limit=count, params={"after": after}):
+            fetched += 1
+            post = submission_to_post(submission)
+            fullname = post_fullname(post)
+            if fullname is not None:
+                if fullname in seen:
+                    continue
+                seen.add(fullname)
+            fresh.append(post)
+            page.append(post)
+            if len(page) >= page_size:
+                yield page
+                page = []
+        if page:
+            yield page
+
+        pages_saved = math.ceil(len(state.posts) / self.page_size)
+        with self._lock:
+            self.last_stats[source] = {
+                "pages_fetched": max(math.ceil(fetched / self.page_size), 1),
+                "pages_saved": pages_saved,
+                "items_fetched": fetched,
+                "items_new": len(fresh),
+                "items_reused": len(state.posts),
+                "bytes_saved_estimate": self._bytes_estimate(pages_saved),
+            }
+            state.remember(fresh)
+            state.posts = state.posts + fresh
+
+    def iter_pages(self, reddit_instance, limit=50, page_size=LISTING_PAGE_SIZE):
+        """
+        Аналог news_processor.iter_user_news с дельта-загрузкой: персональная лента,
+        а если она пуста — сабреддит "all".
+
+        :return: Генератор кортежей (page, fallback_used).
+        """
+        received = False
+        self.last_source = "front/hot"
+        for page in self.iter_source("front/hot", reddit_instance.front.hot, limit=limit, page_size=page_size):
+            received = True
+            yield page, False
+        if received:
+            return
+        self.last_source = "r/all/hot"
+        for page in self.iter_source("r/all/hot", reddit_instance.subreddit("all").hot, limit=limit,
+                                     page_size=page_size):
+            yield page, True
+
+    def iter_more_pages(self, reddit_instance, count, page_size=LISTING_PAGE_SIZE):
+        """
+        Дозагружает count постов ленты, прочитанной последним вызовом iter_pages.
+
+        :return: Генератор кортежей (page, fallback_used).
+        """
+        if self.last_source == "r/all/hot":
+            listing, fallback = reddit_instance.subreddit("all").hot, True
+        else:
+            listing, fallback = reddit_instance.front.hot, False
+        for page in self.extend_source(self.last_source or "front/hot", listing, count, page_size=page_size):
+            yield page, fallback
+
+    def report(self, source):
+        """
+        Возвращает строку со статистикой последней загрузки источника.
+        """
+        stats = self.last_stats.get(source)
+        if not stats:
+            return f"{source}: нет данных"
+        return (f"{source}: запрошено страниц {stats['pages_fetched']}, сэкономлено {stats['pages_saved']} "
+                f"(оценка ~{stats['bytes_saved_estimate'] / 1024:.0f} КБ из расчёта "
+                f"{APPROX_LISTING_ITEM_BYTES // 1024} КБ на пост, не измерено), новых постов {stats['items_new']}, "
+                f"из прошлой загрузки {stats['items_reused']}")
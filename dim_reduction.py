@@ -0,0 +1,149 @@
+"""
+dim_reduction.py
+
+Понижение размерности эмбеддингов перед HDBSCAN. Оценка плотности в исходном
+пространстве (384 измерения у MiniLM) медленная и шумная, поэтому эмбеддинги
+проецируются в пространство меньшей размерности методом PCA, усечённым SVD или,
+если установлен пакет umap-learn, UMAP. До и после проекции векторы нормируются
+по L2, чтобы евклидово расстояние соответствовало косинусному.
+
+Обученная проекция хранится в EmbeddingReducer и переиспользуется между обновлениями:
+новые посты только проецируются, а повторное обучение выполняется вместе с полным
+переобучением кластеризатора.
+"""
+
+import threading
+import time
+import numpy as np
+
+REDUCTION_METHODS = ("none", "pca", "svd", "umap")
+# По умолчанию HDBSCAN работает в исходном пространстве, как до появления этапа проекции;
+# PCA, SVD и UMAP включаются в настройках или параметром --reduction
+DEFAULT_REDUCTION = "none"
+DEFAULT_COMPONENTS = 50
+
+# UMAP плохо масштабируется по числу компонент; для кластеризации достаточно небольшого числа
+UMAP_COMPONENTS = 10
+UMAP_NEIGHBORS = 15
+
+def l2_normalize(vectors):
+    """
+    Нормирует строки матрицы по L2 (нулевые строки остаются нулевыми).
+
+    :param vectors: Массив формы (n, dim).
+    :return: Массив float32 той же формы.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+class EmbeddingReducer:
+    """
+    Проекция эмбеддингов в пространство меньшей размерности с кэшированием обученной модели.
+
+    :ivar fit_seconds: Длительность последнего обучения проекции.
+    :ivar fitted_at: Время последнего обучения (Unix time) или None.
+    """
+    def __init__(self, method=DEFAULT_REDUCTION, n_components=DEFAULT_COMPONENTS, normalize=True,
+                 random_state=0):
+        """
+        :param method: "pca", "svd" или "umap" (при отсутствии umap-learn используется PCA).
+        :param n_components: Размерность результата (ограничивается числом постов и исходной размерностью).
+        :param normalize: Нормировать ли векторы по L2 до и после проекции.
+        :param random_state: Зерно для рандомизированных алгоритмов.
+        :raises ValueError: Если метод не поддерживается.
+        """
+        if method not in REDUCTION_METHODS or method == "none":
+            raise ValueError(f"Неподдерживаемый метод понижения размерности: {method!r}")
+        self.method = method
+        self.n_components = n_components
+        self.normalize = normalize
+        self.random_state = random_state
+        self.model = None
+        self.input_dim = None
+        self.fitted_method = None
+        self.fit_seconds = 0.0
+        self.fitted_at = None
+        self._lock = threading.Lock()
+
+    def is_fitted(self, dim=None):
+        """
+        Проверяет, обучена ли проекция (и, если задана dim, для векторов этой размерности).
+        """
+        return self.model is not None and (dim is None or dim == self.input_dim)
+
+    def _create_model(self, n_samples, dim):
+        n_components = max(min(self.n_components, n_samples - 1, dim), 1)
+        if self.method == "umap":
+            try:
+                import umap
+            except ImportError:
+                print("Пакет umap-learn не установлен, используется PCA.")
+            else:
+                if n_samples > UMAP_NEIGHBORS + 1:
+                    self.fitted_method = "umap"
+                    return umap.UMAP(n_components=min(UMAP_COMPONENTS, n_components), n_neighbors=UMAP_NEIGHBORS,
+                                     min_dist=0.0, metric="cosine", random_state=self.random_state)
+        if self.method == "svd" and n_components < dim:
+            from sklearn.decomposition import TruncatedSVD
+            self.fitted_method = "svd"
+            return TruncatedSVD(n_components=n_components, random_state=self.random_state)
+        from sklearn.decomposition import PCA
+        self.fitted_method = "pca"
+        return PCA(n_components=n_components, svd_solver="auto", random_state=self.random_state)
+
+    def fit(self, embeddings):
+        """
+        Обучает проекцию на эмбеддингах.
+
+        :param embeddings: Массив формы (n, dim).
+        :return: self.
+        """
+        vectors = l2_normalize(embeddings) if self.normalize else np.asarray(embeddings, dtype=np.float32)
+        with self._lock:
+            start = time.perf_counter()
+            model = self._create_model(*vectors.shape)
+            model.fit(vectors)
+            self.model = model
+            self.input_dim = vectors.shape[1]
+            self.fit_seconds = time.perf_counter() - start
+            self.fitted_at = time.time()
+        return self
+
+    def transform(self, embeddings):
+        """
+        Проецирует эмбеддинги обученной моделью.
+
+        :param embeddings: Массив формы (n, dim).
+        :return: Массив float32 формы (n, n_components).
+        :raises ValueError: Если проекция не обучена для векторов этой размерности.
+        """
+        vectors = l2_normalize(embeddings) if self.normalize else np.asarray(embeddings, dtype=np.float32)
+        if len(vectors) == 0:
+            return np.empty((0, self.n_components), dtype=np.float32)
+        with self._lock:
+            if not self.is_fitted(vectors.shape[1]):
+                raise ValueError("Проекция не обучена для эмбеддингов этой размерности.")
+            reduced = self.model.transform(vectors)
+        return l2_normalize(reduced) if self.normalize else np.asarray(reduced, dtype=np.float32)
+
+    def fit_transform(self, embeddings):
+        return self.fit(embeddings).transform(embeddings)
+
+    def reduce(self, embeddings):
+        """
+        Проецирует эмбеддинги, обучая проекцию только если она ещё не обучена
+        (или обучена для другой размерности, например после смены модели эмбеддингов).
+        """
+        if not self.is_fitted(np.shape(embeddings)[1]):
+            self.fit(embeddings)
+        return self.transform(embeddings)
+
+def create_reducer(method, n_components=DEFAULT_COMPONENTS):
+    """
+    Создаёт EmbeddingReducer для метода из настроек или возвращает None для "none".
+    """
+    if not method or method == "none":
+        return None
+    return EmbeddingReducer(method, n_components=n_components)
@@ -0,0 +1,237 @@
+"""
+embedding_backends.py
+
+Сменные бэкенды вычисления эмбеддингов для работы на CPU. Все бэкенды реализуют метод
+encode(sentences, batch_size=...) с тем же смыслом, что у SentenceTransformer, и сразу
+возвращают массив NumPy float32 (без промежуточных тензоров на устройстве):
+
+- torch — SentenceTransformer в полной точности (поведение по умолчанию);
+- int8 — тот же SentenceTransformer с динамическим квантованием линейных слоёв в int8;
+- onnx — экспортированная в ONNX модель в ONNX Runtime с токенизатором из пакета tokenizers.
+
+Модели загружаются из локального каталога MODELS_DIR/<имя модели>, если он существует
+(для onnx — обязательно: model.onnx или onnx/model.onnx и tokenizer.json), иначе torch и int8
+загружают модель по имени через sentence-transformers. Число потоков внутри операций
+задаётся явно параметром threads.
+"""
+
+import importlib.util
+import os
+from abc import ABC, abstractmethod
+import numpy as np
+
+EMBEDDING_BACKENDS = ("torch", "int8", "onnx")
+DEFAULT_EMBEDDING_BACKEND = "torch"
+MODELS_DIR = "models"
+DEFAULT_BATCH_SIZE = 32
+
+# Максимальная длина последовательности MiniLM в sentence-transformers
+MAX_SEQ_LENGTH = 256
+
+def local_model_dir(model_name, models_dir=MODELS_DIR):
+    """
+    Возвращает путь к локальной копии модели или None, если её нет.
+    """
+    path = os.path.join(models_dir, model_name)
+    return path if os.path.isdir(path) else None
+
+def onnx_model_path(model_dir):
+    """
+    Возвращает путь к model.onnx (или onnx/model.onnx) в каталоге модели или None.
+    """
+    if model_dir is None:
+        return None
+    return next((path for path in (os.path.join(model_dir, "model.onnx"),
+                                   os.path.join(model_dir, "onnx", "model.onnx"))
+                 if os.path.exists(path)), None)
+
+def resolve_embedding_backend(backend, model_name):
+    """
+    Возвращает имя бэкенда, который будет создан на самом деле, не загружая модель:
+    onnx без ONNX Runtime, tokenizers или локальной ONNX-модели заменяется на torch.
+    """
+    if backend != "onnx":
+        return backend
+    if importlib.util.find_spec("onnxruntime") is None or importlib.util.find_spec("tokenizers") is None:
+        return "torch"
+    if onnx_model_path(local_model_dir(model_name)) is None:
+        return "torch"
+    return backend
+
+def embedding_cache_tag(backend, model_name):
+    """
+    Имя модели для EmbeddingCache: эмбеддинги разных бэкендов немного различаются,
+    поэтому у неполноточных бэкендов свой кэш.
+    """
+    if backend == DEFAULT_EMBEDDING_BACKEND:
+        return model_name
+    return f"{model_name}:{backend}"
+
+def set_torch_threads(threads):
+    """
+    Ограничивает число потоков PyTorch внутри операций (None — значение по умолчанию).
+    """
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+
+class EmbeddingBackend(ABC):
+    """
+    Базовый класс бэкенда эмбеддингов.
+
+    :ivar name: Имя бэкенда из EMBEDDING_BACKENDS.
+    :ivar model_name: Имя модели.
+    :ivar threads: Число потоков внутри операций или None.
+    """
+    name = None
+
+    def __init__(self, model_name, threads=None):
+        self.model_name = model_name
+        self.threads = threads
+
+    @property
+    def cache_tag(self):
+        return embedding_cache_tag(self.name, self.model_name)
+
+    @abstractmethod
+    def encode(self, sentences, batch_size=DEFAULT_BATCH_SIZE, **kwargs):
+        """
+        Кодирует тексты.
+
+        :param sentences: Список строк.
+        :param batch_size: Размер пакета.
+        :return: Массив float32 формы (len(sentences), dim).
+        """
+
+class TorchBackend(EmbeddingBackend):
+    """
+    SentenceTransformer в полной точности.
+    """
+    name = "torch"
+
+    def __init__(self, model_name, threads=None, model=None):
+        """
+        :param model: Уже загруженный SentenceTransformer (например, из реестра моделей) или None.
+        """
+        super().__init__(model_name, threads)
+        set_torch_threads(threads)
+        self.model = model if model is not None else self._load()
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(local_model_dir(self.model_name) or self.model_name, device="cpu")
+
+    def encode(self, sentences, batch_size=DEFAULT_BATCH_SIZE, **kwargs):
+        embeddings = self.model.encode(sentences, batch_size=batch_size, convert_to_numpy=True)
+        return np.asarray(embeddings, dtype=np.float32)
+
+    def parameters(self):
+        return self.model.parameters()
+
+class QuantizedTorchBackend(TorchBackend):
+    """
+    SentenceTransformer с динамическим квантованием nn.Linear в int8: веса хранятся в int8,
+    активации квантуются на лету. Модель примерно вчетверо меньше и быстрее на CPU.
+    """
+    name = "int8"
+
+    def _load(self):
+        import torch
+        model = super()._load()
+        model.eval()
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+class OnnxBackend(EmbeddingBackend):
+    """
+    Модель в ONNX Runtime: токенизация пакетом, усреднение скрытых состояний по маске
+    и L2-нормировка, как у конвейера sentence-transformers для MiniLM.
+    """
+    name = "onnx"
+
+    def __init__(self, model_name, threads=None, model_dir=None, normalize=True):
+        """
+        :param model_dir: Каталог с model.onnx (или onnx/model.onnx) и tokenizer.json;
+            по умолчанию MODELS_DIR/<model_name>.
+        :param normalize: Нормировать ли эмбеддинги по L2.
+        :raises FileNotFoundError: Если файлы модели не найдены.
+        """
+        super().__init__(model_name, threads)
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = model_dir or local_model_dir(model_name)
+        if model_dir is None:
+            raise FileNotFoundError(f"Локальная модель {model_name} не найдена в {MODELS_DIR}.")
+        model_path = onnx_model_path(model_dir)
+        if model_path is None:
+            raise FileNotFoundError(f"В {model_dir} нет model.onnx.")
+        self.normalize = normalize
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        pad_id = self.tokenizer.token_to_id("[PAD]") or 0
+        self.tokenizer.enable_padding(pad_id=pad_id, pad_token="[PAD]")
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads or 0  # 0 — по числу ядер
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+
+    def _encode_batch(self, batch):
+        encodings = self.tokenizer.encode_batch(batch)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feed = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feed["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+        output = self.session.run(None, feed)[0]
+        if output.ndim == 2:
+            return output  # модель уже экспортирована вместе с пулингом
+        mask = attention_mask[:, :, None].astype(np.float32)
+        return (output * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+    def encode(self, sentences, batch_size=DEFAULT_BATCH_SIZE, **kwargs):
+        result = None
+        for start in range(0, len(sentences), batch_size):
+            pooled = self._encode_batch(sentences[start:start + batch_size])
+            if result is None:
+                result = np.empty((len(sentences), pooled.shape[1]), dtype=np.float32)
+            result[start:start + len(pooled)] = pooled
+        if result is None:
+            return np.empty((0, 0), dtype=np.float32)
+        if self.normalize:
+            norms = np.linalg.norm(result, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            result /= norms
+        return result
+
+def create_embedding_backend(backend, model_name, threads=None, sentence_transformer=None):
+    """
+    Создаёт бэкенд эмбеддингов. Если ONNX Runtime или локальная ONNX-модель недоступны,
+    используется torch.
+
+    :param backend: Имя бэкенда из EMBEDDING_BACKENDS.
+    :param model_name: Имя модели.
+    :param threads: Число потоков внутри операций или None.
+    :param sentence_transformer: Функция без аргументов, возвращающая общий SentenceTransformer
+        для бэкенда torch (чтобы не загружать модель повторно), или None.
+    :raises ValueError: Если бэкенд не поддерживается.
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Неподдерживаемый бэкенд эмбеддингов: {backend!r}")
+    resolved = resolve_embedding_backend(backend, model_name)
+    if resolved != backend:
+        print(f"Бэкенд {backend} недоступен (нет ONNX Runtime или локальной ONNX-модели), используется {resolved}.")
+        backend = resolved
+    if backend == "onnx":
+        try:
+            return OnnxBackend(model_name, threads=threads)
+        except (ImportError, FileNotFoundError) as e:
+            print(f"Бэкенд onnx недоступен ({e}), используется torch.")
+            backend = "torch"
+    if backend == "int8":
+        return QuantizedTorchBackend(model_name, threads=threads)
+    model = sentence_transformer() if sentence_transformer is not None else None
+    return TorchBackend(model_name, threads=threads, model=model)
@@ -0,0 +1,317 @@
+"""
+embedding_cache.py
+
+Постоянный дисковый кэш эмбеддингов постов. Эмбеддинги хранятся в виде матрицы
+float32 (или float16), отображённой в память (numpy.memmap), а индекс ключей — в JSON-файле.
+Ключ записи — permalink поста, дополнительно хранится хэш заголовка и selftext,
+поэтому отредактированные посты кодируются заново. При превышении лимита размера
+вытесняются записи, которые дольше всего не использовались. Изменённый индекс
+записывается на диск только вызовом save() (один раз за обновление и при завершении).
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+EMBEDDING_CACHE_DIR = "embedding_cache"
+INDEX_FILE = "index.json"
+MATRIX_FILE = "embeddings.bin"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+def post_key(post):
+    """
+    Возвращает ключ поста для кэша (permalink, либо url, либо заголовок).
+
+    :param post: Словарь с данными поста.
+    :return: Строковый ключ.
+    """
+    return post.get('permalink') or post.get('url') or post.get('title', '')
+
+def content_hash(post):
+    """
+    Вычисляет хэш содержимого поста (заголовок + selftext).
+
+    :param post: Словарь с данными поста.
+    :return: Шестнадцатеричная строка SHA-1.
+    """
+    content = (post.get('title', '') or '') + "\n" + (post.get('selftext', '') or '')
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+class EmbeddingCache:
+    """
+    Дисковый кэш эмбеддингов на основе memory-mapped матрицы и JSON-индекса.
+
+    Строки матрицы выделяются под посты по мере необходимости; освободившиеся после
+    вытеснения строки переиспользуются. Счётчики hits/misses накапливаются за всю сессию.
+    """
+    def __init__(self, cache_dir=EMBEDDING_CACHE_DIR, model_name=None, dtype="float32",
+                 max_bytes=DEFAULT_MAX_BYTES):
+        """
+        :param cache_dir: Каталог для файлов кэша.
+        :param model_name: Имя модели эмбеддингов; при его смене кэш сбрасывается.
+        :param dtype: Тип хранения: "float32" или "float16".
+        :param max_bytes: Максимальный размер матрицы эмбеддингов на диске.
+        """
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Неподдерживаемый тип хранения эмбеддингов: {dtype}")
+        self.cache_dir = cache_dir
+        self.model_name = model_name
+        self.dtype = np.dtype(dtype)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._dim = None
+        self._capacity = 0
+        self._entries = {}  # key -> [row, content_hash, last_used]
+        self._free_rows = []
+        self._matrix = None
+        self._dirty = False  # индекс изменён после последнего save()
+        self._load_index()
+
+    @property
+    def index_path(self):
+        return os.path.join(self.cache_dir, INDEX_FILE)
+
+    @property
+    def matrix_path(self):
+        return os.path.join(self.cache_dir, MATRIX_FILE)
+
+    @property
+    def max_rows(self):
+        """
+        Максимальное число строк, которое помещается в лимит размера.
+        """
+        if not self._dim:
+            return 0
+        return max(int(self.max_bytes // (self._dim * self.dtype.itemsize)), 1)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _load_index(self):
+        """
+        Загружает индекс и открывает матрицу, если кэш уже существует на диске.
+        Повреждённый или несовместимый кэш сбрасывается.
+        """
+        if not os.path.exists(self.index_path) or not os.path.exists(self.matrix_path):
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("dtype") != self.dtype.name or index.get("model") != self.model_name:
+                print("Кэш эмбеддингов создан для другой модели или типа данных, сбрасываю.")
+                self._reset_files()
+                return
+            self._dim = int(index["dim"])
+            self._capacity = int(index["capacity"])
+            self._entries = {key: list(value) for key, value in index["entries"].items()}
+            expected = self._capacity * self._dim * self.dtype.itemsize
+            if os.path.getsize(self.matrix_path) != expected:
+                raise ValueError("размер матрицы не совпадает с индексом")
+            self._open_matrix()
+            used = {entry[0] for entry in self._entries.values()}
+            self._free_rows = [row for row in range(self._capacity) if row not in used]
+        except Exception as e:
+            print(f"Ошибка при загрузке кэша эмбеддингов: {e}")
+            self._reset_files()
+
+    def _reset_files(self):
+        self._dim = None
+        self._capacity = 0
+        self._entries = {}
+        self._free_rows = []
+        self._matrix = None
+        self._dirty = True
+        for path in (self.index_path, self.matrix_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _open_matrix(self):
+        if self._capacity == 0:
+            self._matrix = None
+            return
+        self._matrix = np.memmap(self.matrix_path, dtype=self.dtype, mode="r+",
+                                 shape=(self._capacity, self._dim))
+
+    def _grow(self, needed_rows):
+        """
+        Увеличивает файл матрицы так, чтобы в нём было как минимум needed_rows строк.
+        """
+        new_capacity = min(max(needed_rows, self._capacity * 2, 64), self.max_rows)
+        if new_capacity <= self._capacity:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        with open(self.matrix_path, "ab") as f:
+            f.truncate(new_capacity * self._dim * self.dtype.itemsize)
+        self._free_rows.extend(range(self._capacity, new_capacity))
+        self._capacity = new_capacity
+        self._open_matrix()
+
+    def _allocate_rows(self, count, protected):
+        """
+        Выделяет count свободных строк, при необходимости расширяя файл
+        и вытесняя давно не использованные записи.
+
+        :param count: Число требуемых строк.
+        :param protected: Множество ключей, которые нельзя вытеснять (используются в текущем запросе).
+        :return: Список номеров строк (может быть короче count, если кэш меньше запроса).
+        """
+        if len(self._free_rows) < count:
+            self._grow(self._capacity + count - len(self._free_rows))
+        shortage = count - len(self._free_rows)
+        if shortage > 0:
+            candidates = sorted(
+                (entry[2], key) for key, entry in self._entries.items() if key not in protected
+            )
+            for _, key in candidates[:shortage]:
+                self._free_rows.append(self._entries.pop(key)[0])
+                self.evictions += 1
+        rows = self._free_rows[:count]
+        del self._free_rows[:count]
+        return rows
+
+    def get_embeddings(self, posts, texts, encode_fn):
+        """
+        Возвращает эмбеддинги для списка постов, кодируя только новые или изменённые посты.
+
+        Закэшированные строки читаются напрямую из memory-mapped матрицы в итоговый массив,
+        без промежуточных копий. Новые эмбеддинги записываются в кэш; индекс на диске
+        обновляется при следующем вызове save().
+
+        :param posts: Список постов.
+        :param texts: Тексты для кодирования (по одному на пост).
+        :param encode_fn: Функция, принимающая список текстов и возвращающая numpy-массив эмбеддингов.
+        :return: Массив float32 формы (len(posts), dim).
+        """
+        with self._lock:
+            keys = [post_key(post) for post in posts]
+            hashes = [content_hash(post) for post in posts]
+            now = time.time()
+            hit_positions, hit_rows, miss_positions = [], [], []
+            for i, (key, digest) in enumerate(zip(keys, hashes)):
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] == digest and self._matrix is not None:
+                    entry[2] = now
+                    self._dirty = True
+                    hit_positions.append(i)
+                    hit_rows.append(entry[0])
+                else:
+                    miss_positions.append(i)
+            self.hits += len(hit_positions)
+            self.misses += len(miss_positions)
+
+            new_embeddings = None
+            if miss_positions:
+                new_embeddings = np.asarray(encode_fn([texts[i] for i in miss_positions]),
+                                            dtype=np.float32)
+                if self._dim is None:
+                    self._dim = new_embeddings.shape[1]
+                elif new_embeddings.shape[1] != self._dim:
+                    print("Размерность эмбеддингов изменилась, сбрасываю кэш.")
+                    self._reset_files()
+                    self._dim = new_embeddings.shape[1]
+                    hit_positions, hit_rows = [], []
+                    miss_positions = list(range(len(posts)))
+                    new_embeddings = np.asarray(encode_fn(texts), dtype=np.float32)
+
+            result = np.empty((len(posts), self._dim or 0), dtype=np.float32)
+            if hit_positions:
+                result[hit_positions] = self._matrix[hit_rows]
+            if miss_positions:
+                result[miss_positions] = new_embeddings
+                self._store(keys, hashes, miss_positions, new_embeddings, now)
+            return result
+
+    def discard(self, posts):
+        """
+        Удаляет записи постов из кэша (например, вытесненных из временного окна);
+        их строки матрицы переиспользуются для новых эмбеддингов.
+
+        :param posts: Список постов.
+        :return: Число удалённых записей.
+        """
+        with self._lock:
+            removed = 0
+            for post in posts:
+                entry = self._entries.pop(post_key(post), None)
+                if entry is not None:
+                    self._free_rows.append(entry[0])
+                    removed += 1
+            if removed:
+                self._dirty = True
+            return removed
+
+    def _store(self, keys, hashes, positions, embeddings, now):
+        """
+        Записывает новые эмбеддинги в матрицу и обновляет индекс в памяти.
+        """
+        protected = set(keys)
+        # Повторяющийся в одном запросе ключ получает одну строку (с последним эмбеддингом)
+        latest = {}
+        for i, position in enumerate(positions):
+            latest[keys[position]] = i
+        reused = []
+        for key in latest:
+            entry = self._entries.get(key)
+            reused.append(entry[0] if entry is not None else None)
+        fresh_count = sum(1 for row in reused if row is None)
+        fresh_rows = iter(self._allocate_rows(fresh_count, protected))
+        for (key, i), row in zip(latest.items(), reused):
+            if row is None:
+                row = next(fresh_rows, None)
+                if row is None:
+                    continue  # свободных строк не осталось: эмбеддинг не сохраняется, обновления записей идут дальше
+            self._matrix[row] = embeddings[i]
+            self._entries[key] = [row, hashes[positions[i]], now]
+        self._dirty = True
+
+    def save(self):
+        """
+        Сбрасывает матрицу на диск и атомарно сохраняет индекс, если он изменился.
+        """
+        with self._lock:
+            if self._dim is None or not self._dirty:
+                return
+            os.makedirs(self.cache_dir, exist_ok=True)
+            if self._matrix is not None:
+                self._matrix.flush()
+            index = {
+                "model": self.model_name,
+                "dtype": self.dtype.name,
+                "dim": self._dim,
+                "capacity": self._capacity,
+                "entries": self._entries,
+            }
+            tmp_path = self.index_path + ".tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(index, f, ensure_ascii=False)
+                os.replace(tmp_path, self.index_path)
+                self._dirty = False
+            except Exception as e:
+                print(f"Ошибка при сохранении кэша эмбеддингов: {e}")
+
+    def stats(self):
+        """
+        Возвращает статистику работы кэша.
+
+        :return: Словарь со счётчиками попаданий, промахов, вытеснений и размером кэша.
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "size_bytes": self._capacity * (self._dim or 0) * self.dtype.itemsize,
+        }
@@ -0,0 +1,117 @@
+# gui/detail_prefetcher.py
+
+import html
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QObject
+import news_processor
+from dedup import DUPLICATES_KEY
+from embedding_cache import post_key
+
+DEFAULT_PAYLOAD_ITEMS = 512
+DEFAULT_WORKERS = 2
+# Сколько постов выбранного кластера подготавливается заранее
+PREFETCH_LIMIT = 100
+
+def _payload_source(post):
+    # Содержимое устаревает при изменении текста поста или состава его дубликатов
+    return post.get('title'), post.get('selftext'), len(post.get(DUPLICATES_KEY) or ())
+
+def build_detail_payload(post):
+    """
+    Готовит содержимое детального просмотра поста: HTML заголовка, краткое содержание,
+    ссылку на Reddit и список похожих постов. Не использует Qt и может выполняться в любом потоке.
+
+    :param post: Словарь с данными поста.
+    :return: Словарь с ключами source, title, thumbnail, summary, link, duplicates (HTML или None).
+    """
+    duplicates = post.get(DUPLICATES_KEY)
+    duplicates_html = None
+    if duplicates:
+        items = "".join(
+            f"<li><a href='https://www.reddit.com{dup.get('permalink', '')}'>{html.escape(dup.get('title', ''))}</a></li>"
+            for dup in duplicates
+        )
+        duplicates_html = f"Похожие посты и кросспосты ({len(duplicates)}):<ul>{items}</ul>"
+    return {
+        "source": _payload_source(post),
+        "title": f"<h2>{html.escape(post.get('title', ''))}</h2>",
+        "thumbnail": post.get('thumbnail'),
+        "summary": news_processor.summarize_post(post),
+        "link": f"<a href='https://www.reddit.com{post.get('permalink', '')}'>Открыть пост на Reddit</a>",
+        "duplicates": duplicates_html,
+    }
+
+class DetailPrefetcher(QObject):
+    """
+    Заранее готовит детальный просмотр постов выбранного кластера.
+
+    Содержимое (build_detail_payload) вычисляется в небольшом пуле потоков и хранится
+    в ограниченном LRU-кэше, а миниатюры запрашиваются у ThumbnailService, который
+    кладёт масштабированные изображения в свой кэш. При выборе другого кластера ещё
+    не начатые задачи прошлого кластера отменяются.
+    """
+    def __init__(self, thumbnail_service, thumbnail_width, parent=None, workers=DEFAULT_WORKERS,
+                 max_items=DEFAULT_PAYLOAD_ITEMS):
+        super().__init__(parent)
+        self.thumbnail_service = thumbnail_service
+        self.thumbnail_width = thumbnail_width
+        self.max_items = max_items
+        self._payloads = OrderedDict()  # ключ поста -> содержимое
+        self._lock = threading.Lock()
+        self._futures = []
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="detail")
+
+    def _cached(self, post):
+        key = post_key(post)
+        with self._lock:
+            payload = self._payloads.get(key)
+            if payload is None:
+                return None
+            if payload["source"] != _payload_source(post):
+                del self._payloads[key]
+                return None
+            self._payloads.move_to_end(key)
+            return payload
+
+    def _store(self, post, payload):
+        with self._lock:
+            self._payloads[post_key(post)] = payload
+            while len(self._payloads) > self.max_items:
+                self._payloads.popitem(last=False)
+
+    def _prepare(self, post):
+        if self._cached(post) is None:
+            self._store(post, build_detail_payload(post))
+
+    def prefetch(self, posts):
+        """
+        Ставит в очередь подготовку первых PREFETCH_LIMIT постов и их миниатюр.
+
+        :param posts: Посты выбранного кластера.
+        """
+        for future in self._futures:
+            future.cancel()
+        self._futures = []
+        for post in posts[:PREFETCH_LIMIT]:
+            if self._cached(post) is None:
+                self._futures.append(self._executor.submit(self._prepare, post))
+            if post.get('thumbnail'):
+                self.thumbnail_service.request(post['thumbnail'], self.thumbnail_width)
+
+    def payload(self, post):
+        """
+        Возвращает подготовленное содержимое поста; если его нет, вычисляет сразу.
+        """
+        payload = self._cached(post)
+        if payload is None:
+            payload = build_detail_payload(post)
+            self._store(post, payload)
+        return payload
+
+    def shutdown(self):
+        """
+        Останавливает пул (незавершённые задачи отменяются).
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
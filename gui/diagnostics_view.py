@@ -0,0 +1,132 @@
+# gui/diagnostics_view.py
+
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QCheckBox, QTreeWidget, QTreeWidgetItem,
+    QTextEdit, QPushButton, QHeaderView
+)
+from PyQt5.QtCore import QObject, pyqtSignal
+
+# Сколько последних обновлений хранит панель
+MAX_REFRESHES = 10
+
+def format_bytes(value):
+    """
+    Форматирует изменение памяти в мегабайтах со знаком; None — «—».
+    """
+    if value is None:
+        return "—"
+    return f"{value / (1024 * 1024):+.1f} МБ"
+
+def format_details(record):
+    """
+    Собирает атрибуты и счётчики интервала в одну строку вида «items=100, cache_hits=80».
+    """
+    values = dict(record.get("attrs") or {})
+    values.update(record.get("counters") or {})
+    if record.get("error"):
+        values["error"] = record["error"]
+    return ", ".join(f"{key}={value}" for key, value in values.items())
+
+class TraceBridge(QObject):
+    """
+    Передаёт завершённые интервалы трассировки из любых потоков в поток GUI.
+
+    Подписывается на трассировщик; сигнал span_finished доставляется получателям
+    в потоке GUI очередью событий Qt.
+    """
+    span_finished = pyqtSignal(object)  # record (dict)
+
+    def __init__(self, tracer, parent=None):
+        super().__init__(parent)
+        self.tracer = tracer
+        # Обращение к span_finished.emit каждый раз создаёт новый объект, поэтому для
+        # add_listener и remove_listener используется один и тот же сохранённый
+        self._listener = self.span_finished.emit
+        tracer.add_listener(self._listener)
+
+    def detach(self):
+        self.tracer.remove_listener(self._listener)
+
+class DiagnosticsPanel(QWidget):
+    """
+    Панель диагностики: дерево интервалов последних обновлений с длительностью,
+    изменением памяти, числом постов, размерами пакетов и счётчиками кэша,
+    а также переключатель профилирования следующего обновления и сводка профиля.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pending = {}  # id родителя -> [QTreeWidgetItem], завершившиеся раньше родителя
+        layout = QVBoxLayout()
+        layout.setContentsMargins(5, 5, 5, 5)
+
+        self.tree = QTreeWidget()
+        self.tree.setColumnCount(4)
+        self.tree.setHeaderLabels(["Этап", "Время, с", "Память", "Детали"])
+        self.tree.header().setSectionResizeMode(QHeaderView.ResizeToContents)
+        layout.addWidget(self.tree)
+
+        controls = QHBoxLayout()
+        self.profile_checkbox = QCheckBox("Профилировать следующее обновление (cProfile)")
+        controls.addWidget(self.profile_checkbox)
+        clear_button = QPushButton("Очистить")
+        clear_button.clicked.connect(self.clear)
+        controls.addWidget(clear_button)
+        layout.addLayout(controls)
+
+        self.profile_label = QLabel()
+        self.profile_label.setWordWrap(True)
+        layout.addWidget(self.profile_label)
+        self.profile_text = QTextEdit()
+        self.profile_text.setReadOnly(True)
+        self.profile_text.setLineWrapMode(QTextEdit.NoWrap)
+        self.profile_text.hide()
+        layout.addWidget(self.profile_text)
+        self.setLayout(layout)
+
+    def take_profile_request(self):
+        """
+        Возвращает True, если запрошено профилирование, и сбрасывает запрос
+        (профилируется только одно обновление).
+        """
+        requested = self.profile_checkbox.isChecked()
+        self.profile_checkbox.setChecked(False)
+        return requested
+
+    def add_record(self, record):
+        """
+        Добавляет завершённый интервал в дерево. Дочерние интервалы завершаются раньше
+        родителя, поэтому до его завершения они ждут в pending.
+        """
+        item = QTreeWidgetItem([
+            record["name"],
+            f"{record['duration']:.3f}",
+            format_bytes(record.get("rss_delta")),
+            format_details(record),
+        ])
+        item.setToolTip(3, format_details(record))
+        item.addChildren(self.pending.pop(record["id"], []))
+        parent_id = record.get("parent")
+        if parent_id is not None:
+            self.pending.setdefault(parent_id, []).append(item)
+            return
+        self.tree.insertTopLevelItem(0, item)
+        item.setExpanded(True)
+        while self.tree.topLevelItemCount() > MAX_REFRESHES:
+            self.tree.takeTopLevelItem(self.tree.topLevelItemCount() - 1)
+
+    def show_profile(self, profile):
+        """
+        Показывает сводку профиля cProfile и путь к сохранённому файлу .prof.
+
+        :param profile: Словарь с ключами path и summary.
+        """
+        self.profile_label.setText(f"Профиль сохранён: {profile['path']}")
+        self.profile_text.setPlainText(profile["summary"])
+        self.profile_text.show()
+
+    def clear(self):
+        self.tree.clear()
+        self.pending = {}
+        self.profile_label.clear()
+        self.profile_text.clear()
+        self.profile_text.hide()
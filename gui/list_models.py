@@ -0,0 +1,146 @@
+# gui/list_models.py
+
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+from dedup import DUPLICATES_KEY
+
+# Роль, в которой модели отдают объект строки: словарь поста или идентификатор кластера
+ItemRole = Qt.UserRole
+
+class PostListModel(QAbstractListModel):
+    """
+    Модель списка постов.
+
+    Модель не копирует посты и не создаёт элементов на каждый пост: она ссылается
+    на переданный список, а текст и данные строки отдаются лениво в data().
+    Смена кластера — это замена ссылки на список (set_posts), а дописанные в тот же
+    список посты добавляются вызовом sync() без перестройки уже показанных строк.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._posts = []
+        self._count = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._count
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self._count:
+            return None
+        post = self._posts[index.row()]
+        if role == Qt.DisplayRole:
+            duplicates = post.get(DUPLICATES_KEY)
+            if duplicates:
+                return f"{post.get('title', '')} (+{len(duplicates)} похожих)"
+            return post.get('title', '')
+        if role == ItemRole:
+            return post
+        if role == Qt.ToolTipRole:
+            return post.get('source')
+        return None
+
+    def set_posts(self, posts):
+        """
+        Показывает переданный список постов (без копирования).
+
+        :param posts: Список постов или PostView; модель хранит ссылку на него.
+        """
+        self.beginResetModel()
+        self._posts = posts
+        self._count = len(posts)
+        self.endResetModel()
+
+    def clear(self):
+        self.set_posts([])
+
+    def sync(self):
+        """
+        Сообщает представлению о постах, дописанных в конец текущего списка.
+        """
+        count = len(self._posts)
+        if count > self._count:
+            self.beginInsertRows(QModelIndex(), self._count, count - 1)
+            self._count = count
+            self.endInsertRows()
+
+    def shows(self, posts):
+        """
+        Проверяет, показывает ли модель именно этот список постов.
+        """
+        return self._posts is posts
+
+    def post_at(self, row):
+        return self._posts[row] if 0 <= row < self._count else None
+
+class ClusterListModel(QAbstractListModel):
+    """
+    Модель списка кластеров с необязательной строкой «Входящие» в начале.
+
+    Строка кластера хранит только идентификатор, название, размер и ключевые термины;
+    отображаемый текст и подсказка формируются в data().
+    """
+    def __init__(self, incoming_id, parent=None):
+        """
+        :param incoming_id: Идентификатор псевдокластера входящих постов.
+        """
+        super().__init__(parent)
+        self.incoming_id = incoming_id
+        self._rows = []  # [cluster_id, name, size, terms]
+        self._has_incoming = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        cluster_id, name, size, terms = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            if cluster_id == self.incoming_id:
+                return f"Входящие, ещё не кластеризованы ({size} постов)"
+            return f"{name} ({size} постов)"
+        if role == ItemRole:
+            return cluster_id
+        if role == Qt.ToolTipRole and terms:
+            return "Ключевые слова: " + ", ".join(term for term, _ in terms)
+        return None
+
+    def set_clusters(self, clusters, cluster_names, cluster_terms=None):
+        """
+        Заменяет список кластеров; строка «Входящие» при этом убирается.
+
+        :param clusters: Словарь {cluster_id: последовательность постов} (список или PostView).
+        :param cluster_names: Словарь {cluster_id: "Название"}.
+        :param cluster_terms: Словарь {cluster_id: [(термин, оценка)]} или None.
+        """
+        cluster_terms = cluster_terms or {}
+        self.beginResetModel()
+        self._rows = [
+            [cluster_id, cluster_names.get(cluster_id, f"Кластер {cluster_id}"),
+             len(clusters[cluster_id]), cluster_terms.get(cluster_id)]
+            for cluster_id in sorted(clusters.keys())
+        ]
+        self._has_incoming = False
+        self.endResetModel()
+
+    def index_of(self, cluster_id):
+        """
+        Возвращает модельный индекс строки кластера или недействительный индекс, если его нет в списке.
+        """
+        for row, item in enumerate(self._rows):
+            if item[0] == cluster_id:
+                return self.index(row)
+        return QModelIndex()
+
+    def set_incoming_count(self, count):
+        """
+        Добавляет строку «Входящие» в начало списка или обновляет число постов в ней.
+        """
+        if not self._has_incoming:
+            self.beginInsertRows(QModelIndex(), 0, 0)
+            self._rows.insert(0, [self.incoming_id, None, count, None])
+            self._has_incoming = True
+            self.endInsertRows()
+        else:
+            self._rows[0][2] = count
+            index = self.index(0)
+            self.dataChanged.emit(index, index, [Qt.DisplayRole])
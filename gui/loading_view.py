@@ -1,21 +1,117 @@
 # gui/loading_view.py
 
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QProgressBar
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QProgressBar, QPushButton, QGridLayout
+from PyQt5.QtCore import Qt, pyqtSignal
+
+# Шаг прогресс-бара, приходящийся на один этап
+STAGE_SCALE = 100
 
 class LoadingView(QWidget):
-    def __init__(self, parent=None):
+    """
+    Экран загрузки с поэтапным прогрессом конвейера обновления.
+
+    Для каждого этапа показывается статус и длительность, общий прогресс-бар
+    складывается из завершённых этапов и прогресса текущего.
+    """
+    cancel_requested = pyqtSignal()
+
+    def __init__(self, stages=(), parent=None):
+        """
+        :param stages: Список этапов вида [(ключ, подпись)].
+        :param parent: Родительский виджет.
+        """
         super().__init__(parent)
+        self.stages = list(stages)
+        self.stage_index = {key: i for i, (key, _) in enumerate(self.stages)}
+        self.stage_fraction = {}  # stage -> доля выполнения от 0 до 1
         layout = QVBoxLayout()
         layout.setContentsMargins(15, 15, 15, 15)
         layout.setSpacing(10)
-        
+
         label = QLabel("Загрузка новостей, пожалуйста подождите...")
         label.setAlignment(Qt.AlignCenter)
         layout.addWidget(label)
-        
+
         self.progress = QProgressBar()
-        self.progress.setRange(0, 0)  # режим неопределенного прогресса
+        self.progress.setRange(0, max(len(self.stages), 1) * STAGE_SCALE)
         layout.addWidget(self.progress)
-        
+
+        stages_layout = QGridLayout()
+        self.status_labels = {}
+        for row, (key, title) in enumerate(self.stages):
+            stages_layout.addWidget(QLabel(title), row, 0)
+            status = QLabel()
+            status.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            stages_layout.addWidget(status, row, 1)
+            self.status_labels[key] = status
+        layout.addLayout(stages_layout)
+
+        self.cancel_button = QPushButton("Отмена")
+        self.cancel_button.clicked.connect(self.cancel_requested.emit)
+        layout.addWidget(self.cancel_button, alignment=Qt.AlignCenter)
+
         self.setLayout(layout)
+        self.reset()
+
+    def reset(self):
+        """
+        Сбрасывает прогресс перед новым запуском конвейера.
+        """
+        self.stage_fraction = {key: 0.0 for key, _ in self.stages}
+        self.progress.setValue(0)
+        for status in self.status_labels.values():
+            status.setText("ожидание")
+        self.cancel_button.setEnabled(True)
+
+    def _update_progress(self, stage, fraction):
+        """
+        Обновляет долю выполнения этапа и общий прогресс-бар.
+        Этапы могут выполняться с перекрытием, поэтому общий прогресс — сумма долей всех этапов.
+        """
+        self.stage_fraction[stage] = min(max(fraction, 0.0), 1.0)
+        self.progress.setValue(int(sum(self.stage_fraction.values()) * STAGE_SCALE))
+
+    def set_stage_started(self, stage):
+        """
+        Отмечает начало этапа.
+
+        :param stage: Ключ этапа.
+        """
+        if stage not in self.stage_index:
+            return
+        self.status_labels[stage].setText("выполняется...")
+        self._update_progress(stage, 0.0)
+
+    def set_stage_progress(self, stage, done, total):
+        """
+        Обновляет прогресс внутри этапа.
+
+        :param stage: Ключ этапа.
+        :param done: Число выполненных шагов.
+        :param total: Общее число шагов.
+        """
+        if stage not in self.stage_index or total <= 0:
+            return
+        self.status_labels[stage].setText(f"{done} / {total}")
+        self._update_progress(stage, done / total)
+
+    def set_stage_finished(self, stage, seconds):
+        """
+        Отмечает завершение этапа и показывает его длительность.
+
+        :param stage: Ключ этапа.
+        :param seconds: Длительность этапа в секундах.
+        """
+        if stage not in self.stage_index:
+            return
+        self.status_labels[stage].setText(f"готово за {seconds:.2f} с")
+        self._update_progress(stage, 1.0)
+
+    def stage_title(self, stage):
+        """
+        Возвращает подпись этапа по его ключу.
+        """
+        for key, title in self.stages:
+            if key == stage:
+                return title
+        return stage
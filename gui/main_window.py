@@ -1,18 +1,31 @@
 # gui/main_window.py
 
 import sys
-import requests
-from io import BytesIO
+import threading
+from collections import OrderedDict
 from PyQt5.QtWidgets import (
-    QMainWindow, QWidget, QVBoxLayout, QListWidget, QLabel, QTextEdit,
-    QHBoxLayout, QListWidgetItem, QMessageBox, QPushButton, QStackedWidget,
-    QScrollArea, QApplication, QStyledItemDelegate, QStyle
+    QMainWindow, QWidget, QVBoxLayout, QListView, QLabel, QTextEdit,
+    QHBoxLayout, QMessageBox, QPushButton, QStackedWidget,
+    QScrollArea, QApplication, QStyledItemDelegate, QStyle, QDockWidget
 )
-from PyQt5.QtCore import Qt, QSize
-from PyQt5.QtGui import QPixmap, QFontMetrics, QPainter
+from PyQt5.QtCore import Qt, QSize, QTimer
+from PyQt5.QtGui import QPainter, QStaticText, QTransform
 import news_processor
+from embedding_cache import EmbeddingCache
+from embedding_backends import DEFAULT_EMBEDDING_BACKEND
+from post_store import PostStore
+from delta_fetch import DeltaFetcher
+from dim_reduction import DEFAULT_REDUCTION, create_reducer
+from multi_fetch import DEFAULT_SOURCES, MultiSourceFetcher, RateLimiter
+from time_window import PostWindow
 from gui.settings_dialog import SettingsDialog
 from gui.loading_view import LoadingView
+from gui.list_models import ClusterListModel, PostListModel, ItemRole
+from gui.news_worker import NewsPipelineWorker, PIPELINE_STAGES, start_worker
+from gui.thumbnail_service import ThumbnailService
+from gui.detail_prefetcher import DetailPrefetcher
+from gui.diagnostics_view import DiagnosticsPanel, TraceBridge, format_bytes
+from tracing import tracer
 from config_manager import clear_account_data, update_config, load_config
 
 # Стиль для Light-темы (пустой, стандартный)
@@ -22,9 +35,9 @@ LIGHT_STYLE = ""
 DARK_STYLE = """
     QWidget { background-color: #2b2b2b; color: #f0f0f0; }
     QPushButton { background-color: #3c3c3c; color: #f0f0f0; }
-    QListWidget, QListView, QAbstractItemView { background-color: #3c3c3c; color: #f0f0f0; }
-    QListWidget::item:hover, QListView::item:hover, QAbstractItemView::item:hover { background-color: #505050; }
-    QListWidget::item:selected, QListView::item:selected, QAbstractItemView::item:selected { background-color: #0078D7; color: #ffffff; }
+    QListView, QAbstractItemView { background-color: #3c3c3c; color: #f0f0f0; }
+    QListView::item:hover, QAbstractItemView::item:hover { background-color: #505050; }
+    QListView::item:selected, QAbstractItemView::item:selected { background-color: #0078D7; color: #ffffff; }
     QTextEdit { background-color: #3c3c3c; color: #f0f0f0; }
 """
 
@@ -32,30 +45,85 @@ DARK_STYLE = """
 BLUE_STYLE = """
     QWidget { background-color: #e0f7fa; color: #006064; }
     QPushButton { background-color: #4dd0e1; color: #004d40; }
-    QListWidget { background-color: #4dd0e1; color: #004d40; }
-    QListWidget::item { padding: 8px; }
-    QListWidget::item:selected { background-color: #006064; color: #ffffff; }
-    QListWidget::item:hover { background-color: #80deea; }
+    QListView { background-color: #4dd0e1; color: #004d40; }
+    QListView::item { padding: 8px; }
+    QListView::item:selected { background-color: #006064; color: #ffffff; }
+    QListView::item:hover { background-color: #80deea; }
     QTextEdit { background-color: #4dd0e1; color: #004d40; }
 """
 
+# Ширина миниатюры в детальном просмотре
+THUMBNAIL_WIDTH = 200
+
+# Идентификатор псевдокластера с постами, которые уже загружены, но ещё не кластеризованы
+INCOMING_CLUSTER_ID = "incoming"
+
+# Группы настроек: при изменении применяется только затронутая часть работы
+APPEARANCE_SETTINGS = {"theme", "font", "font_size"}
+FETCH_SETTINGS = {"sources"}
+CLUSTER_SETTINGS = {"min_cluster_size", "reduction", "window_hours"}
+
+# Как часто проверять, не пора ли сдвинуть временное окно
+WINDOW_SLIDE_INTERVAL_MS = 5 * 60 * 1000
+
+# Сколько раскладок текста хранит делегат списков
+LAYOUT_CACHE_SIZE = 4096
+
 def update_widget_fonts(widget: QWidget, new_font):
     """
-    Рекурсивно обновляет шрифт для данного виджета и всех его дочерних виджетов.
+    Обновляет шрифт для данного виджета и всех его дочерних виджетов за один проход
+    (findChildren уже возвращает потомков всех уровней, поэтому рекурсия не нужна).
     
     :param widget: Виджет, для которого нужно обновить шрифты.
     :param new_font: Новый объект QFont, который устанавливается для виджета.
     """
     widget.setFont(new_font)
     for child in widget.findChildren(QWidget):
-        update_widget_fonts(child, new_font)
+        child.setFont(new_font)
 
 class MultiLineDelegate(QStyledItemDelegate):
     """
-    Делегат для QListWidget, позволяющий правильно отображать многострочный текст.
+    Делегат для списков, позволяющий правильно отображать многострочный текст.
     
     Отвечает за отрисовку текста с переносом строк и изменение цвета при выделении.
+    Раскладка текста с переносами (QStaticText) кэшируется по ключу (текст, ширина, шрифт),
+    поэтому повторные проходы компоновки и перерисовки не пересчитывают переносы.
     """
+    def __init__(self, parent=None, cache_size=LAYOUT_CACHE_SIZE):
+        super().__init__(parent)
+        self.cache_size = cache_size
+        self._layouts = OrderedDict()
+
+    def text_layout(self, text, width, font):
+        """
+        Возвращает подготовленную раскладку текста для заданной ширины и шрифта.
+
+        :param text: Текст элемента.
+        :param width: Ширина, по которой переносится текст.
+        :param font: Шрифт (QFont).
+        :return: QStaticText.
+        """
+        key = (text, width, font.key())
+        layout = self._layouts.get(key)
+        if layout is not None:
+            self._layouts.move_to_end(key)
+            return layout
+        layout = QStaticText(text)
+        layout.setTextFormat(Qt.PlainText)
+        layout.setTextWidth(width)
+        layout.prepare(QTransform(), font)
+        self._layouts[key] = layout
+        while len(self._layouts) > self.cache_size:
+            self._layouts.popitem(last=False)
+        return layout
+
+    @staticmethod
+    def _item_width(option):
+        if option.rect.width() > 0:
+            return option.rect.width()
+        widget = option.widget
+        return widget.viewport().width() if widget is not None else 0
+
     def paint(self, painter: QPainter, option, index):
         """
         Переопределение метода отрисовки элемента списка.
@@ -65,15 +133,15 @@ class MultiLineDelegate(QStyledItemDelegate):
         :param index: Модельный индекс элемента списка.
         """
         painter.save()
-        text = index.data(Qt.DisplayRole)
+        text = index.data(Qt.DisplayRole) or ""
         if option.state & QStyle.State_Selected:
             painter.fillRect(option.rect, option.palette.highlight())
             painter.setPen(option.palette.highlightedText().color())
         else:
             painter.setPen(option.palette.text().color())
-        fm = QFontMetrics(option.font)
-        text_wrapped = fm.elidedText(text, Qt.ElideNone, option.rect.width())
-        painter.drawText(option.rect, Qt.TextWordWrap, text_wrapped)
+        painter.setFont(option.font)
+        layout = self.text_layout(text, option.rect.width(), option.font)
+        painter.drawStaticText(option.rect.topLeft(), layout)
         painter.restore()
 
     def sizeHint(self, option, index):
@@ -84,11 +152,10 @@ class MultiLineDelegate(QStyledItemDelegate):
         :param index: Модельный индекс элемента списка.
         :return: Размер (QSize), необходимый для отображения текста.
         """
-        text = index.data(Qt.DisplayRole)
-        fm = QFontMetrics(option.font)
-        width = option.rect.width()
-        text_rect = fm.boundingRect(0, 0, width, 0, Qt.TextWordWrap, text)
-        return QSize(width, text_rect.height() + 10)
+        text = index.data(Qt.DisplayRole) or ""
+        width = self._item_width(option)
+        layout = self.text_layout(text, width, option.font)
+        return QSize(width, int(layout.size().height()) + 10)
 
 class MainView(QWidget):
     """
@@ -104,6 +171,8 @@ class MainView(QWidget):
         """
         super().__init__()
         self.parent = parent
+        self.cluster_model = ClusterListModel(INCOMING_CLUSTER_ID, self)
+        self.post_model = PostListModel(self)
         self.init_ui()
 
     def init_ui(self):
@@ -124,6 +193,10 @@ class MainView(QWidget):
         self.settings_button.clicked.connect(self.parent.open_settings)
         top_layout.addWidget(self.settings_button)
 
+        self.diagnostics_button = QPushButton("Диагностика")
+        self.diagnostics_button.clicked.connect(self.parent.toggle_diagnostics)
+        top_layout.addWidget(self.diagnostics_button)
+
         self.logout_button = QPushButton("Сменить аккаунт / Выйти")
         self.logout_button.clicked.connect(self.parent.logout)
         top_layout.addWidget(self.logout_button)
@@ -132,60 +205,103 @@ class MainView(QWidget):
 
         # Основная панель со списками кластеров и постов
         main_layout = QHBoxLayout()
-        self.cluster_list = QListWidget()
+        self.cluster_list = self.create_list_view(self.cluster_model)
         self.cluster_list.setMaximumWidth(300)
-        self.cluster_list.setStyleSheet("""
-            QListWidget::item { border-bottom: 1px solid #cccccc; padding: 8px; }
-            QListWidget::item:selected { background-color: #0078D7; color: #ffffff; }
-        """)
-        self.cluster_list.itemClicked.connect(self.display_posts_for_cluster)
+        self.cluster_list.clicked.connect(self.display_posts_for_cluster)
         main_layout.addWidget(self.cluster_list)
 
-        self.post_list = QListWidget()
-        self.post_list.setStyleSheet("""
-            QListWidget::item { border-bottom: 1px solid #cccccc; padding: 8px; }
-            QListWidget::item:selected { background-color: #0078D7; color: #ffffff; }
-        """)
-        self.post_list.itemDoubleClicked.connect(self.parent.show_post_details)
+        self.post_list = self.create_list_view(self.post_model)
+        self.post_list.doubleClicked.connect(self.parent.show_post_details)
         main_layout.addWidget(self.post_list)
 
         layout.addLayout(main_layout)
         self.setLayout(layout)
 
-        # Устанавливаем делегат для многострочного отображения текста
+        # Делегат для многострочного отображения текста с общим кэшем раскладок
         delegate = MultiLineDelegate(self)
         self.cluster_list.setItemDelegate(delegate)
-        self.cluster_list.setWordWrap(True)
         self.post_list.setItemDelegate(delegate)
-        self.post_list.setWordWrap(True)
 
-    def populate_clusters(self, clusters, cluster_names):
+    @staticmethod
+    def create_list_view(model):
+        """
+        Создаёт список на модели: строки компонуются порциями, а при изменении
+        ширины размеры элементов пересчитываются.
+        """
+        view = QListView()
+        view.setModel(model)
+        view.setWordWrap(True)
+        view.setResizeMode(QListView.Adjust)
+        view.setLayoutMode(QListView.Batched)
+        view.setBatchSize(200)
+        view.setStyleSheet("""
+            QListView::item { border-bottom: 1px solid #cccccc; padding: 8px; }
+            QListView::item:selected { background-color: #0078D7; color: #ffffff; }
+        """)
+        return view
+
+    def populate_clusters(self, clusters, cluster_names, cluster_terms=None):
         """
         Заполняет список кластеров с именами и количеством постов.
+        Ключевые термины кластера, если они переданы, показываются во всплывающей подсказке.
 
-        :param clusters: Словарь кластеров вида {cluster_id: [posts]}.
+        :param clusters: Словарь кластеров вида {cluster_id: PostView}.
         :param cluster_names: Словарь названий кластеров вида {cluster_id: "Название"}.
+        :param cluster_terms: Словарь {cluster_id: [(термин, оценка)]} или None.
         """
-        self.cluster_list.clear()
-        for cluster_id in sorted(clusters.keys()):
-            name = cluster_names.get(cluster_id, f"Кластер {cluster_id}")
-            item = QListWidgetItem(f"{name} ({len(clusters[cluster_id])} постов)")
-            item.setData(Qt.UserRole, cluster_id)
-            self.cluster_list.addItem(item)
+        self.cluster_model.set_clusters(clusters, cluster_names, cluster_terms)
 
-    def display_posts_for_cluster(self, item):
+    def update_incoming(self, new_posts):
         """
-        Отображает список постов для выбранного кластера при клике на элементе списка.
+        Показывает посты, поступившие во время загрузки, в псевдокластере «Входящие»
+        в начале списка кластеров. Если этот псевдокластер выбран, новые посты
+        сразу дописываются в список постов.
+
+        :param new_posts: Список только что полученных постов (уже добавленных в incoming_posts).
+        """
+        self.cluster_model.set_incoming_count(len(self.parent.incoming_posts))
+        if self.post_model.shows(self.parent.incoming_posts):
+            self.post_model.sync()
+
+    def clear_posts(self):
+        """
+        Очищает список постов.
+        """
+        self.post_model.clear()
+
+    def selected_cluster_id(self):
+        """
+        Возвращает идентификатор выбранного кластера или None.
+        """
+        index = self.cluster_list.currentIndex()
+        return index.data(ItemRole) if index.isValid() else None
+
+    def select_cluster(self, cluster_id):
+        """
+        Выбирает кластер по идентификатору и показывает его посты; если такого кластера
+        больше нет, очищает список постов.
+        """
+        index = self.cluster_model.index_of(cluster_id)
+        if not index.isValid():
+            self.clear_posts()
+            return
+        self.cluster_list.setCurrentIndex(index)
+        self.display_posts_for_cluster(index)
+
+    def display_posts_for_cluster(self, index):
+        """
+        Отображает список постов для выбранного кластера при клике на элементе списка
+        и начинает заранее готовить их детальный просмотр.
         
-        :param item: Выбранный элемент из списка кластеров.
+        :param index: Модельный индекс выбранного кластера.
         """
-        cluster_id = item.data(Qt.UserRole)
-        posts = self.parent.clusters.get(cluster_id, [])
-        self.post_list.clear()
-        for post in posts:
-            list_item = QListWidgetItem(post['title'])
-            list_item.setData(Qt.UserRole, post)
-            self.post_list.addItem(list_item)
+        cluster_id = index.data(ItemRole)
+        if cluster_id == INCOMING_CLUSTER_ID:
+            posts = self.parent.incoming_posts
+        else:
+            posts = self.parent.clusters.get(cluster_id, [])
+        self.post_model.set_posts(posts)
+        self.parent.detail_prefetcher.prefetch(posts)
 
 class DetailView(QWidget):
     """
@@ -201,11 +317,15 @@ class DetailView(QWidget):
         """
         super().__init__()
         self.parent = parent
+        self.image_url = None
+        self.parent.thumbnail_service.thumbnail_ready.connect(self.on_thumbnail_ready)
+        self.parent.thumbnail_service.thumbnail_failed.connect(self.on_thumbnail_failed)
         self.init_ui()
 
     def init_ui(self):
         """
-        Настраивает пользовательский интерфейс для детального просмотра.
+        Настраивает пользовательский интерфейс для детального просмотра. Виджеты содержимого
+        создаются один раз и переиспользуются для каждого открываемого поста.
         """
         layout = QVBoxLayout()
         layout.setContentsMargins(15, 15, 15, 15)
@@ -221,6 +341,30 @@ class DetailView(QWidget):
         self.content_layout = QVBoxLayout()
         self.content_layout.setContentsMargins(15, 15, 15, 15)
         self.content_layout.setSpacing(10)
+
+        self.title_label = QLabel()
+        self.title_label.setTextFormat(Qt.RichText)
+        self.title_label.setWordWrap(True)
+        self.content_layout.addWidget(self.title_label)
+
+        self.image_label = QLabel()
+        self.content_layout.addWidget(self.image_label)
+
+        self.content_layout.addWidget(QLabel("Краткое содержание:"))
+        self.summary_text = QTextEdit()
+        self.summary_text.setReadOnly(True)
+        self.content_layout.addWidget(self.summary_text)
+
+        self.link_label = QLabel()
+        self.link_label.setOpenExternalLinks(True)
+        self.content_layout.addWidget(self.link_label)
+
+        self.duplicates_label = QLabel()
+        self.duplicates_label.setTextFormat(Qt.RichText)
+        self.duplicates_label.setWordWrap(True)
+        self.duplicates_label.setOpenExternalLinks(True)
+        self.content_layout.addWidget(self.duplicates_label)
+
         content.setLayout(self.content_layout)
         scroll.setWidget(content)
         layout.addWidget(scroll)
@@ -228,47 +372,43 @@ class DetailView(QWidget):
 
     def populate_details(self, post):
         """
-        Заполняет детальное представление данными из поста.
+        Заполняет детальное представление данными из поста. Содержимое берётся из кэша
+        DetailPrefetcher (если пост был подготовлен заранее), миниатюра — из кэша ThumbnailService.
 
         :param post: Словарь с данными поста (заголовок, selftext, thumbnail, permalink и т.д.).
         """
-        # Очистка предыдущего контента
-        for i in reversed(range(self.content_layout.count())):
-            widget = self.content_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
-
-        title_label = QLabel(f"<h2>{post['title']}</h2>")
-        title_label.setTextFormat(Qt.RichText)
-        title_label.setWordWrap(True)
-        self.content_layout.addWidget(title_label)
-
-        if post.get('thumbnail'):
-            try:
-                response = requests.get(post['thumbnail'], timeout=5)
-                if response.status_code == 200:
-                    image_data = BytesIO(response.content)
-                    pixmap = QPixmap()
-                    if pixmap.loadFromData(image_data.read()):
-                        scaled = pixmap.scaledToWidth(200, Qt.SmoothTransformation)
-                        img_label = QLabel()
-                        img_label.setPixmap(scaled)
-                        self.content_layout.addWidget(img_label)
-            except Exception as e:
-                print("Ошибка загрузки изображения:", e)
-
-        summary = news_processor.summarize_post(post)
-        summary_label = QLabel("Краткое содержание:")
-        self.content_layout.addWidget(summary_label)
-        summary_text = QTextEdit()
-        summary_text.setReadOnly(True)
-        summary_text.setText(summary)
-        self.content_layout.addWidget(summary_text)
-
-        reddit_link = f"https://www.reddit.com{post.get('permalink', '')}"
-        link_label = QLabel(f"<a href='{reddit_link}'>Открыть пост на Reddit</a>")
-        link_label.setOpenExternalLinks(True)
-        self.content_layout.addWidget(link_label)
+        payload = self.parent.detail_prefetcher.payload(post)
+        self.title_label.setText(payload["title"])
+
+        # Изображение загружается асинхронно: пока его нет в кэше, показывается заглушка
+        self.image_url = payload["thumbnail"]
+        self.image_label.clear()
+        if self.image_url:
+            pixmap = self.parent.thumbnail_service.request(self.image_url, THUMBNAIL_WIDTH)
+            if pixmap is not None:
+                self.image_label.setPixmap(pixmap)
+            else:
+                self.image_label.setText("Загрузка изображения...")
+        self.image_label.setVisible(bool(self.image_url))
+
+        self.summary_text.setText(payload["summary"])
+        self.link_label.setText(payload["link"])
+        self.duplicates_label.setText(payload["duplicates"] or "")
+        self.duplicates_label.setVisible(payload["duplicates"] is not None)
+
+    def on_thumbnail_ready(self, url, width, pixmap):
+        """
+        Показывает загруженную миниатюру, если она относится к открытому посту.
+        """
+        if url == self.image_url and width == THUMBNAIL_WIDTH:
+            self.image_label.setPixmap(pixmap)
+
+    def on_thumbnail_failed(self, url, width):
+        """
+        Скрывает заглушку, если миниатюру открытого поста загрузить не удалось.
+        """
+        if url == self.image_url and width == THUMBNAIL_WIDTH:
+            self.image_label.hide()
 
 class MainWindow(QMainWindow):
     """
@@ -289,17 +429,47 @@ class MainWindow(QMainWindow):
             "post_limit": config.get("post_limit", 50),
             "theme": config.get("theme", "Light"),
             "font": config.get("font", "Arial"),
-            "font_size": config.get("font_size", 10)
+            "font_size": config.get("font_size", 10),
+            "sources": config.get("sources", DEFAULT_SOURCES),
+            "min_cluster_size": config.get("min_cluster_size", 3),
+            "reduction": config.get("reduction", DEFAULT_REDUCTION),
+            "window_hours": config.get("window_hours", 0)
         }
 
         self.setWindowTitle("ClusterNews")
         self.setGeometry(100, 100, 1200, 800)
         self.posts = []
-        self.clusters = {}      # cluster_id -> список постов
+        self.incoming_posts = []  # посты текущего обновления, ещё не прошедшие кластеризацию
+        self.clusters = {}      # cluster_id -> PostView (посты кластера по индексам)
         self.cluster_names = {} # cluster_id -> название кластера
+        self.cluster_terms = {} # cluster_id -> [(термин, оценка TF-IDF)]
+        # Бэкенд эмбеддингов задаётся в config.json (embedding_backend, encode_threads) и применяется при запуске
+        embedding_backend = config.get("embedding_backend", DEFAULT_EMBEDDING_BACKEND)
+        news_processor.model_registry.configure_embeddings(embedding_backend, threads=config.get("encode_threads"))
+        self.embedding_cache = EmbeddingCache(model_name=news_processor.model_registry.embedding_cache_tag())
+        self.incremental_clusterer = news_processor.IncrementalClusterer(
+            reducer=create_reducer(self.settings["reduction"])
+        )
+        self.post_store = PostStore()
+        self.delta_fetcher = DeltaFetcher()
+        self.rate_limiter = RateLimiter()
+        self.post_window = None  # PostWindow в режиме окна по времени (window_hours > 0)
+        self.configure_window()
+        self.window_timer = QTimer(self)
+        self.window_timer.setInterval(WINDOW_SLIDE_INTERVAL_MS)
+        self.window_timer.timeout.connect(self.slide_window)
+        self.window_timer.start()
+        self.warm_up_started = False
+        self.pipeline_generation = 0  # номер последнего запущенного обновления
+        self.active_runs = {}         # generation -> (worker, thread)
+        self.background_run = False   # последнее запущенное обновление — фоновое
+
+        self.thumbnail_service = ThumbnailService(self)
+        self.detail_prefetcher = DetailPrefetcher(self.thumbnail_service, THUMBNAIL_WIDTH, self)
 
         self.stack = QStackedWidget()
-        self.loading_view = LoadingView()
+        self.loading_view = LoadingView(PIPELINE_STAGES)
+        self.loading_view.cancel_requested.connect(self.cancel_loading)
         self.main_view = MainView(self)
         self.detail_view = DetailView(self)
         self.stack.addWidget(self.loading_view)
@@ -307,25 +477,74 @@ class MainWindow(QMainWindow):
         self.stack.addWidget(self.detail_view)
         self.setCentralWidget(self.stack)
 
+        # Панель диагностики получает интервалы трассировки из фоновых потоков через TraceBridge
+        self.diagnostics_panel = DiagnosticsPanel()
+        self.diagnostics_dock = QDockWidget("Диагностика", self)
+        self.diagnostics_dock.setWidget(self.diagnostics_panel)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.diagnostics_dock)
+        self.diagnostics_dock.hide()
+        self.trace_label = QLabel()
+        self.statusBar().addPermanentWidget(self.trace_label)
+        self.trace_bridge = TraceBridge(tracer, self)
+        self.trace_bridge.span_finished.connect(self.diagnostics_panel.add_record)
+        self.trace_bridge.span_finished.connect(self.on_span_finished)
+
         self.apply_appearance()
         self.load_news()
 
     def open_settings(self):
         """
-        Открывает диалог настроек. При подтверждении обновляет внешнее оформление, загружает новости
+        Открывает диалог настроек. При подтверждении применяет только изменившиеся параметры
         и сохраняет новые параметры в конфигурацию.
         """
         dialog = SettingsDialog(self.settings, self)
         if dialog.exec_():
             new_settings = dialog.get_settings()
             if new_settings:
+                old_settings = self.settings
                 self.settings = new_settings
-                self.apply_appearance()
-                self.load_news()
+                self.apply_settings_changes(old_settings, new_settings)
                 config = load_config()
                 config.update(new_settings)
                 update_config(config)
 
+    def apply_settings_changes(self, old_settings, new_settings):
+        """
+        Сравнивает настройки и выполняет только затронутую изменениями работу:
+        оформление — перестилизация без перезагрузки; новые источники — полная загрузка;
+        больший лимит постов — дозагрузка недостающих постов; включение или расширение окна
+        по времени — добавление постов за новый период из хранилища; меньший лимит или параметры
+        кластеризации — перекластеризация уже загруженных постов без обращения к сети.
+
+        :param old_settings: Настройки до изменения.
+        :param new_settings: Новые настройки.
+        """
+        changed = {key for key in set(old_settings) | set(new_settings)
+                   if old_settings.get(key) != new_settings.get(key)}
+        if changed & APPEARANCE_SETTINGS:
+            self.apply_appearance()
+        window_widened = "window_hours" in changed and self.configure_window()
+        if changed & FETCH_SETTINGS or (not self.posts and changed - APPEARANCE_SETTINGS):
+            self.load_news()
+        elif not self.posts:
+            return
+        elif window_widened:
+            self.load_news(base_posts=self.window_seed_posts())
+        elif "post_limit" in changed:
+            more = new_settings["post_limit"] > old_settings.get("post_limit", 50)
+            self.load_news(base_posts=self.posts, fetch_more=more)
+        elif changed & CLUSTER_SETTINGS:
+            self.load_news(base_posts=self.posts)
+
+    def window_seed_posts(self):
+        """
+        Возвращает посты для включённого или расширенного окна: уже показанные посты
+        и посты за период окна из локального хранилища (без повторов).
+        """
+        known = {post.get('permalink') for post in self.posts}
+        stored = self.post_store.get_range(start=self.post_window.cutoff(), limit=self.post_window.max_posts)
+        return self.posts + [post for post in stored if post.get('permalink') not in known]
+
     def apply_appearance(self):
         """
         Применяет настройки внешнего вида: тема, шрифт и размер шрифта.
@@ -347,38 +566,231 @@ class MainWindow(QMainWindow):
         QApplication.setFont(new_font)
         update_widget_fonts(self, new_font)
 
-    def load_news(self):
+    def load_news(self, base_posts=None, fetch_more=False, background=False):
+        """
+        Запускает обновление новостей в фоновом потоке: загрузку, эмбеддинги, кластеризацию
+        и генерацию названий. Незавершённое предыдущее обновление отменяется и вытесняется новым.
+        Пока идёт загрузка, отображается поэтапный прогресс.
+
+        :param base_posts: Уже загруженные посты для перекластеризации без загрузки ленты или None.
+        :param fetch_more: Дозагрузить посты после base_posts до лимита из настроек.
+        :param background: Фоновое обновление (по таймеру): по завершении текущее представление
+            и выбранный кластер сохраняются, а ошибка показывается только в строке состояния.
+        """
+        self.cancel_loading(show_main=False)
+        self.pipeline_generation += 1
+        generation = self.pipeline_generation
+        self.background_run = background
+
+        worker = NewsPipelineWorker(generation, self.reddit_instance, self.settings,
+                                    self.embedding_cache, self.incremental_clusterer, self.post_store,
+                                    self.create_fetcher(), self.delta_fetcher,
+                                    base_posts=base_posts, fetch_more=fetch_more,
+                                    profile=self.diagnostics_panel.take_profile_request(),
+                                    post_window=self.post_window)
+        worker.posts_received.connect(self.on_posts_received)
+        worker.stage_started.connect(self.on_stage_started)
+        worker.stage_progress.connect(self.on_stage_progress)
+        worker.stage_finished.connect(self.on_stage_finished)
+        worker.finished.connect(self.on_news_loaded)
+        worker.failed.connect(self.on_news_failed)
+
+        self.incoming_posts = []
+        self.loading_view.reset()
+        if not self.clusters:
+            self.stack.setCurrentWidget(self.loading_view)
+        thread = start_worker(worker)
+        thread.finished.connect(self.on_thread_finished)
+        self.active_runs[generation] = (worker, thread)
+
+    def configure_window(self):
         """
-        Загружает новости, выполняет кластеризацию и генерирует названия кластеров.
-        При загрузке отображается индикатор, а по завершении переключается в главное представление.
+        Включает, перенастраивает или выключает окно по времени согласно настройке window_hours.
+
+        :return: True, если окно включено или стало шире (в него нужно добавить посты).
         """
-        try:
-            self.stack.setCurrentWidget(self.loading_view)
-            QApplication.processEvents()
-
-            self.posts, fallback = news_processor.fetch_user_news(self.reddit_instance, limit=self.settings.get("post_limit", 50))
-            if fallback:
-                QMessageBox.information(self, "Информация",
-                    "Ваша лента пуста (вы не подписаны ни на какие сабреддиты).\nПоказаны новости из /r/all.")
-            self.posts, _ = news_processor.cluster_posts_advanced(self.posts)
-            self.clusters = {}
-            for post in self.posts:
-                cid = post['cluster']
-                self.clusters.setdefault(cid, []).append(post)
-            self.cluster_names = news_processor.improved_hybrid_generate_cluster_names(self.clusters)
-            self.main_view.populate_clusters(self.clusters, self.cluster_names)
-            self.main_view.post_list.clear()
+        hours = self.settings.get("window_hours", 0)
+        if not hours:
+            self.post_window = None
+            return False
+        if self.post_window is None:
+            self.post_window = PostWindow(hours)
+            return True
+        widened = hours > self.post_window.window_hours
+        self.post_window.window_hours = hours
+        return widened
+
+    def slide_window(self):
+        """
+        По таймеру перекластеризует окно без обращения к сети, если в нём появились
+        посты старше окна (и обновление сейчас не выполняется).
+        """
+        if self.post_window is None or self.active_runs or not self.clusters:
+            return
+        if self.post_window.expired_count():
+            self.load_news(base_posts=[], background=True)
+
+    def create_fetcher(self):
+        """
+        Возвращает загрузчик ленты для текущих настроек: дельта-загрузку персональной ленты
+        или параллельную загрузку нескольких источников с общим бюджетом запросов.
+        """
+        sources = self.settings.get("sources") or DEFAULT_SOURCES
+        if list(sources) == DEFAULT_SOURCES:
+            return self.delta_fetcher
+        return MultiSourceFetcher(sources, rate_limiter=self.rate_limiter, delta_fetcher=self.delta_fetcher)
+
+    def cancel_loading(self, show_main=True):
+        """
+        Отменяет текущее обновление новостей, если оно выполняется.
+
+        :param show_main: Вернуться ли к основному представлению после отмены.
+        """
+        run = self.active_runs.get(self.pipeline_generation)
+        if run:
+            run[0].cancel()
+            # Сигналы отменённого запуска становятся неактуальными
+            self.pipeline_generation += 1
+        if show_main and self.stack.currentWidget() is self.loading_view:
+            self.stack.setCurrentWidget(self.main_view)
+
+    def is_current_run(self, generation):
+        """
+        Проверяет, относится ли сигнал к актуальному (не отменённому и не вытесненному) запуску.
+        """
+        return generation == self.pipeline_generation
+
+    def on_posts_received(self, generation, page):
+        """
+        Показывает только что загруженную страницу постов, не дожидаясь окончания конвейера.
+        С первой страницы приложение переключается с экрана загрузки на основное представление.
+
+        :param generation: Номер запуска.
+        :param page: Список постов страницы.
+        """
+        if not self.is_current_run(generation):
+            return
+        self.incoming_posts.extend(page)
+        self.main_view.update_incoming(page)
+        if self.stack.currentWidget() is self.loading_view:
+            self.stack.setCurrentWidget(self.main_view)
+
+    def on_stage_started(self, generation, stage):
+        if self.is_current_run(generation):
+            self.loading_view.set_stage_started(stage)
+            self.statusBar().showMessage(f"{self.loading_view.stage_title(stage)}...")
+
+    def on_stage_progress(self, generation, stage, done, total):
+        if self.is_current_run(generation):
+            self.loading_view.set_stage_progress(stage, done, total)
+            self.statusBar().showMessage(f"{self.loading_view.stage_title(stage)}: {done} / {total}")
+
+    def on_stage_finished(self, generation, stage, seconds):
+        if self.is_current_run(generation):
+            self.loading_view.set_stage_finished(stage, seconds)
+            self.statusBar().showMessage(f"{self.loading_view.stage_title(stage)}: готово за {seconds:.2f} с")
+
+    def on_span_finished(self, record):
+        """
+        Показывает в строке состояния длительность и изменение памяти последнего обновления.
+        """
+        if record["name"] == "refresh" and record["parent"] is None:
+            self.trace_label.setText(f"Обновление: {record['duration']:.2f} с, "
+                                     f"память {format_bytes(record['rss_delta'])}")
+
+    def toggle_diagnostics(self):
+        """
+        Показывает или скрывает панель диагностики.
+        """
+        self.diagnostics_dock.setVisible(not self.diagnostics_dock.isVisible())
+
+    def on_news_loaded(self, generation, result):
+        """
+        Применяет результаты завершённого обновления, если оно всё ещё актуально.
+
+        :param generation: Номер запуска.
+        :param result: Словарь с ключами posts, fallback, clusters, cluster_names (и profile,
+            если обновление профилировалось).
+        """
+        if not self.is_current_run(generation):
+            return
+        self.posts = result["posts"]
+        self.incoming_posts = []
+        self.clusters = result["clusters"]
+        self.cluster_names = result["cluster_names"]
+        self.cluster_terms = result["cluster_terms"]
+        selected = self.main_view.selected_cluster_id() if self.background_run else None
+        self.main_view.populate_clusters(self.clusters, self.cluster_names, self.cluster_terms)
+        if self.background_run:
+            # Фоновое обновление не уводит пользователя из текущего представления
+            self.main_view.select_cluster(selected)
+        else:
+            self.main_view.clear_posts()
             self.stack.setCurrentWidget(self.main_view)
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить новости: {e}")
+        if result["offline"]:
+            self.statusBar().showMessage("Нет соединения с Reddit: показаны сохранённые посты.")
+        else:
+            message = f"Новых постов: {result['new_posts']} из {len(self.posts)}."
+            if result["evicted"]:
+                message += f" Вытеснено из окна: {result['evicted']}."
+            self.statusBar().showMessage(message)
+        if result.get("profile"):
+            self.diagnostics_panel.show_profile(result["profile"])
+            self.diagnostics_dock.show()
+        if result["fallback"]:
+            QMessageBox.information(self, "Информация",
+                "Ваша лента пуста (вы не подписаны ни на какие сабреддиты).\nПоказаны новости из /r/all.")
+
+    def on_news_failed(self, generation, message):
+        if not self.is_current_run(generation):
+            return
+        if self.background_run:
+            self.statusBar().showMessage(f"Не удалось обновить окно: {message}")
+            return
+        self.statusBar().clearMessage()
+        self.stack.setCurrentWidget(self.main_view)
+        QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить новости: {message}")
+
+    def on_thread_finished(self):
+        """
+        Освобождает ссылки на worker и поток после завершения фонового потока.
+        """
+        for generation, (_, thread) in list(self.active_runs.items()):
+            if thread.isFinished():
+                del self.active_runs[generation]
+                thread.deleteLater()
+
+    def showEvent(self, event):
+        """
+        После первого показа окна запускает фоновый прогрев тяжёлых зависимостей и моделей.
+        """
+        super().showEvent(event)
+        if not self.warm_up_started:
+            self.warm_up_started = True
+            threading.Thread(target=news_processor.warm_up, daemon=True).start()
+
+    def closeEvent(self, event):
+        """
+        При закрытии окна отменяет фоновые обновления и дожидается завершения их потоков.
+        """
+        for worker, thread in list(self.active_runs.values()):
+            worker.cancel()
+            thread.quit()
+            thread.wait()
+        self.thumbnail_service.shutdown()
+        self.detail_prefetcher.shutdown()
+        self.embedding_cache.save()
+        self.trace_bridge.detach()
+        self.post_store.close()
+        super().closeEvent(event)
 
-    def show_post_details(self, item):
+    def show_post_details(self, index):
         """
         При двойном клике по посту отображает детальную информацию об этом посте.
         
-        :param item: Элемент списка, содержащий данные выбранного поста.
+        :param index: Модельный индекс выбранного поста.
         """
-        post = item.data(Qt.UserRole)
+        post = index.data(ItemRole)
         self.detail_view.populate_details(post)
         self.stack.setCurrentWidget(self.detail_view)
 
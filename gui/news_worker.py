@@ -0,0 +1,432 @@
+# gui/news_worker.py
+
+import queue
+import threading
+import time
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+import news_processor
+from dim_reduction import DEFAULT_REDUCTION, create_reducer
+from dedup import NearDuplicateIndex, duplicate_group, expand_groups
+from embedding_cache import post_key
+from post_table import PostTable
+from streaming_encoder import EmbeddingBuffer
+from tracing import ProfileCapture, tracer
+
+# Этапы конвейера обновления: (ключ, подпись для LoadingView)
+PIPELINE_STAGES = [
+    ("fetch", "Загрузка постов"),
+    ("embed", "Вычисление эмбеддингов"),
+    ("cluster", "Кластеризация"),
+    ("name", "Генерация названий"),
+]
+
+# Маркер окончания потока страниц от фонового загрузчика
+_END_OF_FEED = object()
+
+class PipelineCancelled(Exception):
+    """
+    Исключение, которым прерывается отменённый или вытесненный запуск конвейера.
+    """
+
+class NewsPipelineWorker(QObject):
+    """
+    Выполняет конвейер загрузки, эмбеддинга, кластеризации и именования в фоновом потоке.
+
+    Страницы ленты загружаются отдельным потоком и передаются в GUI по мере поступления
+    (сигнал posts_received), а эмбеддинги каждой страницы вычисляются, пока загружается следующая.
+    О ходе работы сообщает сигналами, которые Qt доставляет в поток GUI. Отмена кооперативная:
+    флаг проверяется между этапами и внутри этапов, поддерживающих progress_callback.
+    """
+    stage_started = pyqtSignal(int, str)          # generation, stage
+    stage_progress = pyqtSignal(int, str, int, int)  # generation, stage, done, total
+    stage_finished = pyqtSignal(int, str, float)  # generation, stage, seconds
+    finished = pyqtSignal(int, object)            # generation, result (dict)
+    failed = pyqtSignal(int, str)                 # generation, message
+    posts_received = pyqtSignal(int, object)      # generation, page (list of posts)
+    cancelled = pyqtSignal(int)                   # generation
+
+    def __init__(self, generation, reddit_instance, settings, embedding_cache=None,
+                 incremental_clusterer=None, post_store=None, fetcher=None, delta_fetcher=None,
+                 base_posts=None, fetch_more=False, profile=False, post_window=None):
+        """
+        :param generation: Номер запуска; позволяет GUI отбрасывать результаты устаревших запусков.
+        :param reddit_instance: Объект PRAW для доступа к Reddit.
+        :param settings: Текущие настройки приложения.
+        :param embedding_cache: Кэш эмбеддингов (EmbeddingCache) или None.
+        :param incremental_clusterer: IncrementalClusterer, общий для обновлений, или None.
+        :param post_store: Локальное хранилище постов (PostStore) или None.
+        :param fetcher: Загрузчик с методом iter_pages(reddit_instance, limit) (DeltaFetcher или
+            MultiSourceFetcher) или None — тогда используется news_processor.iter_user_news.
+        :param delta_fetcher: DeltaFetcher, статистика которого выводится после загрузки, или None.
+        :param base_posts: Уже загруженные посты, которые переиспользуются без обращения к сети
+            (эмбеддинги берутся из кэша), или None — полная загрузка ленты.
+        :param fetch_more: Дозагрузить недостающие до post_limit посты после base_posts
+            через fetcher.iter_more_pages; False — только перекластеризация base_posts.
+        :param profile: Снять профиль cProfile этого запуска (результат — в ключе profile).
+        :param post_window: PostWindow для кластеризации постов за последние часы или None —
+            кластеризуются только посты этого обновления.
+        """
+        super().__init__()
+        self.generation = generation
+        self.reddit_instance = reddit_instance
+        self.settings = dict(settings)
+        self.embedding_cache = embedding_cache
+        self.incremental_clusterer = incremental_clusterer
+        self.post_store = post_store
+        self.fetcher = fetcher
+        self.delta_fetcher = delta_fetcher
+        self.base_posts = base_posts
+        self.fetch_more = fetch_more
+        self.profile = profile
+        self.post_window = post_window
+        self.evicted_count = 0
+        self.offline = False
+        self.new_post_count = 0
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """
+        Запрашивает отмену. Текущий этап завершится, результаты будут отброшены.
+        """
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def _check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise PipelineCancelled()
+
+    def _run_stage(self, stage, func):
+        """
+        Выполняет один этап конвейера, сообщая о его начале, прогрессе и длительности.
+
+        :param stage: Ключ этапа из PIPELINE_STAGES.
+        :param func: Функция func(progress_callback), выполняющая этап.
+        :return: Результат func.
+        """
+        self._check_cancelled()
+        self.stage_started.emit(self.generation, stage)
+        start = time.perf_counter()
+
+        def progress(done, total):
+            self._check_cancelled()
+            self.stage_progress.emit(self.generation, stage, done, total)
+
+        with tracer.span(stage):
+            result = func(progress)
+        self._check_cancelled()
+        self.stage_finished.emit(self.generation, stage, time.perf_counter() - start)
+        return result
+
+    def _iter_pages(self, limit, extend=False):
+        """
+        Загружает страницы ленты в отдельном потоке и выдаёт их по мере поступления.
+
+        :param limit: Максимальное число постов (при extend — число дозагружаемых постов).
+        :param extend: Дозагрузить посты после прошлого результата вместо загрузки ленты с начала.
+        :return: Генератор кортежей (page, fallback_used).
+        """
+        pages = queue.Queue(maxsize=4)
+
+        def put(item):
+            # Не блокируемся навсегда, если потребитель уже отменён
+            while not self._cancel_event.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                if extend:
+                    source = self.fetcher.iter_more_pages(self.reddit_instance, limit)
+                elif self.fetcher is not None:
+                    source = self.fetcher.iter_pages(self.reddit_instance, limit=limit)
+                else:
+                    source = news_processor.iter_user_news(self.reddit_instance, limit=limit)
+                for item in source:
+                    if not put(item):
+                        return
+                put(_END_OF_FEED)
+            except Exception as e:
+                put(e)
+
+        threading.Thread(target=produce, daemon=True).start()
+        while True:
+            try:
+                item = pages.get(timeout=0.1)
+            except queue.Empty:
+                self._check_cancelled()
+                continue
+            if item is _END_OF_FEED:
+                return
+            if isinstance(item, Exception):
+                raise item
+            self._check_cancelled()
+            yield item
+
+    def _iter_pages_or_store(self, limit, extend=False):
+        """
+        Выдаёт страницы из сети и сохраняет их в хранилище. Если сеть недоступна
+        до получения первой страницы, выдаёт последние посты из хранилища (режим без сети);
+        при дозагрузке в этом случае остаются только уже показанные посты.
+
+        :param limit: Максимальное число постов.
+        :param extend: Дозагрузка после прошлого результата (см. _iter_pages).
+        :return: Генератор кортежей (page, fallback_used).
+        """
+        received = False
+        try:
+            for page, fallback in self._iter_pages(limit, extend):
+                received = True
+                if self.post_store is not None:
+                    self.new_post_count += len(self.post_store.upsert_posts(page))
+                yield page, fallback
+        except PipelineCancelled:
+            raise
+        except Exception as e:
+            if extend and not received:
+                print(f"Не удалось дозагрузить ленту ({e}), показаны уже загруженные посты.")
+                self.offline = True
+                return
+            if received or self.post_store is None:
+                raise
+            cached = self.post_store.recent_posts(limit)
+            if not cached:
+                raise
+            print(f"Не удалось загрузить ленту ({e}), используются сохранённые посты.")
+            self.offline = True
+            yield cached, False
+
+    def _fetch_and_embed(self):
+        """
+        Этапы загрузки и эмбеддинга, выполняемые с перекрытием: пока эмбеддится текущая
+        страница, фоновый поток уже загружает следующую.
+
+        :return: Кортеж (posts, embeddings, fallback_used).
+        """
+        limit = self.settings.get("post_limit", 50)
+        posts = []
+        # Эмбеддинги страниц дописываются в один буфер, без склейки списка массивов в конце
+        buffer = EmbeddingBuffer(capacity=limit)
+        fetched = 0
+        # Репосты и кросспосты схлопываются до эмбеддинга: дальше идут только представители групп
+        duplicates = NearDuplicateIndex()
+        fallback = False
+        fetch_start = time.perf_counter()
+        embed_start = None
+        embed_seconds = 0.0
+        self.stage_started.emit(self.generation, "fetch")
+        if self.base_posts is not None:
+            # Уже показанные посты не загружаются заново: их эмбеддинги берутся из кэша
+            # Окно по времени ограничено своей шириной, а не числом постов ленты
+            base_posts = self.base_posts if self.post_window is not None else self.base_posts[:limit]
+            # base_posts — представители прошлого обновления: их группы разворачиваются, иначе
+            # повторное схлопывание сбросило бы их дубликаты
+            posts = duplicates.collapse(expand_groups(base_posts))
+            fetched = sum(len(duplicate_group(post)) for post in posts)
+            embed_start = time.perf_counter()
+            self.stage_started.emit(self.generation, "embed")
+            if posts:
+                with tracer.span("embed", batch=len(posts), reused=True):
+                    buffer.append(news_processor.embed_posts(posts, self.embedding_cache))
+            embed_seconds += time.perf_counter() - embed_start
+            pages = self._iter_more_pages(posts, limit - fetched)
+        else:
+            pages = self._iter_pages_or_store(limit)
+        for page, fallback in pages:
+            fetched += len(page)
+            page = duplicates.collapse(page)
+            self.stage_progress.emit(self.generation, "fetch", fetched, limit)
+            if not page:
+                continue
+            posts.extend(page)
+            self.posts_received.emit(self.generation, page)
+            if embed_start is None:
+                embed_start = time.perf_counter()
+                self.stage_started.emit(self.generation, "embed")
+            page_start = time.perf_counter()
+            with tracer.span("embed", batch=len(page)):
+                buffer.append(news_processor.embed_posts(page, self.embedding_cache))
+            embed_seconds += time.perf_counter() - page_start
+            self._check_cancelled()
+            self.stage_progress.emit(self.generation, "embed", fetched, limit)
+        fetch_seconds = time.perf_counter() - fetch_start
+        self.stage_finished.emit(self.generation, "fetch", fetch_seconds)
+        # Загрузка перекрывается с эмбеддингом, поэтому её интервал записывается целиком по окончании
+        tracer.record("fetch", fetch_seconds, fetched=fetched, posts=len(posts),
+                      collapsed=duplicates.collapsed, offline=self.offline)
+        if duplicates.collapsed:
+            print(f"Схлопнуто почти одинаковых постов и кросспостов: {duplicates.collapsed} из {fetched}.")
+        if self.post_store is not None and not self.offline and self.base_posts is None:
+            self.post_store.purge_expired()
+            print(f"Новых или изменённых постов: {self.new_post_count} из {len(posts)}.")
+        if self.delta_fetcher is not None and not self.offline and (self.base_posts is None or self.fetch_more):
+            for source in self.delta_fetcher.last_stats:
+                print("Дельта-загрузка: " + self.delta_fetcher.report(source))
+        if embed_start is None:
+            self.stage_started.emit(self.generation, "embed")
+        self.stage_finished.emit(self.generation, "embed", embed_seconds)
+        return posts, buffer.result(), fallback
+
+    def _iter_more_pages(self, posts, count):
+        """
+        Дозагружает до count постов после уже загруженных posts, отбрасывая повторы.
+
+        :return: Генератор кортежей (page, fallback_used).
+        """
+        if count <= 0 or not self.fetch_more:
+            return
+        known = {post.get('permalink') for post in posts}
+        for page, fallback in self._iter_pages_or_store(count, extend=True):
+            page = [post for post in page if post.get('permalink') not in known]
+            known.update(post.get('permalink') for post in page)
+            if page:
+                yield page, fallback
+
+    def _merge_window(self, posts, embeddings):
+        """
+        Добавляет посты обновления во временное окно и вытесняет устаревшие вместе
+        с их эмбеддингами (в том числе из кэша эмбеддингов).
+
+        :return: Кортеж (posts, embeddings) — содержимое окна.
+        """
+        with tracer.span("window", incoming=len(posts)) as span:
+            posts, embeddings, evicted = self.post_window.merge(posts, embeddings)
+            # Прежние версии обновлённых постов делят ключ кэша с новой версией в окне: её запись остаётся
+            live = {post_key(post) for post in posts}
+            evicted = [post for post in evicted if post_key(post) not in live]
+            if evicted and self.embedding_cache is not None:
+                self.embedding_cache.discard(evicted)
+            self.evicted_count = len(evicted)
+            span.set(posts=len(posts), evicted=len(evicted))
+        return posts, embeddings
+
+    def _cluster(self, posts, embeddings):
+        """
+        Кластеризует посты: инкрементально, если задан IncrementalClusterer, иначе полным обучением.
+        """
+        min_cluster_size = self.settings.get("min_cluster_size", 3)
+        reduction = self.settings.get("reduction", DEFAULT_REDUCTION)
+        if self.incremental_clusterer is None:
+            return news_processor.cluster_embeddings(embeddings, min_cluster_size=min_cluster_size,
+                                                     reducer=create_reducer(reduction))
+        self.incremental_clusterer.configure(min_cluster_size=min_cluster_size, reduction=reduction)
+        labels = self.incremental_clusterer.update(posts, embeddings)
+        update = self.incremental_clusterer.last_update
+        print(f"Кластеризация ({update['mode']}): новых постов {update['new']} из {update['total']}.")
+        return labels
+
+    def _name_clusters(self, clusters, labels, embeddings, progress):
+        """
+        Ранжирует термины кластеров и генерирует названия, переиспользуя эмбеддинги постов.
+
+        :return: Кортеж (cluster_names, cluster_terms).
+        """
+        cluster_terms = news_processor.rank_cluster_terms(
+            news_processor.build_cluster_docs(clusters),
+            stop_words=news_processor.get_combined_stopwords()
+        )
+        cluster_names = news_processor.improved_hybrid_generate_cluster_names(
+            clusters, progress_callback=progress,
+            cluster_vectors=news_processor.group_embeddings_by_cluster(labels, embeddings),
+            cluster_terms=cluster_terms
+        )
+        return cluster_names, cluster_terms
+
+    def run(self):
+        """
+        Точка входа фонового потока. Весь запуск выполняется в интервале трассировки refresh,
+        а при включённом профилировании — ещё и под cProfile.
+        """
+        if not self.profile:
+            self._run_traced()
+            return
+        capture = ProfileCapture(f"refresh{self.generation}")
+        with capture:
+            result = self._run_traced(emit=False)
+        if result is not None:
+            result["profile"] = {"path": capture.path, "summary": capture.summary()}
+            self.finished.emit(self.generation, result)
+
+    def _run_traced(self, emit=True):
+        """
+        Выполняет конвейер внутри интервала refresh.
+
+        :param emit: Отправить результат сигналом finished; False — вернуть его вызывающему.
+        :return: Словарь результата или None, если запуск отменён, завершился ошибкой или уже отправлен.
+        """
+        limit = self.settings.get("post_limit", 50)
+        with tracer.span("refresh", generation=self.generation, limit=limit,
+                         rebuild=self.base_posts is not None, profile=self.profile) as span:
+            result = self._run_pipeline()
+            if result is not None:
+                span.set(posts=len(result["posts"]), clusters=len(result["clusters"]),
+                         new_posts=result["new_posts"])
+        if result is not None and emit:
+            self.finished.emit(self.generation, result)
+            return None
+        return result
+
+    def _run_pipeline(self):
+        """
+        Этапы конвейера. Об отмене и ошибках сообщает сигналами.
+
+        :return: Словарь результата или None.
+        """
+        try:
+            posts, embeddings, fallback = self._fetch_and_embed()
+            if self.post_window is not None:
+                posts, embeddings = self._merge_window(posts, embeddings)
+            if self.embedding_cache is not None:
+                # Индекс кэша записывается на диск один раз за обновление, а не после каждой порции
+                self.embedding_cache.save()
+            if posts:
+                labels = self._run_stage("cluster", lambda progress: self._cluster(posts, embeddings))
+                # Состав кластеров — массивы индексов в таблице постов; метки в посты не записываются
+                clusters = PostTable(posts, labels).clusters()
+                cluster_names, cluster_terms = self._run_stage(
+                    "name",
+                    lambda progress: self._name_clusters(clusters, labels, embeddings, progress)
+                )
+            elif self.post_window is not None:
+                # Все посты вытеснены из окна — это обычное пустое состояние, а не ошибка
+                clusters, cluster_names, cluster_terms = {}, {}, {}
+            else:
+                raise ValueError("Лента пуста.")
+            return {
+                "posts": posts,
+                "fallback": fallback,
+                "clusters": clusters,
+                "cluster_names": cluster_names,
+                "cluster_terms": cluster_terms,
+                "offline": self.offline,
+                "new_posts": self.new_post_count,
+                "evicted": self.evicted_count,
+            }
+        except PipelineCancelled:
+            self.cancelled.emit(self.generation)
+        except Exception as e:
+            self.failed.emit(self.generation, str(e))
+        return None
+
+def start_worker(worker):
+    """
+    Запускает worker в отдельном QThread. Worker удаляется по завершении потока,
+    сам поток должен освободить владелец (после сигнала finished).
+
+    :param worker: Экземпляр NewsPipelineWorker.
+    :return: Созданный QThread.
+    """
+    thread = QThread()
+    worker.moveToThread(thread)
+    thread.started.connect(worker.run)
+    worker.finished.connect(thread.quit)
+    worker.failed.connect(thread.quit)
+    worker.cancelled.connect(thread.quit)
+    thread.finished.connect(worker.deleteLater)
+    thread.start()
+    return thread
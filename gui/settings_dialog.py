@@ -5,6 +5,8 @@ from PyQt5.QtWidgets import (
     QPushButton, QMessageBox, QTabWidget, QWidget, QComboBox, QFontComboBox, QSpinBox
 )
 from PyQt5.QtGui import QFont
+from multi_fetch import DEFAULT_SOURCES, parse_source
+from dim_reduction import DEFAULT_REDUCTION, REDUCTION_METHODS
 
 class SettingsDialog(QDialog):
     def __init__(self, current_settings, parent=None):
@@ -27,6 +29,40 @@ class SettingsDialog(QDialog):
         posts_layout.addWidget(self.posts_edit)
         general_layout.addLayout(posts_layout)
 
+        sources_layout = QHBoxLayout()
+        sources_layout.addWidget(QLabel("Источники:"))
+        self.sources_edit = QLineEdit(", ".join(self.current_settings.get("sources", DEFAULT_SOURCES)))
+        self.sources_edit.setToolTip("Через запятую: front/hot, r/<сабреддит>/hot|new|rising|top")
+        sources_layout.addWidget(self.sources_edit)
+        general_layout.addLayout(sources_layout)
+
+        cluster_size_layout = QHBoxLayout()
+        cluster_size_layout.addWidget(QLabel("Мин. размер кластера:"))
+        self.cluster_size_spin = QSpinBox()
+        self.cluster_size_spin.setRange(2, 100)
+        self.cluster_size_spin.setValue(self.current_settings.get("min_cluster_size", 3))
+        cluster_size_layout.addWidget(self.cluster_size_spin)
+        general_layout.addLayout(cluster_size_layout)
+
+        reduction_layout = QHBoxLayout()
+        reduction_layout.addWidget(QLabel("Понижение размерности:"))
+        self.reduction_combo = QComboBox()
+        self.reduction_combo.addItems(REDUCTION_METHODS)
+        self.reduction_combo.setCurrentText(self.current_settings.get("reduction", DEFAULT_REDUCTION))
+        self.reduction_combo.setToolTip("Проекция эмбеддингов перед HDBSCAN (umap — при установленном umap-learn)")
+        reduction_layout.addWidget(self.reduction_combo)
+        general_layout.addLayout(reduction_layout)
+
+        window_layout = QHBoxLayout()
+        window_layout.addWidget(QLabel("Окно по времени, ч:"))
+        self.window_spin = QSpinBox()
+        self.window_spin.setRange(0, 24 * 7)
+        self.window_spin.setValue(self.current_settings.get("window_hours", 0))
+        self.window_spin.setSpecialValueText("выкл.")
+        self.window_spin.setToolTip("Кластеризовать посты всех обновлений за последние N часов; старые вытесняются")
+        window_layout.addWidget(self.window_spin)
+        general_layout.addLayout(window_layout)
+
         general_tab.setLayout(general_layout)
         self.tabs.addTab(general_tab, "Общие")
 
@@ -83,6 +119,14 @@ class SettingsDialog(QDialog):
             QMessageBox.warning(self, "Ошибка", "Количество постов должно быть числом!")
             return None
 
+        sources = [spec.strip() for spec in self.sources_edit.text().split(",") if spec.strip()]
+        try:
+            for spec in sources:
+                parse_source(spec)
+        except ValueError as e:
+            QMessageBox.warning(self, "Ошибка", str(e))
+            return None
+
         theme = self.theme_combo.currentText()
         font = self.font_combo.currentFont().family()
         font_size = self.font_size_spin.value()
@@ -91,5 +135,9 @@ class SettingsDialog(QDialog):
             "post_limit": post_limit,
             "theme": theme,
             "font": font,
-            "font_size": font_size
+            "font_size": font_size,
+            "sources": sources or DEFAULT_SOURCES,
+            "min_cluster_size": self.cluster_size_spin.value(),
+            "reduction": self.reduction_combo.currentText(),
+            "window_hours": self.window_spin.value()
         }
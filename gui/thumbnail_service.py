@@ -0,0 +1,174 @@
+# gui/thumbnail_service.py
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from PyQt5.QtCore import QObject, Qt, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
+
+THUMBNAIL_CACHE_DIR = "thumbnail_cache"
+DEFAULT_DISK_CACHE_BYTES = 64 * 1024 * 1024
+DEFAULT_MEMORY_ITEMS = 256
+DEFAULT_WORKERS = 4
+REQUEST_TIMEOUT = 5
+
+class DiskImageCache:
+    """
+    Дисковый кэш исходных байтов изображений с ограничением общего размера.
+
+    Файлы именуются по SHA-1 от URL. При превышении лимита удаляются самые старые
+    по времени последнего доступа файлы.
+    """
+    def __init__(self, cache_dir=THUMBNAIL_CACHE_DIR, max_bytes=DEFAULT_DISK_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None
+
+    def _path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode("utf-8")).hexdigest())
+
+    def get(self, url):
+        """
+        Возвращает байты изображения из кэша или None.
+        """
+        path = self._path(url)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # обновляем время доступа для вытеснения
+            return data
+        except OSError:
+            return None
+
+    def put(self, url, data):
+        """
+        Сохраняет байты изображения и при необходимости вытесняет старые файлы.
+        """
+        with self._lock:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                if self._total_bytes is None:
+                    self._total_bytes = sum(entry.stat().st_size for entry in os.scandir(self.cache_dir))
+                path = self._path(url)
+                tmp_path = path + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+                self._total_bytes += len(data)
+                if self._total_bytes > self.max_bytes:
+                    self._evict()
+            except OSError as e:
+                print(f"Ошибка записи в кэш изображений: {e}")
+
+    def _evict(self):
+        entries = sorted(os.scandir(self.cache_dir), key=lambda entry: entry.stat().st_mtime)
+        for entry in entries:
+            if self._total_bytes <= self.max_bytes * 0.9:
+                break
+            size = entry.stat().st_size
+            try:
+                os.remove(entry.path)
+                self._total_bytes -= size
+            except OSError:
+                pass
+
+class ThumbnailService(QObject):
+    """
+    Асинхронная загрузка миниатюр постов.
+
+    Загрузка, декодирование и масштабирование (QImage) выполняются в пуле рабочих потоков
+    с общей HTTP-сессией. В потоке GUI QImage превращается в QPixmap и кладётся в LRU-кэш
+    в памяти; исходные байты сохраняются в дисковом кэше. Когда миниатюра готова,
+    испускается сигнал thumbnail_ready(url, width, pixmap), при ошибке — thumbnail_failed(url, width).
+    """
+    thumbnail_ready = pyqtSignal(str, int, QPixmap)
+    thumbnail_failed = pyqtSignal(str, int)
+    _image_decoded = pyqtSignal(str, int, QImage)
+
+    def __init__(self, parent=None, workers=DEFAULT_WORKERS, memory_items=DEFAULT_MEMORY_ITEMS,
+                 disk_cache=None):
+        super().__init__(parent)
+        self.memory_items = memory_items
+        self.disk_cache = disk_cache if disk_cache is not None else DiskImageCache()
+        self._pixmaps = OrderedDict()  # (url, width) -> QPixmap
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail")
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._image_decoded.connect(self._on_image_decoded)
+
+    def cached(self, url, width):
+        """
+        Возвращает масштабированную миниатюру из кэша в памяти или None.
+        """
+        key = (url, width)
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+        return pixmap
+
+    def request(self, url, width):
+        """
+        Возвращает миниатюру сразу, если она есть в памяти, иначе ставит загрузку в очередь
+        и возвращает None; по готовности будет испущен thumbnail_ready.
+
+        :param url: URL изображения.
+        :param width: Ширина, до которой масштабируется изображение.
+        :return: QPixmap или None.
+        """
+        pixmap = self.cached(url, width)
+        if pixmap is not None:
+            return pixmap
+        with self._pending_lock:
+            if (url, width) in self._pending:
+                return None
+            self._pending.add((url, width))
+        self._executor.submit(self._load, url, width)
+        return None
+
+    def _load(self, url, width):
+        """
+        Выполняется в рабочем потоке: читает изображение с диска или из сети,
+        декодирует и масштабирует его.
+        """
+        image = QImage()
+        try:
+            data = self.disk_cache.get(url)
+            if data is None:
+                response = self._session.get(url, timeout=REQUEST_TIMEOUT)
+                if response.status_code == 200:
+                    data = response.content
+                    self.disk_cache.put(url, data)
+            if data and image.loadFromData(data):
+                image = image.scaledToWidth(width, Qt.SmoothTransformation)
+        except Exception as e:
+            print("Ошибка загрузки изображения:", e)
+        self._image_decoded.emit(url, width, image)
+
+    def _on_image_decoded(self, url, width, image):
+        with self._pending_lock:
+            self._pending.discard((url, width))
+        if image.isNull():
+            self.thumbnail_failed.emit(url, width)
+            return
+        pixmap = QPixmap.fromImage(image)
+        self._pixmaps[(url, width)] = pixmap
+        self._pixmaps.move_to_end((url, width))
+        while len(self._pixmaps) > self.memory_items:
+            self._pixmaps.popitem(last=False)
+        self.thumbnail_ready.emit(url, width, pixmap)
+
+    def shutdown(self):
+        """
+        Останавливает пул загрузки (незавершённые задачи отменяются).
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._session.close()
@@ -0,0 +1,231 @@
+"""
+multi_fetch.py
+
+Параллельная загрузка постов из нескольких источников (персональная лента и сабреддиты
+с порядком hot/new/rising/top). Источники читаются в ограниченном пуле потоков с общим
+бюджетом запросов к API; результаты объединяются, дубликаты отбрасываются по permalink,
+а каждый пост помечается источником, из которого он получен.
+
+Формат источника: "front/hot" или "r/<сабреддит>/<порядок>", например "r/python/new".
+"""
+
+import math
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from news_processor import LISTING_PAGE_SIZE, submission_to_post
+
+DEFAULT_SOURCES = ["front/hot"]
+SUPPORTED_SORTS = ("hot", "new", "rising", "top")
+DEFAULT_MAX_WORKERS = 4
+
+# Общий бюджет запросов: Reddit допускает порядка 100 запросов в минуту для OAuth-клиента
+DEFAULT_REQUESTS_PER_MINUTE = 90
+
+_END_OF_SOURCE = object()
+
+def parse_source(spec):
+    """
+    Разбирает строку источника.
+
+    :param spec: Строка вида "front/hot" или "r/python/new".
+    :return: Кортеж (subreddit, sort), где subreddit — None для персональной ленты.
+    :raises ValueError: Если строка не соответствует формату или порядок не поддерживается.
+    """
+    parts = [part for part in spec.strip().split("/") if part]
+    if len(parts) == 2 and parts[0] == "front":
+        subreddit, sort = None, parts[1]
+    elif len(parts) == 3 and parts[0] == "r":
+        subreddit, sort = parts[1], parts[2]
+    else:
+        raise ValueError(f"Неверный формат источника: {spec!r}")
+    if sort not in SUPPORTED_SORTS:
+        raise ValueError(f"Неподдерживаемый порядок {sort!r} в источнике {spec!r}")
+    return subreddit, sort
+
+def resolve_listing(reddit_instance, spec):
+    """
+    Возвращает метод листинга PRAW для источника (например, reddit.subreddit("python").new).
+    """
+    subreddit, sort = parse_source(spec)
+    target = reddit_instance.front if subreddit is None else reddit_instance.subreddit(subreddit)
+    return getattr(target, sort)
+
+class RateLimiter:
+    """
+    Потокобезопасный ограничитель частоты запросов (token bucket), общий для всех источников.
+    """
+    def __init__(self, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, burst=None):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = burst if burst is not None else max(int(requests_per_minute // 6), 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited = 0.0
+
+    def acquire(self):
+        """
+        Блокирует вызывающий поток, пока в бюджете не появится запрос.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+                self.waited += delay
+            time.sleep(delay)
+
+def rate_limited(iterable, rate_limiter, page_size=LISTING_PAGE_SIZE):
+    """
+    Оборачивает ленивый листинг PRAW так, чтобы перед запросом каждой страницы
+    расходовался один запрос из общего бюджета.
+    """
+    iterator = iter(iterable)
+    index = 0
+    while True:
+        if index % page_size == 0:
+            rate_limiter.acquire()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        index += 1
+        yield item
+
+class MultiSourceFetcher:
+    """
+    Параллельная загрузка нескольких источников с общим бюджетом запросов.
+
+    Время загрузки определяется самым медленным источником, а не суммой всех.
+    Если задан DeltaFetcher, каждый источник загружается в дельта-режиме.
+    """
+    def __init__(self, sources=None, max_workers=DEFAULT_MAX_WORKERS, rate_limiter=None, delta_fetcher=None):
+        """
+        :param sources: Список строк источников (по умолчанию DEFAULT_SOURCES).
+        :param max_workers: Размер пула потоков.
+        :param rate_limiter: Общий RateLimiter (создаётся, если не передан).
+        :param delta_fetcher: DeltaFetcher или None.
+        """
+        self.sources = list(sources or DEFAULT_SOURCES)
+        for spec in self.sources:
+            parse_source(spec)
+        self.max_workers = max_workers
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.delta_fetcher = delta_fetcher
+        self.last_timings = {}
+
+    def _limited_listing(self, reddit_instance, spec):
+        listing = resolve_listing(reddit_instance, spec)
+        return lambda **kwargs: rate_limited(listing(**kwargs), self.rate_limiter)
+
+    def _source_pages(self, reddit_instance, spec, limit, page_size):
+        limited = self._limited_listing(reddit_instance, spec)
+        if self.delta_fetcher is not None:
+            _, sort = parse_source(spec)
+            yield from self.delta_fetcher.iter_source(spec, limited, limit=limit, sort=sort, page_size=page_size)
+            return
+        page = []
+        for submission in limited(limit=limit):
+            page.append(submission_to_post(submission))
+            if len(page) >= page_size:
+                yield page
+                page = []
+        if page:
+            yield page
+
+    def iter_pages(self, reddit_instance, limit=50, page_size=LISTING_PAGE_SIZE):
+        """
+        Загружает все источники параллельно и выдаёт страницы по мере поступления.
+
+        Общий лимит делится между источниками поровну. Посты, уже полученные из другого
+        источника, отбрасываются; в каждом посте поле "source" содержит источник.
+        Если потребитель прекращает чтение (генератор закрыт), загрузка источников останавливается.
+
+        :param reddit_instance: Объект PRAW.
+        :param limit: Общее максимальное число постов.
+        :param page_size: Число постов в одной выдаваемой странице.
+        :return: Генератор кортежей (page, fallback_used); fallback_used всегда False.
+        """
+        per_source = max(math.ceil(limit / len(self.sources)), 1)
+        return self._iter_parallel(
+            lambda spec: self._source_pages(reddit_instance, spec, per_source, page_size)
+        )
+
+    def iter_more_pages(self, reddit_instance, count, page_size=LISTING_PAGE_SIZE):
+        """
+        Дозагружает count постов (поровну из каждого источника), следующих за прошлым результатом.
+        Требует DeltaFetcher: только он помнит, где закончилась прошлая загрузка.
+
+        :return: Генератор кортежей (page, fallback_used).
+        :raises ValueError: Если DeltaFetcher не задан.
+        """
+        if self.delta_fetcher is None:
+            raise ValueError("Дозагрузка источников требует DeltaFetcher.")
+        per_source = max(math.ceil(count / len(self.sources)), 1)
+        return self._iter_parallel(
+            lambda spec: self.delta_fetcher.extend_source(
+                spec, self._limited_listing(reddit_instance, spec), per_source, page_size=page_size
+            )
+        )
+
+    def _iter_parallel(self, source_pages):
+        """
+        Читает генераторы страниц source_pages(spec) всех источников в пуле потоков
+        и объединяет их с дедупликацией по permalink.
+        """
+        pages = queue.Queue()
+        stop = threading.Event()
+        self.last_timings = {}
+
+        def load(spec):
+            start = time.perf_counter()
+            try:
+                for page in source_pages(spec):
+                    if stop.is_set():
+                        break
+                    pages.put((spec, page))
+            except Exception as e:
+                print(f"Ошибка загрузки источника {spec}: {e}")
+                pages.put((spec, e))
+            finally:
+                self.last_timings[spec] = time.perf_counter() - start
+                pages.put((spec, _END_OF_SOURCE))
+
+        seen = set()
+        errors = []
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="fetch")
+        try:
+            for spec in self.sources:
+                executor.submit(load, spec)
+            remaining = len(self.sources)
+            while remaining:
+                spec, item = pages.get()
+                if item is _END_OF_SOURCE:
+                    remaining -= 1
+                    continue
+                if isinstance(item, Exception):
+                    errors.append(item)
+                    continue
+                page = []
+                for post in item:
+                    key = post.get("permalink")
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    post["source"] = spec
+                    page.append(post)
+                if page:
+                    yield page, False
+        finally:
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+        if errors and not seen:
+            raise errors[0]
+        timings = ", ".join(f"{spec} {seconds:.2f} с" for spec, seconds in self.last_timings.items())
+        print(f"Загрузка источников: {timings}.")
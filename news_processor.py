@@ -7,46 +7,306 @@ news_processor.py
 эмбеддингов от SentenceTransformer и алгоритма HDBSCAN.
 """
 
-import re
+import itertools
+import threading
+import time
 from collections import Counter
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import KMeans
-import nltk
-from nltk.corpus import stopwords
-from sentence_transformers import SentenceTransformer
-import hdbscan
-from keybert import KeyBERT
-
-def ensure_stopwords():
+import numpy as np
+from embedding_cache import post_key
+from dim_reduction import create_reducer
+from dedup import collapse_near_duplicates
+from embedding_backends import (
+    DEFAULT_EMBEDDING_BACKEND, create_embedding_backend, embedding_cache_tag, local_model_dir,
+    resolve_embedding_backend
+)
+from streaming_encoder import DEFAULT_CHUNK_SIZE, StreamingEncoder
+from post_table import Post, PostTable, group_indices_by_label
+from tracing import current_rss_bytes, traced, tracer
+from text_engine import strip_markdown, normalize_post, as_stopword_set
+# Вспомогательные функции текста перенесены в text_engine; переэкспортируются для прежних импортов
+from text_engine import clean_text, extract_phrases_rake, remove_markdown_links  # noqa: F401
+
+# Длина фразы RAKE (в словах), пригодной для названия кластера
+RAKE_NAME_WORDS = (2, 4)
+
+# Тяжёлые зависимости (sentence_transformers/torch, hdbscan, keybert, sklearn, nltk)
+# импортируются лениво внутри функций, чтобы импорт модуля не замедлял запуск приложения.
+
+def ensure_stopwords(download=False):
+    """
+    Проверяет наличие стоп-слов NLTK.
+
+    По умолчанию не обращается к сети: при отсутствии корпуса просто возвращает False,
+    и используется встроенный английский список sklearn. Загрузка выполняется только
+    при download=True (например, из фонового прогрева).
+
+    :param download: Загрузить ли корпус stopwords, если он не найден.
+    :return: True, если стоп-слова NLTK доступны.
+    """
     from nltk.corpus import stopwords
-    from nltk import download
+    from nltk import download as nltk_download
 
     try:
         _ = stopwords.words("english")
-        print("✅ Stopwords уже установлены.")
+        return True
     except LookupError:
+        if not download:
+            return False
         print("⬇️  Stopwords не найдены. Загружаю...")
-        download("stopwords")
+        nltk_download("stopwords", quiet=True)
         try:
             _ = stopwords.words("english")
             print("✅ Stopwords успешно загружены.")
+            return True
         except LookupError:
             print("❌ Не удалось загрузить stopwords.")
-ensure_stopwords()
+            return False
 
-def clean_text(text):
+def warm_up(model_name=None):
     """
-    Применяет базовую очистку текста.
-    
-    Удаляет лишние пробелы и символы, отличные от букв и цифр, и приводит строку к нижнему регистру.
-    
-    :param text: Исходный текст.
-    :return: Очищенный текст.
+    Прогревает тяжёлые зависимости: импортирует модули, проверяет (и при необходимости
+    загружает) стоп-слова и загружает модель эмбеддингов в реестр.
+    Предназначена для вызова в фоновом потоке после показа окна.
+
+    :param model_name: Имя модели SentenceTransformer (по умолчанию DEFAULT_EMBEDDING_MODEL).
+    """
+    start = time.perf_counter()
+    try:
+        import sklearn.feature_extraction.text  # noqa: F401
+        import hdbscan  # noqa: F401
+        ensure_stopwords(download=True)
+        model_registry.get_embedding_backend(model_name or DEFAULT_EMBEDDING_MODEL)
+        print(f"✅ Прогрев завершён за {time.perf_counter() - start:.2f} с.")
+    except Exception as e:
+        print(f"Ошибка при прогреве моделей: {e}")
+
+DEFAULT_EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+
+class ModelRegistry:
+    """
+    Потокобезопасный реестр тяжёлых моделей, общий для всего процесса.
+
+    Каждая модель загружается один раз за сессию и затем переиспользуется.
+    KeyBERT строится поверх того же экземпляра SentenceTransformer, что и кластеризация,
+    поэтому веса трансформера десериализуются только однажды. Для каждой модели
+    запоминаются время загрузки и прирост резидентной памяти.
+
+    Эмбеддинги постов и кандидатных фраз вычисляются бэкендом (см. embedding_backends),
+    который выбирается через configure_embeddings.
     """
-    text = re.sub(r'\s+', ' ', text)
-    text = re.sub(r'[^a-zA-Zа-яА-Я0-9\s]', '', text)
-    return text.lower().strip()
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._models = {}
+        self._stats = {}
+        self.embedding_backend = DEFAULT_EMBEDDING_BACKEND
+        self.encode_threads = None
+
+    def get(self, key, loader):
+        """
+        Возвращает модель по ключу, загружая её при первом обращении.
+
+        :param key: Уникальный ключ модели в реестре.
+        :param loader: Функция без аргументов, создающая модель.
+        :return: Экземпляр модели.
+        """
+        model = self._models.get(key)
+        if model is not None:
+            return model
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                return model
+            rss_before = current_rss_bytes()
+            start = time.perf_counter()
+            model = loader()
+            load_time = time.perf_counter() - start
+            rss_after = current_rss_bytes()
+            rss_delta = None
+            if rss_before is not None and rss_after is not None:
+                rss_delta = max(rss_after - rss_before, 0)
+            self._stats[key] = {
+                "load_time": load_time,
+                "rss_delta_bytes": rss_delta,
+                "param_bytes": _parameter_bytes(model),
+            }
+            self._models[key] = model
+            print(f"✅ Модель {key} загружена за {load_time:.2f} с ({_format_bytes(rss_delta)}).")
+            return model
+
+    def get_sentence_transformer(self, model_name=DEFAULT_EMBEDDING_MODEL):
+        """
+        Возвращает общий экземпляр SentenceTransformer.
+
+        :param model_name: Имя модели SentenceTransformer.
+        :return: Экземпляр SentenceTransformer.
+        """
+        def load():
+            from sentence_transformers import SentenceTransformer
+            return SentenceTransformer(local_model_dir(model_name) or model_name)
+        return self.get(f"sentence_transformer:{model_name}", load)
+
+    def configure_embeddings(self, backend=DEFAULT_EMBEDDING_BACKEND, threads=None):
+        """
+        Выбирает бэкенд эмбеддингов для последующих вызовов get_embedding_backend.
 
+        :param backend: Имя бэкенда из embedding_backends.EMBEDDING_BACKENDS.
+        :param threads: Число потоков внутри операций или None.
+        """
+        self.embedding_backend = backend
+        self.encode_threads = threads
+
+    def get_embedding_backend(self, model_name=DEFAULT_EMBEDDING_MODEL):
+        """
+        Возвращает общий бэкенд эмбеддингов, выбранный через configure_embeddings.
+        Бэкенд torch использует тот же SentenceTransformer, что и KeyBERT.
+
+        :param model_name: Имя модели.
+        :return: Экземпляр EmbeddingBackend.
+        """
+        backend, threads = self.embedding_backend, self.encode_threads
+        def load():
+            return create_embedding_backend(backend, model_name, threads=threads,
+                                            sentence_transformer=lambda: self.get_sentence_transformer(model_name))
+        return self.get(self._embedding_backend_key(model_name), load)
+
+    def _embedding_backend_key(self, model_name):
+        return f"embedding_backend:{self.embedding_backend}:{model_name}:{self.encode_threads}"
+
+    def embedding_cache_tag(self, model_name=DEFAULT_EMBEDDING_MODEL):
+        """
+        Возвращает имя модели для EmbeddingCache по бэкенду, который фактически используется
+        (а не запрошен): если onnx недоступен, эмбеддинги считает torch и кэш должен быть общим с ним.
+        Модель при этом не загружается.
+
+        :param model_name: Имя модели.
+        :return: Строка для EmbeddingCache(model_name=...).
+        """
+        backend = self._models.get(self._embedding_backend_key(model_name))
+        if backend is not None:
+            return backend.cache_tag
+        return embedding_cache_tag(resolve_embedding_backend(self.embedding_backend, model_name), model_name)
+
+    def get_keybert(self, model_name=DEFAULT_EMBEDDING_MODEL):
+        """
+        Возвращает общий экземпляр KeyBERT, использующий тот же SentenceTransformer,
+        что и кластеризация.
+
+        :param model_name: Имя модели SentenceTransformer для KeyBERT.
+        :return: Экземпляр KeyBERT.
+        """
+        def load():
+            from keybert import KeyBERT
+            return KeyBERT(model=self.get_sentence_transformer(model_name))
+        return self.get(f"keybert:{model_name}", load)
+
+    def is_loaded(self, key):
+        """
+        Проверяет, загружена ли уже модель с данным ключом.
+
+        :param key: Ключ модели в реестре.
+        :return: True, если модель уже загружена.
+        """
+        return key in self._models
+
+    def stats(self):
+        """
+        Возвращает статистику загрузки моделей.
+
+        :return: Словарь вида {key: {"load_time": сек, "rss_delta_bytes": байт, "param_bytes": байт}}.
+        """
+        with self._lock:
+            return {key: dict(value) for key, value in self._stats.items()}
+
+    def clear(self):
+        """
+        Выгружает все модели из реестра (например, для освобождения памяти).
+        """
+        with self._lock:
+            self._models.clear()
+            self._stats.clear()
+
+def _parameter_bytes(model):
+    """
+    Оценивает объём весов модели PyTorch в байтах.
+
+    :param model: Модель (например, SentenceTransformer).
+    :return: Суммарный размер параметров в байтах или None, если модель их не предоставляет.
+    """
+    parameters = getattr(model, "parameters", None)
+    if not callable(parameters):
+        return None
+    try:
+        return sum(p.numel() * p.element_size() for p in parameters())
+    except Exception:
+        return None
+
+def _format_bytes(size):
+    """
+    Форматирует размер в байтах для вывода в лог.
+
+    :param size: Размер в байтах или None.
+    :return: Строка вида "123.4 МБ" или "память неизвестна".
+    """
+    if size is None:
+        return "память неизвестна"
+    return f"{size / (1024 * 1024):.1f} МБ"
+
+model_registry = ModelRegistry()
+
+# Размер страницы листинга Reddit: столько постов приходит за один запрос к API
+LISTING_PAGE_SIZE = 100
+
+def submission_to_post(submission):
+    """
+    Преобразует объект Submission из PRAW в запись поста (Post с интерфейсом словаря).
+
+    :param submission: Объект Submission.
+    :return: Post с основными атрибутами поста.
+    """
+    return Post(
+        id=submission.id,
+        title=submission.title or "",
+        selftext=submission.selftext or "",
+        url=submission.url,
+        permalink=submission.permalink,  # для создания ссылок на пост
+        thumbnail=submission.thumbnail if submission.thumbnail not in ['self', 'default', ''] else None,
+        created=submission.created_utc,
+        # Через vars(), чтобы ленивый объект PRAW не запрашивал пост целиком ради отсутствующего атрибута
+        crosspost_parent=vars(submission).get("crosspost_parent")
+    )
+
+def iter_user_news(reddit_instance, limit=50, page_size=LISTING_PAGE_SIZE):
+    """
+    Постранично получает новости из Reddit.
+
+    Листинг читается лениво, поэтому первая страница постов доступна сразу после первого
+    запроса к API, не дожидаясь загрузки всей ленты. Если персональная лента пуста,
+    используется сабреддит "all".
+
+    :param reddit_instance: Объект для доступа к Reddit (PRAW instance).
+    :param limit: Максимальное число постов для выборки.
+    :param page_size: Число постов в одной выдаваемой странице.
+    :return: Генератор кортежей (page, fallback_used), где page — список постов.
+    """
+    fallback_used = False
+    submissions = iter(reddit_instance.front.hot(limit=limit))
+    first = next(submissions, None)
+    if first is None:
+        fallback_used = True
+        submissions = iter(reddit_instance.subreddit("all").hot(limit=limit))
+        first = next(submissions, None)
+        if first is None:
+            return
+    page = []
+    for submission in itertools.chain([first], submissions):
+        page.append(submission_to_post(submission))
+        if len(page) >= page_size:
+            yield page, fallback_used
+            page = []
+    if page:
+        yield page, fallback_used
+
+@traced()
 def fetch_user_news(reddit_instance, limit=50):
     """
     Получает новости из Reddit.
@@ -60,21 +320,8 @@ def fetch_user_news(reddit_instance, limit=50):
     """
     posts = []
     fallback_used = False
-    # Пробуем получить новости из персональной ленты
-    submissions = list(reddit_instance.front.hot(limit=limit))
-    if not submissions:
-        fallback_used = True
-        submissions = reddit_instance.subreddit("all").hot(limit=limit)
-    for submission in submissions:
-        post = {
-            "title": submission.title or "",
-            "selftext": submission.selftext or "",
-            "url": submission.url,
-            "permalink": submission.permalink,  # для создания ссылок на пост
-            "thumbnail": submission.thumbnail if submission.thumbnail not in ['self', 'default', ''] else None,
-            "created": submission.created_utc
-        }
-        posts.append(post)
+    for page, fallback_used in iter_user_news(reddit_instance, limit=limit):
+        posts.extend(page)
     return posts, fallback_used
 
 def preprocess_posts(posts):
@@ -82,77 +329,54 @@ def preprocess_posts(posts):
     Выполняет предобработку списка постов.
     
     Для каждого поста объединяет заголовок и selftext, очищает полученный текст и,
-    если результат пустой, заменяет его на "empty".
+    если результат пустой, заменяет его на "empty". Нормализованный текст кэшируется в посте.
     
     :param posts: Список постов.
     :return: Список предобработанных текстов.
     """
     texts = []
     for post in posts:
-        combined = (post.get('title', '') + " " + post.get('selftext', '')).strip()
-        if not combined:
-            combined = post.get('title', '')
-        cleaned = clean_text(combined)
-        if not cleaned:
-            cleaned = "empty"
-        texts.append(cleaned)
+        cleaned = normalize_post(post).clean
+        texts.append(cleaned if cleaned else "empty")
     return texts
 
+_combined_stopwords = None
+
 def get_combined_stopwords():
     """
     Объединяет английские и русские стоп-слова, исключая отдельные слова,
     которые могут быть полезны для генерации названий.
     
+    Если корпус NLTK не установлен, используется английский список sklearn (без обращения к сети).
+    
     :return: Список стоп-слов.
     """
-    sw = set(stopwords.words('english')).union(set(stopwords.words('russian')))
+    global _combined_stopwords
+    if _combined_stopwords is not None:
+        return list(_combined_stopwords)
     exceptions = {"news", "tech", "sport", "game", "politics"}
-    return list(sw.difference(exceptions))
-
-def extract_phrases_rake(text, stop_words):
-    """
-    Простейшая реализация алгоритма RAKE для извлечения ключевых фраз.
-    
-    Делит текст на предложения, формирует кандидатные фразы, исключая стоп-слова,
-    и оценивает каждую фразу по сумме длин слов в ней.
-    
-    :param text: Исходный текст.
-    :param stop_words: Список стоп-слов.
-    :return: Список кортежей (фраза, оценка), отсортированных по убыванию оценки.
-    """
-    sentences = re.split(r'[.?!;\n]', text)
-    phrase_list = []
-    for sentence in sentences:
-        words = sentence.split()
-        phrase = []
-        for word in words:
-            if word in stop_words:
-                if phrase:
-                    phrase_list.append(" ".join(phrase))
-                    phrase = []
-            else:
-                phrase.append(word)
-        if phrase:
-            phrase_list.append(" ".join(phrase))
-    phrase_scores = []
-    for phrase in phrase_list:
-        words = phrase.split()
-        if words:
-            score = sum(len(w) for w in words)
-            phrase_scores.append((phrase, score))
-    phrase_scores.sort(key=lambda x: x[1], reverse=True)
-    return phrase_scores
+    if ensure_stopwords():
+        from nltk.corpus import stopwords
+        sw = set(stopwords.words('english')).union(set(stopwords.words('russian')))
+        _combined_stopwords = frozenset(sw.difference(exceptions))
+        return list(_combined_stopwords)
+    from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+    # Запасной список не кэшируется: после фоновой загрузки NLTK будет использован полный
+    return list(set(ENGLISH_STOP_WORDS).difference(exceptions))
 
 def extract_keywords_keybert(text, keyphrase_ngram_range=(1, 3), top_n=1):
     """
     Извлекает ключевые фразы из текста с помощью KeyBERT.
     
+    Используется общий экземпляр KeyBERT из реестра моделей, поэтому повторные вызовы
+    не загружают модель заново.
+    
     :param text: Объединённый текст для анализа.
     :param keyphrase_ngram_range: Диапазон n-грамм, который будет рассматриваться (например, от 1 до 3).
     :param top_n: Число ключевых фраз, которые нужно вернуть.
     :return: Список кортежей (ключевая фраза, оценка).
     """
-    kw_model = KeyBERT()
+    kw_model = model_registry.get_keybert()
     keywords = kw_model.extract_keywords(text, keyphrase_ngram_range=keyphrase_ngram_range, stop_words='english', top_n=top_n)
     return keywords
 
@@ -171,71 +395,230 @@ def generate_cluster_name_keybert(docs):
         return keywords[0][0]  # возвращает саму ключевую фразу
     return None
 
-def improved_hybrid_generate_cluster_names(clusters):
+@traced(items_arg=0)
+def extract_cluster_keyphrases(cluster_docs, cluster_vectors, keyphrase_ngram_range=(1, 3), top_n=1,
+                               max_candidates=None):
+    """
+    Извлекает ключевые фразы сразу для всех кластеров, переиспользуя эмбеддинги постов.
+
+    Работает как KeyBERT, но без повторного кодирования документов: вектором документа служит
+    центроид эмбеддингов постов кластера. Кандидатные n-граммы всех кластеров дедуплицируются
+    и кодируются одним пакетным вызовом модели, а ранжируются по косинусной близости
+    к центроидам одним матричным умножением.
+
+    :param cluster_docs: Словарь {cluster_id: [предобработанные тексты]}.
+    :param cluster_vectors: Словарь {cluster_id: массив эмбеддингов постов кластера}.
+    :param keyphrase_ngram_range: Диапазон n-грамм кандидатов.
+    :param top_n: Число ключевых фраз на кластер.
+    :param max_candidates: Максимальное число кандидатов на кластер (самые частые n-граммы) или None.
+    :return: Словарь {cluster_id: [(фраза, оценка)]}.
+    """
+    cluster_candidates = {}
+    for cluster_id, docs in cluster_docs.items():
+        vectors = cluster_vectors.get(cluster_id)
+        if not docs or vectors is None or len(vectors) == 0:
+            continue
+        try:
+            from sklearn.feature_extraction.text import CountVectorizer
+            vectorizer = CountVectorizer(ngram_range=keyphrase_ngram_range, stop_words='english')
+            counts = vectorizer.fit_transform([" ".join(docs)])
+        except ValueError:
+            continue  # в кластере только стоп-слова
+        candidates = vectorizer.get_feature_names_out()
+        if max_candidates is not None and len(candidates) > max_candidates:
+            top = np.argsort(-counts.toarray()[0], kind="stable")[:max_candidates]
+            candidates = candidates[np.sort(top)]
+        cluster_candidates[cluster_id] = candidates
+    if not cluster_candidates:
+        return {}
+
+    vocabulary = sorted(set().union(*(set(c) for c in cluster_candidates.values())))
+    phrase_index = {phrase: i for i, phrase in enumerate(vocabulary)}
+    # Фразы кодируются тем же бэкендом, что и посты, чтобы векторы были в одном пространстве
+    model = model_registry.get_embedding_backend()
+    phrase_vectors = _l2_normalize(model.encode(vocabulary))
+
+    cluster_ids = list(cluster_candidates.keys())
+    centroids = np.vstack([np.asarray(cluster_vectors[cid], dtype=np.float32).mean(axis=0) for cid in cluster_ids])
+    similarities = phrase_vectors @ _l2_normalize(centroids).T  # (число фраз, число кластеров)
+
+    keyphrases = {}
+    for column, cluster_id in enumerate(cluster_ids):
+        rows = np.fromiter((phrase_index[p] for p in cluster_candidates[cluster_id]), dtype=np.intp)
+        scores = similarities[rows, column]
+        best = np.argsort(-scores, kind="stable")[:top_n]
+        keyphrases[cluster_id] = [(vocabulary[rows[i]], round(float(scores[i]), 4)) for i in best]
+    return keyphrases
+
+def _l2_normalize(vectors):
+    """
+    Нормирует строки матрицы по L2 (нулевые строки остаются нулевыми).
+    """
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def group_embeddings_by_cluster(labels, embeddings):
+    """
+    Группирует эмбеддинги по меткам кластеров в том же порядке, что и group_posts_by_cluster.
+
+    :param labels: Массив меток кластеров.
+    :param embeddings: Массив эмбеддингов формы (n, dim).
+    :return: Словарь {cluster_id: массив эмбеддингов постов кластера}.
+    """
+    return {cid: embeddings[rows] for cid, rows in group_indices_by_label(labels).items()}
+
+def build_cluster_docs(clusters):
+    """
+    Формирует очищенные тексты постов для каждого кластера.
+
+    :param clusters: Словарь кластеров вида {cluster_id: [posts]}.
+    :return: Словарь {cluster_id: [очищенные тексты]} (пустые тексты пропускаются).
+    """
+    cluster_docs = {}
+    for cluster_id, posts in clusters.items():
+        docs = []
+        for post in posts:
+            cleaned = normalize_post(post).clean
+            if cleaned:
+                docs.append(cleaned)
+        cluster_docs[cluster_id] = docs
+    return cluster_docs
+
+@traced(items_arg=0)
+def rank_cluster_terms(cluster_docs, stop_words=None, top_n=10):
+    """
+    Ранжирует термины каждого кластера по TF-IDF, обученному один раз на всей ленте.
+
+    Все документы векторизуются одним TfidfVectorizer, поэтому IDF сопоставим между кластерами.
+    Средние оценки терминов по кластерам вычисляются разом: умножением разреженной матрицы
+    принадлежности (кластер × документ, веса 1/размер кластера) на матрицу TF-IDF.
+
+    :param cluster_docs: Словарь {cluster_id: [очищенные тексты]}.
+    :param stop_words: Список стоп-слов для векторизатора.
+    :param top_n: Число терминов на кластер.
+    :return: Словарь {cluster_id: [(термин, средняя оценка)]}, отсортированный по убыванию оценки.
+    """
+    cluster_ids = [cid for cid, docs in cluster_docs.items() if docs]
+    docs, labels = [], []
+    for column, cluster_id in enumerate(cluster_ids):
+        docs.extend(cluster_docs[cluster_id])
+        labels.extend([column] * len(cluster_docs[cluster_id]))
+    if not docs:
+        return {}
+    import scipy.sparse
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    vectorizer = TfidfVectorizer(stop_words=stop_words)
+    try:
+        X = vectorizer.fit_transform(docs)
+    except ValueError as e:
+        print(f"TF-IDF error: {e}")
+        return {}
+    feature_names = vectorizer.get_feature_names_out()
+
+    labels = np.asarray(labels)
+    sizes = np.bincount(labels, minlength=len(cluster_ids))
+    membership = scipy.sparse.csr_matrix(
+        (1.0 / sizes[labels], (labels, np.arange(len(docs)))),
+        shape=(len(cluster_ids), len(docs))
+    )
+    means = (membership @ X).tocsr()
+    means.sort_indices()
+
+    cluster_terms = {}
+    for row, cluster_id in enumerate(cluster_ids):
+        start, end = means.indptr[row], means.indptr[row + 1]
+        scores = means.data[start:end]
+        best = np.argsort(-scores, kind="stable")[:top_n]
+        cluster_terms[cluster_id] = [
+            (feature_names[means.indices[start + i]], round(float(scores[i]), 4)) for i in best
+        ]
+    return cluster_terms
+
+@traced(items_arg=0)
+def improved_hybrid_generate_cluster_names(clusters, progress_callback=None, cluster_vectors=None,
+                                           cluster_terms=None):
     """
     Генерирует осмысленные названия кластеров с использованием гибридного подхода.
     
     Для каждого кластера:
       1. Объединяются все тексты (заголовки и selftext) постов.
-      2. Применяется TF-IDF для выбора слова с наивысшей средней оценкой.
-      3. Применяется RAKE для извлечения ключевых фраз.
-      4. Если RAKE возвращает фразу, состоящую минимум из двух слов, она используется как название;
-         иначе берется слово из TF-IDF.
+      2. Применяется TF-IDF, обученный на всей ленте (rank_cluster_terms), для выбора слова
+         с наивысшей средней оценкой в кластере.
+      3. Применяется KeyBERT для извлечения ключевых фраз. Если переданы эмбеддинги постов,
+         фразы для всех кластеров извлекаются одним пакетом (extract_cluster_keyphrases).
+      4. Если KeyBERT возвращает фразу, состоящую минимум из двух слов, она используется как название;
+         иначе берется лучшая фраза RAKE из двух-четырёх слов, а если её нет — слово из TF-IDF.
       5. Если кандидатное название не найдено, возвращается "Кластер X".
     
     :param clusters: Словарь кластеров вида {cluster_id: [posts]}.
+    :param progress_callback: Необязательная функция callback(done, total), вызываемая после каждого кластера.
+    :param cluster_vectors: Необязательный словарь {cluster_id: эмбеддинги постов кластера}.
+    :param cluster_terms: Необязательные заранее вычисленные термины (результат rank_cluster_terms).
     :return: Словарь названий кластеров вида {cluster_id: "Название"}.
     """
-    combined_stopwords = get_combined_stopwords()
+    cluster_docs = build_cluster_docs(clusters)
+    stop_words = as_stopword_set(get_combined_stopwords())
+
+    if cluster_terms is None:
+        cluster_terms = rank_cluster_terms(cluster_docs, stop_words=list(stop_words))
+
+    keyphrases = None
+    if cluster_vectors is not None:
+        keyphrases = extract_cluster_keyphrases(cluster_docs, cluster_vectors)
+
     cluster_names = {}
-    for cluster_id, posts in clusters.items():
-        docs = []
-        for post in posts:
-            combined = (post.get('title', '') + " " + post.get('selftext', '')).strip()
-            cleaned = clean_text(combined)
-            if cleaned:
-                docs.append(cleaned)
+    total = len(clusters)
+    for done, (cluster_id, docs) in enumerate(cluster_docs.items(), start=1):
         if not docs:
             cluster_names[cluster_id] = f"Кластер {cluster_id}"
+            if progress_callback:
+                progress_callback(done, total)
             continue
 
-        # TF-IDF часть
+        # TF-IDF часть: лучшее слово кластера по общему для всей ленты TF-IDF
         tfidf_word = None
-        try:
-            vectorizer = TfidfVectorizer(stop_words=combined_stopwords)
-            X = vectorizer.fit_transform(docs)
-            feature_names = vectorizer.get_feature_names_out()
-            avg_scores = X.mean(axis=0).A1
-            if len(avg_scores) > 0:
-                best_idx = avg_scores.argmax()
-                candidate = feature_names[best_idx]
-                if len(candidate) >= 3:
-                    tfidf_word = candidate
-        except Exception as e:
-            print(f"TF-IDF error in cluster {cluster_id}: {e}")
+        terms = cluster_terms.get(cluster_id)
+        if terms and len(terms[0][0]) >= 3:
+            tfidf_word = terms[0][0]
 
         # KeyBERT часть
-        keybert_phrase = generate_cluster_name_keybert(docs)
+        if keyphrases is not None:
+            phrases = keyphrases.get(cluster_id)
+            keybert_phrase = phrases[0][0] if phrases else None
+        else:
+            keybert_phrase = generate_cluster_name_keybert(docs)
         # Выбор: отдаем приоритет KeyBERT-фразе, если она состоит из 2 и более слов,
-        # иначе берем TF-IDF слово.
+        # затем фразе RAKE, иначе берем TF-IDF слово.
+        rake_phrase = None
+        if not (keybert_phrase and len(keybert_phrase.split()) > 1):
+            rake_phrase = _rake_name_phrase(docs, stop_words)
         if keybert_phrase and len(keybert_phrase.split()) > 1:
             chosen = keybert_phrase
+        elif rake_phrase:
+            chosen = rake_phrase
         elif tfidf_word:
             chosen = tfidf_word
         else:
             chosen = f"Кластер {cluster_id}"
         cluster_names[cluster_id] = chosen.title()
+        if progress_callback:
+            progress_callback(done, total)
     return cluster_names
 
 
-def remove_markdown_links(text):
+def _rake_name_phrase(docs, stop_words):
     """
-    Преобразует Markdown-ссылки вида [текст](url) в простой текст, оставляя только отображаемый текст.
-    
-    :param text: Исходный текст с Markdown-ссылками.
-    :return: Текст без Markdown-ссылок.
+    Возвращает лучшую фразу RAKE кластера длиной RAKE_NAME_WORDS слов или None.
+
+    :param docs: Очищенные тексты постов кластера (каждый пост — отдельное «предложение»).
+    :param stop_words: frozenset стоп-слов.
     """
-    return re.sub(r'\[(.*?)\]\(.*?\)', r'\1', text)
+    shortest, longest = RAKE_NAME_WORDS
+    for phrase, _ in extract_phrases_rake("\n".join(docs), stop_words):
+        if shortest <= len(phrase.split()) <= longest:
+            return phrase
+    return None
 
 def summarize_post(post, max_length=200):
     """
@@ -248,9 +631,7 @@ def summarize_post(post, max_length=200):
     :param max_length: Максимальное число символов для содержания.
     :return: Краткое содержание поста.
     """
-    text = post.get('selftext') or post.get('title', '')
-    text = re.sub(r'\*+', '', text)
-    text = remove_markdown_links(text)
+    text = strip_markdown(post.get('selftext') or post.get('title', ''))
     if len(text) <= max_length:
         return text.strip()
     cutoff = text.rfind(' ', 0, max_length)
@@ -259,35 +640,269 @@ def summarize_post(post, max_length=200):
     summary = text[:cutoff].rstrip() + "..."
     return summary
 
-def cluster_posts_advanced(posts, min_cluster_size=3, metric='euclidean'):
+def build_post_texts(posts):
+    """
+    Формирует тексты для эмбеддингов: заголовок и selftext каждого поста.
+
+    :param posts: Список постов.
+    :return: Список текстов (для пустых постов — "empty").
+    """
+    texts = []
+    for post in posts:
+        combined = normalize_post(post).combined
+        texts.append(combined if combined else "empty")
+    return texts
+
+def create_streaming_encoder(embedding_cache=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Создаёт StreamingEncoder поверх общего бэкенда эмбеддингов.
+
+    :param embedding_cache: Экземпляр EmbeddingCache или None.
+    :param chunk_size: Число постов в порции.
+    :return: Экземпляр StreamingEncoder.
+    """
+    model = model_registry.get_embedding_backend()
+
+    def encode(batch):
+        tracer.add("encoded", len(batch))
+        return model.encode(batch, batch_size=len(batch))
+
+    return StreamingEncoder(encode, build_post_texts, chunk_size=chunk_size, embedding_cache=embedding_cache)
+
+def _report_cache(embedding_cache, before):
+    stats = embedding_cache.stats()
+    tracer.add("cache_hits", stats['hits'] - before['hits'])
+    tracer.add("cache_misses", stats['misses'] - before['misses'])
+    print(f"Кэш эмбеддингов: {stats['hits']} попаданий, {stats['misses']} промахов "
+          f"(доля попаданий {stats['hit_rate']:.0%}).")
+
+@traced(items_arg=0)
+def embed_posts(posts, embedding_cache=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Вычисляет эмбеддинги постов общим бэкендом эмбеддингов (см. ModelRegistry.get_embedding_backend).
+
+    Посты кодируются порциями по chunk_size (тексты внутри порции упорядочены по длине),
+    результат пишется в заранее выделенный массив. Если передан кэш эмбеддингов,
+    кодируются только новые или изменённые посты, остальные читаются из кэша.
+
+    :param posts: Список постов.
+    :param embedding_cache: Экземпляр EmbeddingCache или None.
+    :param chunk_size: Число постов в порции.
+    :return: Массив эмбеддингов формы (len(posts), dim).
+    """
+    encoder = create_streaming_encoder(embedding_cache, chunk_size)
+    before = embedding_cache.stats() if embedding_cache is not None else None
+    _, embeddings = encoder.encode(posts, keep_posts=False)
+    if embedding_cache is not None:
+        _report_cache(embedding_cache, before)
+    return embeddings
+
+@traced()
+def embed_post_stream(posts, embedding_cache=None, chunk_size=DEFAULT_CHUNK_SIZE, count=None, path=None):
+    """
+    Вычисляет эмбеддинги постов из генератора, не держа в памяти больше одной порции текстов.
+
+    :param posts: Итерируемый источник постов (например, генератор страниц, развёрнутый в посты).
+    :param embedding_cache: Экземпляр EmbeddingCache или None.
+    :param chunk_size: Число постов в порции.
+    :param count: Ожидаемое число постов (результат выделяется один раз) или None.
+    :param path: Путь к файлу memmap для эмбеддингов или None — массив в памяти.
+    :return: Кортеж (posts, embeddings) — список прочитанных постов и массив float32 (n, dim).
+    """
+    encoder = create_streaming_encoder(embedding_cache, chunk_size)
+    before = embedding_cache.stats() if embedding_cache is not None else None
+    posts, embeddings = encoder.encode(posts, count=count, path=path)
+    span = tracer.current()
+    if span is not None:
+        span.set(items=len(posts))
+    if embedding_cache is not None:
+        _report_cache(embedding_cache, before)
+    return posts, embeddings
+
+@traced(items_arg=0)
+def cluster_posts_advanced(posts, min_cluster_size=3, metric='euclidean', embedding_cache=None,
+                           incremental_clusterer=None, reducer=None, collapse_duplicates=False):
     """
     Продвинутая кластеризация постов с использованием эмбеддингов от SentenceTransformer
     и алгоритма HDBSCAN.
     
     Для каждого поста объединяются заголовок и selftext, затем с помощью модели SentenceTransformer
-    генерируются эмбеддинги. Кластеризация выполняется алгоритмом HDBSCAN с параметрами, заданными пользователем.
+    генерируются эмбеддинги (с учётом кэша, если он передан). Кластеризация выполняется алгоритмом
+    HDBSCAN с параметрами, заданными пользователем.
     В результате каждому посту присваивается метка кластера (значение -1 означает, что пост признан шумом).
     
     :param posts: Список постов.
     :param min_cluster_size: Минимальный размер кластера, используемый HDBSCAN (по умолчанию 3).
     :param metric: Метрика для расчёта расстояний (по умолчанию 'euclidean').
-    :return: Кортеж (posts, labels), где posts — обновлённый список с метками кластеров, а labels — массив меток.
+    :param embedding_cache: Кэш эмбеддингов (EmbeddingCache) или None.
+    :param incremental_clusterer: IncrementalClusterer для инкрементальной кластеризации или None.
+        Если он передан, параметры min_cluster_size, metric и проекция берутся из него.
+    :param reducer: EmbeddingReducer для понижения размерности перед HDBSCAN или None.
+    :param collapse_duplicates: Схлопнуть почти одинаковые посты и кросспосты до эмбеддинга
+        (дубликаты прикрепляются к представителю в поле "duplicates" и не кластеризуются отдельно).
+        По умолчанию выключено: posts и labels соответствуют входному списку один к одному.
+    :return: Кортеж (posts, labels), где posts — обновлённый список с метками кластеров
+        (при collapse_duplicates — только представители групп), а labels — массив меток.
     """
-    texts = []
-    for post in posts:
-        combined = (post.get('title', '') + " " + post.get('selftext', '')).strip()
-        texts.append(combined if combined else "empty")
-    
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    embeddings = model.encode(texts, convert_to_tensor=True)
-    
-    clusterer = hdbscan.HDBSCAN(min_cluster_size=min_cluster_size, metric=metric)
-    labels = clusterer.fit_predict(embeddings.cpu().numpy())
+    if collapse_duplicates:
+        posts = collapse_near_duplicates(posts)
+    embeddings = embed_posts(posts, embedding_cache)
+    if incremental_clusterer is not None:
+        labels = incremental_clusterer.update(posts, embeddings)
+    else:
+        labels = cluster_embeddings(embeddings, min_cluster_size=min_cluster_size, metric=metric, reducer=reducer)
     
     for i, post in enumerate(posts):
         post['cluster'] = int(labels[i])
     return posts, labels
 
+@traced(items_arg=0)
+def cluster_embeddings(embeddings, min_cluster_size=3, metric='euclidean', reducer=None):
+    """
+    Кластеризует готовые эмбеддинги алгоритмом HDBSCAN.
+
+    :param embeddings: Массив эмбеддингов формы (n, dim).
+    :param min_cluster_size: Минимальный размер кластера.
+    :param metric: Метрика для расчёта расстояний.
+    :param reducer: EmbeddingReducer или None. Проекция обучается при первом вызове
+        и переиспользуется при следующих.
+    :return: Массив меток кластеров (-1 — шум).
+    """
+    import hdbscan
+    if reducer is not None:
+        embeddings = reducer.reduce(embeddings)
+    clusterer = hdbscan.HDBSCAN(min_cluster_size=min_cluster_size, metric=metric)
+    return clusterer.fit_predict(embeddings)
+
+class IncrementalClusterer:
+    """
+    Инкрементальная кластеризация постов между обновлениями ленты.
+
+    Хранит обученную модель HDBSCAN (с prediction_data=True) и метки уже известных постов.
+    При обновлении известные посты сохраняют свои метки, а новые назначаются в существующие
+    кластеры через hdbscan.approximate_predict, поэтому стоимость обновления пропорциональна
+    числу новых постов. Полное переобучение выполняется, если доля новых и шумовых постов
+    превышает порог или с момента последнего обучения прошло больше refit_interval секунд.
+    Если задан reducer, HDBSCAN работает в пространстве пониженной размерности; проекция
+    обучается только вместе с полным переобучением, а новые посты лишь проецируются.
+    """
+    def __init__(self, min_cluster_size=3, metric='euclidean', refit_threshold=0.3, refit_interval=3600,
+                 reducer=None):
+        """
+        :param min_cluster_size: Минимальный размер кластера HDBSCAN.
+        :param metric: Метрика для расчёта расстояний.
+        :param refit_threshold: Доля новых и шумовых постов, при превышении которой модель переобучается.
+        :param refit_interval: Максимальный интервал между полными переобучениями, в секундах.
+        :param reducer: EmbeddingReducer для понижения размерности или None.
+        """
+        self.min_cluster_size = min_cluster_size
+        self.reducer = reducer
+        self.metric = metric
+        self.refit_threshold = refit_threshold
+        self.refit_interval = refit_interval
+        self.clusterer = None
+        self.fitted_at = None
+        self.labels_by_key = {}
+        self.last_update = {}
+        self._lock = threading.Lock()
+
+    def configure(self, min_cluster_size=None, reduction=None):
+        """
+        Меняет параметры кластеризации; при изменении следующее обновление выполнит полное обучение.
+
+        :param min_cluster_size: Новый минимальный размер кластера или None (без изменений).
+        :param reduction: Метод понижения размерности ("none", "pca", "svd", "umap") или None (без изменений).
+        """
+        with self._lock:
+            if min_cluster_size is not None and min_cluster_size != self.min_cluster_size:
+                self.min_cluster_size = min_cluster_size
+                self.clusterer = None
+            current = self.reducer.method if self.reducer is not None else "none"
+            if reduction is not None and reduction != current:
+                self.reducer = create_reducer(reduction)
+                self.clusterer = None
+
+    def needs_refit(self, new_count, noise_count, total, removed_count=0):
+        """
+        Решает, нужно ли полное переобучение модели.
+
+        :param new_count: Число новых постов.
+        :param noise_count: Число известных постов, помеченных как шум.
+        :param total: Общее число постов.
+        :param removed_count: Число постов, выпавших с прошлого обновления (например, из временного окна).
+        :return: True, если нужно переобучение.
+        """
+        if self.clusterer is None or total == 0:
+            return True
+        if self.refit_interval is not None and time.time() - self.fitted_at > self.refit_interval:
+            return True
+        return (new_count + noise_count + removed_count) / total > self.refit_threshold
+
+    def fit(self, posts, embeddings):
+        """
+        Полностью обучает HDBSCAN на всех постах.
+
+        :param posts: Список постов.
+        :param embeddings: Массив эмбеддингов формы (len(posts), dim).
+        :return: Массив меток кластеров.
+        """
+        with self._lock:
+            return self._fit(posts, embeddings)
+
+    def _fit(self, posts, embeddings):
+        import hdbscan
+        if self.reducer is not None:
+            embeddings = self.reducer.fit_transform(embeddings)
+        self.clusterer = hdbscan.HDBSCAN(min_cluster_size=self.min_cluster_size, metric=self.metric,
+                                         prediction_data=True)
+        labels = self.clusterer.fit_predict(embeddings)
+        self.fitted_at = time.time()
+        self.labels_by_key = {post_key(post): int(label) for post, label in zip(posts, labels)}
+        self.last_update = {"mode": "refit", "total": len(posts), "new": len(posts)}
+        return labels
+
+    @traced("IncrementalClusterer.update", items_arg=1)
+    def update(self, posts, embeddings):
+        """
+        Назначает метки текущим постам, переобучая модель только при необходимости.
+
+        :param posts: Текущий список постов.
+        :param embeddings: Массив эмбеддингов формы (len(posts), dim).
+        :return: Массив меток кластеров.
+        """
+        with self._lock:
+            keys = [post_key(post) for post in posts]
+            new_positions = [i for i, key in enumerate(keys) if key not in self.labels_by_key]
+            noise_count = sum(1 for key in keys if self.labels_by_key.get(key) == -1)
+            removed_count = len(self.labels_by_key) - (len(keys) - len(new_positions))
+            stale_projection = self.reducer is not None and not self.reducer.is_fitted(embeddings.shape[1])
+            if stale_projection or self.needs_refit(len(new_positions), noise_count, len(posts), removed_count):
+                return self._fit(posts, embeddings)
+
+            labels = np.array([self.labels_by_key.get(key, -1) for key in keys], dtype=int)
+            if new_positions:
+                import hdbscan
+                new_embeddings = embeddings[new_positions]
+                if self.reducer is not None:
+                    new_embeddings = self.reducer.transform(new_embeddings)
+                new_labels, _ = hdbscan.approximate_predict(self.clusterer, new_embeddings)
+                labels[new_positions] = new_labels
+            # Посты, выпавшие из ленты, больше не учитываются
+            self.labels_by_key = {key: int(label) for key, label in zip(keys, labels)}
+            self.last_update = {"mode": "incremental", "total": len(posts), "new": len(new_positions)}
+            return labels
+
+def group_posts_by_cluster(posts):
+    """
+    Группирует посты по полю 'cluster'. Для меток, уже лежащих в массиве,
+    удобнее PostTable(posts, labels).clusters() — без записи метки в каждый пост.
+
+    :param posts: Список постов с проставленными метками кластеров.
+    :return: Словарь вида {cluster_id: PostView} (последовательность постов кластера в порядке ленты).
+    """
+    return PostTable(posts, [post['cluster'] for post in posts]).clusters()
+
+@traced(items_arg=0)
 def cluster_posts(posts, n_clusters=5):
     """
     Выполняет кластеризацию постов с использованием TF-IDF и алгоритма KMeans.
@@ -301,6 +916,8 @@ def cluster_posts(posts, n_clusters=5):
     :return: Кортеж (posts, labels), где labels — метки кластеров для каждого поста.
     :raises ValueError: Если тексты пустые или векторизатор не сформировал словарь.
     """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.cluster import KMeans
     texts = preprocess_posts(posts)
     if all(not t.strip() for t in texts):
         raise ValueError("Все документы пустые после предобработки.")
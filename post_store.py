@@ -0,0 +1,192 @@
+"""
+post_store.py
+
+Локальное хранилище постов на SQLite (режим WAL). Посты сохраняются с дедупликацией
+по permalink; при повторной загрузке запись обновляется, а изменённое содержимое
+распознаётся по хэшу заголовка и selftext. Записи старше TTL удаляются.
+Хранилище позволяет кластеризовать последние посты без сети и отличать действительно
+новые посты от уже известных.
+"""
+
+import sqlite3
+import threading
+import time
+
+from embedding_cache import content_hash
+from post_table import Post
+
+POST_STORE_FILE = "posts.db"
+DEFAULT_TTL_SECONDS = 3 * 24 * 3600
+
+# Поля поста, которые сохраняются в хранилище
+POST_FIELDS = ("permalink", "id", "title", "selftext", "url", "thumbnail", "created")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    permalink    TEXT PRIMARY KEY,
+    id           TEXT,
+    title        TEXT NOT NULL,
+    selftext     TEXT NOT NULL,
+    url          TEXT,
+    thumbnail    TEXT,
+    created      REAL,
+    content_hash TEXT NOT NULL,
+    fetched_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posts_id ON posts (id);
+CREATE INDEX IF NOT EXISTS posts_created ON posts (created);
+CREATE INDEX IF NOT EXISTS posts_fetched_at ON posts (fetched_at);
+"""
+
+class PostStore:
+    """
+    Хранилище постов на SQLite.
+
+    Одно соединение используется из нескольких потоков под блокировкой;
+    режим WAL позволяет читать базу, пока идёт запись.
+    """
+    def __init__(self, path=POST_STORE_FILE, ttl_seconds=DEFAULT_TTL_SECONDS):
+        """
+        :param path: Путь к файлу базы данных (":memory:" — база в памяти).
+        :param ttl_seconds: Время жизни записи с момента последней загрузки; None — без ограничения.
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def upsert_posts(self, posts):
+        """
+        Сохраняет посты, обновляя уже известные.
+
+        :param posts: Список постов.
+        :return: Список постов, которых не было в хранилище или у которых изменилось содержимое.
+        """
+        posts = [post for post in posts if post.get("permalink")]
+        if not posts:
+            return []
+        now = time.time()
+        rows = []
+        for post in posts:
+            rows.append((
+                post.get("permalink"), post.get("id"), post.get("title", "") or "",
+                post.get("selftext", "") or "", post.get("url"), post.get("thumbnail"),
+                post.get("created"), content_hash(post), now
+            ))
+        permalinks = [row[0] for row in rows]
+        with self._lock:
+            known = self._known_hashes(permalinks)
+            self._conn.executemany(
+                """
+                INSERT INTO posts (permalink, id, title, selftext, url, thumbnail, created, content_hash, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(permalink) DO UPDATE SET
+                    id = excluded.id, title = excluded.title, selftext = excluded.selftext,
+                    url = excluded.url, thumbnail = excluded.thumbnail, created = excluded.created,
+                    content_hash = excluded.content_hash, fetched_at = excluded.fetched_at
+                """,
+                rows
+            )
+            self._conn.commit()
+        return [post for post, row in zip(posts, rows) if known.get(row[0]) != row[7]]
+
+    def _known_hashes(self, permalinks):
+        known = {}
+        # SQLite ограничивает число параметров запроса, поэтому читаем частями
+        for start in range(0, len(permalinks), 500):
+            chunk = permalinks[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for row in self._conn.execute(
+                f"SELECT permalink, content_hash FROM posts WHERE permalink IN ({placeholders})", chunk
+            ):
+                known[row["permalink"]] = row["content_hash"]
+        return known
+
+    def get(self, permalink):
+        """
+        Возвращает пост по permalink или None.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM posts WHERE permalink = ?", (permalink,)).fetchone()
+        return _row_to_post(row) if row else None
+
+    def get_by_id(self, post_id):
+        """
+        Возвращает пост по идентификатору Reddit или None.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM posts WHERE id = ?", (post_id,)).fetchone()
+        return _row_to_post(row) if row else None
+
+    def get_range(self, start=None, end=None, limit=None):
+        """
+        Возвращает посты, созданные в интервале [start, end), от новых к старым.
+
+        :param start: Нижняя граница created (Unix time) или None.
+        :param end: Верхняя граница created (Unix time) или None.
+        :param limit: Максимальное число постов или None.
+        :return: Список постов.
+        """
+        query = "SELECT * FROM posts WHERE 1 = 1"
+        params = []
+        if start is not None:
+            query += " AND created >= ?"
+            params.append(start)
+        if end is not None:
+            query += " AND created < ?"
+            params.append(end)
+        query += " ORDER BY created DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [_row_to_post(row) for row in rows]
+
+    def recent_posts(self, limit=None):
+        """
+        Возвращает последние загруженные посты (например, для работы без сети).
+
+        :param limit: Максимальное число постов или None.
+        :return: Список постов в порядке последней загрузки.
+        """
+        query = "SELECT * FROM posts ORDER BY fetched_at DESC, rowid ASC"
+        params = []
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [_row_to_post(row) for row in rows]
+
+    def purge_expired(self, now=None):
+        """
+        Удаляет записи, загруженные раньше, чем TTL назад.
+
+        :param now: Текущее время (Unix time) или None.
+        :return: Число удалённых записей.
+        """
+        if self.ttl_seconds is None:
+            return 0
+        cutoff = (now if now is not None else time.time()) - self.ttl_seconds
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM posts WHERE fetched_at < ?", (cutoff,))
+            self._conn.commit()
+        return cursor.rowcount
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+def _row_to_post(row):
+    return Post((field, row[field]) for field in POST_FIELDS)
@@ -0,0 +1,172 @@
+"""
+post_table.py
+
+Компактное представление постов для больших лент.
+
+Post — запись с __slots__ вместо словаря: поля поста хранятся в слотах фиксированного
+набора, а интерфейс словаря (post['title'], post.get(...), post[...] = ...) сохраняется,
+поэтому остальной код работает с записями так же, как со словарями. Редкие
+дополнительные ключи попадают в небольшой словарь _extra, который создаётся только при
+необходимости. Запись в несколько раз меньше словаря с теми же ключами и передаётся
+в модели Qt как объект Python, без преобразования в QVariantMap и обратно.
+
+PostTable — колоночное представление результата кластеризации: ссылки на посты
+(без копирования) и метки кластеров в массиве NumPy. Состав кластеров
+хранится массивами индексов, полученными одной сортировкой меток, а PostView позволяет
+представлениям читать посты кластера по индексам, не собирая отдельные списки
+и не записывая метку в каждый пост.
+"""
+
+from collections.abc import MutableMapping, Sequence
+import numpy as np
+
+from dedup import DUPLICATES_KEY
+from text_engine import NORMALIZED_KEY
+
+# Поля, для которых в записи есть слоты
+POST_FIELDS = ("id", "title", "selftext", "url", "permalink", "thumbnail", "created", "crosspost_parent",
+               "source", "cluster", DUPLICATES_KEY, NORMALIZED_KEY)
+_FIELD_SET = frozenset(POST_FIELDS)
+
+_MISSING = object()
+
+class Post(MutableMapping):
+    """
+    Пост с интерфейсом словаря и хранением полей в __slots__.
+    """
+    __slots__ = POST_FIELDS + ("_extra",)
+
+    def __init__(self, data=(), **fields):
+        for name in POST_FIELDS:
+            setattr(self, name, _MISSING)
+        self._extra = None
+        self.update(data, **fields)
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            if value is not _MISSING:
+                return value
+        elif self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            return default if value is _MISSING else value
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in _FIELD_SET and getattr(self, key) is not _MISSING:
+            setattr(self, key, _MISSING)
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        if key in _FIELD_SET:
+            return getattr(self, key) is not _MISSING
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self):
+        for name in POST_FIELDS:
+            if getattr(self, name) is not _MISSING:
+                yield name
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"Post({dict(self)!r})"
+
+    def __getstate__(self):
+        return dict(self)
+
+    def __setstate__(self, state):
+        self.__init__(state)
+
+def created_column(posts):
+    """
+    Возвращает время создания постов массивом float64 (NaN — время неизвестно).
+    """
+    return np.fromiter((post.get('created') or np.nan for post in posts), dtype=np.float64, count=len(posts))
+
+def group_indices_by_label(labels):
+    """
+    Группирует номера строк по меткам одной устойчивой сортировкой.
+
+    :param labels: Массив меток формы (n,).
+    :return: Словарь {метка: массив номеров строк в исходном порядке}; массивы — срезы
+        одного общего массива, без отдельных копий.
+    """
+    labels = np.asarray(labels)
+    if labels.size == 0:
+        return {}
+    order = np.argsort(labels, kind="stable")
+    unique, starts = np.unique(labels[order], return_index=True)
+    bounds = np.append(starts, len(order))
+    return {int(label): order[bounds[i]:bounds[i + 1]] for i, label in enumerate(unique)}
+
+class PostView(Sequence):
+    """
+    Представление части таблицы постов по массиву индексов (без копирования постов).
+    """
+    __slots__ = ("posts", "indices")
+
+    def __init__(self, posts, indices):
+        self.posts = posts
+        self.indices = indices
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return PostView(self.posts, self.indices[item])
+        return self.posts[self.indices[item]]
+
+    def __iter__(self):
+        posts = self.posts
+        for index in self.indices.tolist():
+            yield posts[index]
+
+class PostTable:
+    """
+    Колоночная таблица постов: ссылки на посты и массив меток кластеров.
+    """
+    __slots__ = ("posts", "labels")
+
+    def __init__(self, posts, labels=None):
+        """
+        :param posts: Список постов (таблица хранит ссылку на него).
+        :param labels: Метки кластеров или None (все посты — шум, -1).
+        """
+        self.posts = posts
+        if labels is None:
+            self.labels = np.full(len(posts), -1, dtype=np.int32)
+        else:
+            self.labels = np.asarray(labels, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.posts)
+
+    def clusters(self):
+        """
+        Возвращает {cluster_id: PostView} — замену словаря {cluster_id: [posts]} без копирования списков.
+        """
+        groups = group_indices_by_label(self.labels)
+        return {label: PostView(self.posts, indices) for label, indices in groups.items()}
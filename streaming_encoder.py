@@ -0,0 +1,190 @@
+"""
+streaming_encoder.py
+
+Потоковое вычисление эмбеддингов с ограниченным расходом памяти. Посты читаются из любого
+итерируемого источника (в том числе генератора страниц) порциями фиксированного размера;
+внутри порции тексты сортируются по длине, чтобы в пакетах модели было меньше дополнения,
+а результат пишется сразу в заранее выделенный массив float32 или в файл, отображённый
+в память (numpy.memmap). Одновременно в памяти находятся только тексты и эмбеддинги
+текущей порции, поэтому накладные расходы не растут с размером ленты: растёт лишь
+сам итоговый массив (или файл на диске).
+"""
+
+import itertools
+import os
+import numpy as np
+
+from tracing import tracer
+
+DEFAULT_CHUNK_SIZE = 256
+DEFAULT_BATCH_SIZE = 32
+
+# Начальная ёмкость буфера, если число постов заранее неизвестно
+INITIAL_CAPACITY = 1024
+
+class EmbeddingBuffer:
+    """
+    Растущий буфер эмбеддингов float32 в памяти или в файле memmap.
+
+    Ёмкость удваивается по мере заполнения: буфер в памяти переносится в новый массив,
+    файл memmap расширяется и отображается заново. Массивы не изменяются на месте
+    (ndarray.resize), поэтому ранее выданные представления не указывают на освобождённую память.
+    """
+    def __init__(self, capacity=None, path=None):
+        """
+        :param capacity: Ожидаемое число строк (если известно — буфер выделяется один раз).
+        :param path: Путь к файлу memmap или None — буфер в памяти.
+        """
+        self.capacity = capacity or INITIAL_CAPACITY
+        self.path = path
+        self.dim = None
+        self.size = 0
+        self._data = None
+
+    def _allocate(self, rows):
+        if self.path is None:
+            data = np.empty((rows, self.dim), dtype=np.float32)
+            if self._data is not None:
+                data[:self.size] = self._data[:self.size]
+            return data
+        if self._data is not None:
+            self._data.flush()
+            self._data = None
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        mode = "r+b" if os.path.exists(self.path) and self.size else "w+b"
+        with open(self.path, mode) as f:
+            f.truncate(rows * self.dim * 4)
+        return np.memmap(self.path, dtype=np.float32, mode="r+", shape=(rows, self.dim))
+
+    def reserve(self, rows):
+        """
+        Гарантирует место ещё под rows строк.
+        """
+        needed = self.size + rows
+        if self._data is not None and needed <= self.capacity:
+            return
+        while self.capacity < needed:
+            self.capacity *= 2
+        self._data = self._allocate(self.capacity)
+
+    def append_rows(self, rows, dim):
+        """
+        Резервирует rows строк в конце буфера и возвращает срез для записи.
+        Срез нужно заполнить до следующего добавления: при росте буфер переносится.
+
+        :param rows: Число строк.
+        :param dim: Размерность эмбеддингов (задаётся первой порцией).
+        :return: Представление (rows, dim), в которое нужно записать эмбеддинги.
+        """
+        if self.dim is None:
+            self.dim = dim
+        elif dim != self.dim:
+            raise ValueError(f"Размерность эмбеддингов изменилась: {self.dim} -> {dim}.")
+        self.reserve(rows)
+        view = self._data[self.size:self.size + rows]
+        self.size += rows
+        return view
+
+    def append(self, embeddings):
+        """
+        Копирует массив эмбеддингов в конец буфера.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if len(embeddings):
+            self.append_rows(len(embeddings), embeddings.shape[1])[:] = embeddings
+
+    def result(self):
+        """
+        Возвращает заполненную часть буфера формы (size, dim). Если буфер в памяти заполнен
+        не полностью, заполненная часть копируется в массив точного размера, чтобы результат
+        не удерживал лишнюю ёмкость.
+        """
+        if self._data is None:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        if self.path is not None:
+            self._data.flush()
+        elif self.size < self.capacity:
+            self._data = self._data[:self.size].copy()
+            self.capacity = self.size
+        return self._data[:self.size]
+
+def length_sorted_encode(encode_fn, texts, batch_size=DEFAULT_BATCH_SIZE, out=None):
+    """
+    Кодирует тексты пакетами в порядке возрастания длины и раскладывает результат
+    в исходном порядке.
+
+    :param encode_fn: Функция, принимающая список текстов и возвращающая массив эмбеддингов.
+    :param texts: Список текстов.
+    :param batch_size: Размер пакета модели.
+    :param out: Массив (len(texts), dim) для результата или None — массив создаётся.
+    :return: Массив float32 формы (len(texts), dim).
+    """
+    order = np.argsort(np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts)),
+                       kind="stable")
+    for start in range(0, len(texts), batch_size):
+        rows = order[start:start + batch_size]
+        embeddings = np.asarray(encode_fn([texts[i] for i in rows]), dtype=np.float32)
+        if out is None:
+            out = np.empty((len(texts), embeddings.shape[1]), dtype=np.float32)
+        out[rows] = embeddings
+    if out is None:
+        return np.empty((0, 0), dtype=np.float32)
+    return out
+
+class StreamingEncoder:
+    """
+    Вычисляет эмбеддинги потока постов порциями фиксированного размера.
+
+    :ivar encoded: Число закодированных моделью текстов (без попаданий в кэш).
+    """
+    def __init__(self, encode_fn, text_fn, chunk_size=DEFAULT_CHUNK_SIZE, batch_size=DEFAULT_BATCH_SIZE,
+                 embedding_cache=None):
+        """
+        :param encode_fn: Функция, принимающая список текстов и возвращающая массив эмбеддингов
+            (например, encode бэкенда эмбеддингов).
+        :param text_fn: Функция, строящая тексты для списка постов (news_processor.build_post_texts).
+        :param chunk_size: Число постов в порции.
+        :param batch_size: Размер пакета модели внутри порции.
+        :param embedding_cache: EmbeddingCache или None.
+        """
+        self.encode_fn = encode_fn
+        self.text_fn = text_fn
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.embedding_cache = embedding_cache
+        self.encoded = 0
+
+    def _encode_texts(self, texts):
+        self.encoded += len(texts)
+        return length_sorted_encode(self.encode_fn, texts, self.batch_size)
+
+    def encode(self, posts, count=None, path=None, keep_posts=True):
+        """
+        Кодирует посты из итерируемого источника.
+
+        :param posts: Список или генератор постов.
+        :param count: Ожидаемое число постов (для однократного выделения результата) или None;
+            для списков берётся len(posts).
+        :param path: Путь к файлу memmap для результата или None — массив в памяти.
+        :param keep_posts: Вернуть ли список прочитанных постов (False — только эмбеддинги).
+        :return: Кортеж (posts, embeddings): список постов (или None) и массив float32 (n, dim).
+        """
+        if count is None and hasattr(posts, "__len__"):
+            count = len(posts)
+        buffer = EmbeddingBuffer(capacity=count, path=path)
+        consumed = [] if keep_posts else None
+        iterator = iter(posts)
+        while True:
+            chunk = list(itertools.islice(iterator, self.chunk_size))
+            if not chunk:
+                break
+            texts = self.text_fn(chunk)
+            if self.embedding_cache is not None:
+                embeddings = self.embedding_cache.get_embeddings(chunk, texts, self._encode_texts)
+            else:
+                embeddings = self._encode_texts(texts)
+            buffer.append(embeddings)
+            tracer.add("chunks")
+            if keep_posts:
+                consumed.extend(chunk)
+        return consumed, buffer.result()
@@ -0,0 +1,32 @@
+from dedup import DUPLICATES_KEY, NearDuplicateIndex, collapse_near_duplicates, expand_groups
+
+def make_feed():
+    return [
+        {"id": "a1", "title": "Central bank raises interest rates again", "selftext": "", "url": "https://news.example/rates"},
+        {"id": "b1", "title": "New telescope images of a distant galaxy", "selftext": "", "url": "https://space.example/galaxy"},
+        {"id": "a2", "title": "Central bank raises interest rates again", "selftext": "", "url": "https://news.example/rates/"},
+        {"id": "a3", "title": "Rates up", "selftext": "", "url": "https://other.example/x", "crosspost_parent": "t3_a1"},
+    ]
+
+def duplicate_ids(posts):
+    return {post["id"]: [dup["id"] for dup in post.get(DUPLICATES_KEY, [])] for post in posts}
+
+def test_collapse_groups_duplicates():
+    unique = collapse_near_duplicates(make_feed())
+    assert duplicate_ids(unique) == {"a1": ["a2", "a3"], "b1": []}
+
+def test_collapse_same_posts_twice_is_stable():
+    # Повторное обновление передаёт те же объекты постов (переиспользованный хвост ленты)
+    feed = make_feed()
+    first = duplicate_ids(NearDuplicateIndex().collapse(feed))
+    second = duplicate_ids(NearDuplicateIndex().collapse(feed))
+    assert first == second == {"a1": ["a2", "a3"], "b1": []}
+
+def test_recollapse_representatives_keeps_groups():
+    # Перекластеризация без загрузки схлопывает представителей прошлого обновления
+    first = NearDuplicateIndex()
+    representatives = first.collapse(make_feed())
+    index = NearDuplicateIndex()
+    again = index.collapse(expand_groups(representatives))
+    assert duplicate_ids(again) == {"a1": ["a2", "a3"], "b1": []}
+    assert (index.checked, index.collapsed) == (first.checked, first.collapsed) == (4, 2)
@@ -0,0 +1,62 @@
+from benchmarks.fake_reddit import FakeReddit
+from delta_fetch import APPROX_LISTING_ITEM_BYTES, DeltaFetcher
+
+def fetch(fetcher, source, listing, limit, sort="hot"):
+    return [post["id"] for page in fetcher.iter_source(source, listing, limit=limit, sort=sort) for post in page]
+
+def listing_ids(listing, count):
+    return [item.id for item in listing.items[:count]]
+
+def test_stops_after_known_posts_and_reuses_tail():
+    reddit = FakeReddit(size=300)
+    listing = reddit.front.hot
+    fetcher = DeltaFetcher(stop_after_known=5)
+    assert fetch(fetcher, "front/hot", listing, 200) == listing_ids(listing, 200)
+
+    listing.advance(10)
+    requests = reddit.requests
+    assert fetch(fetcher, "front/hot", listing, 200) == listing_ids(listing, 200)
+    stats = fetcher.last_stats["front/hot"]
+    assert reddit.requests - requests == 1
+    assert stats["items_fetched"] == 15
+    assert stats["items_new"] == 10
+    assert stats["items_reused"] == 185
+    assert stats["pages_saved"] == 1
+    assert stats["bytes_saved_estimate"] == stats["pages_saved"] * fetcher.page_size * APPROX_LISTING_ITEM_BYTES
+
+def test_new_listing_uses_before_cursor():
+    reddit = FakeReddit(size=100)
+    listing = reddit.subreddit("python").new
+    fetcher = DeltaFetcher()
+    fetch(fetcher, "r/python/new", listing, 50, sort="new")
+
+    listing.advance(3)
+    assert fetch(fetcher, "r/python/new", listing, 50, sort="new") == listing_ids(listing, 50)
+    stats = fetcher.last_stats["r/python/new"]
+    assert stats["items_fetched"] == 3
+    assert stats["items_reused"] == 47
+
+def test_short_previous_result_is_not_reused():
+    reddit = FakeReddit(size=100)
+    listing = reddit.front.hot
+    fetcher = DeltaFetcher(stop_after_known=5)
+    fetch(fetcher, "front/hot", listing, 20)
+
+    # Прошлый результат короче нужной ленты: листинг читается целиком, хвост не переиспользуется
+    assert fetch(fetcher, "front/hot", listing, 50) == listing_ids(listing, 50)
+    stats = fetcher.last_stats["front/hot"]
+    assert stats["items_fetched"] == 50
+    assert stats["items_reused"] == 0
+
+def test_extend_source_continues_after_last_post():
+    reddit = FakeReddit(size=100)
+    listing = reddit.front.hot
+    fetcher = DeltaFetcher()
+    fetch(fetcher, "front/hot", listing, 30)
+
+    extra = [post["id"] for page in fetcher.extend_source("front/hot", listing, 20) for post in page]
+    assert extra == [item.id for item in listing.items[30:50]]
+    stats = fetcher.last_stats["front/hot"]
+    assert stats["items_new"] == 20
+    assert stats["items_reused"] == 30
+    assert len(fetcher.states["front/hot"].posts) == 50
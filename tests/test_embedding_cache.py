@@ -0,0 +1,35 @@
+import numpy as np
+
+from embedding_cache import EmbeddingCache
+
+DIM = 2
+
+def post(name, text):
+    return {"permalink": f"/r/test/{name}", "title": text, "selftext": ""}
+
+def encode(texts):
+    return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+def get(cache, posts):
+    return cache.get_embeddings(posts, [p["title"] for p in posts], encode)
+
+def test_mixed_batch_updates_existing_rows_when_new_rows_run_out(tmp_path):
+    # Ровно две строки: после A и B свободных строк нет
+    cache = EmbeddingCache(cache_dir=str(tmp_path), max_bytes=2 * DIM * 4)
+    get(cache, [post("a", "a"), post("b", "b")])
+
+    # C и D новые (строку получает только один из них, вытеснив B), A изменён и переиспользует свою строку
+    changed = post("a", "aaaa")
+    get(cache, [post("c", "c"), post("d", "d"), changed])
+
+    misses = cache.misses
+    result = get(cache, [changed])
+    assert cache.misses == misses
+    assert result[0][0] == 4.0
+    assert len(cache) == 2
+
+def test_repeated_key_in_one_batch_takes_one_row(tmp_path):
+    cache = EmbeddingCache(cache_dir=str(tmp_path))
+    get(cache, [post("a", "a"), post("a", "a"), post("b", "b")])
+    assert len(cache) == 2
+    assert cache.stats()["size_bytes"] // (DIM * 4) - len(cache._free_rows) == 2
@@ -0,0 +1,34 @@
+import numpy as np
+
+from time_window import PostWindow
+
+NOW = 1_000_000.0
+
+def post(name, age_hours, title="title"):
+    return {"permalink": f"/r/test/{name}", "title": title, "created": NOW - age_hours * 3600}
+
+def embeddings(count):
+    return np.ones((count, 4), dtype=np.float32)
+
+def test_merge_reports_stale_and_replaced_posts():
+    window = PostWindow(window_hours=24)
+    old_version = post("a", 1, title="old")
+    window.merge([old_version, post("b", 2)], embeddings(2), now=NOW)
+
+    new_version = post("a", 1, title="new")
+    stale = post("c", 48)
+    posts, matrix, evicted = window.merge([new_version, stale], embeddings(2), now=NOW)
+
+    assert [p["permalink"] for p in posts] == ["/r/test/b", "/r/test/a"]
+    assert posts[1] is new_version
+    assert matrix.shape == (2, 4)
+    assert any(p is stale for p in evicted)
+    assert any(p is old_version for p in evicted)
+    assert len(evicted) == 2
+
+def test_merge_same_objects_is_not_a_replacement():
+    window = PostWindow(window_hours=24)
+    posts = [post("a", 1), post("b", 2)]
+    window.merge(posts, embeddings(2), now=NOW)
+    _, _, evicted = window.merge(posts, embeddings(2), now=NOW)
+    assert evicted == []
@@ -0,0 +1,14 @@
+import pytest
+
+from tracing import Tracer
+
+pytest.importorskip("PyQt5")
+
+from gui.diagnostics_view import TraceBridge
+
+def test_trace_bridge_detach_removes_listener(tmp_path):
+    tracer = Tracer(log_dir=str(tmp_path))
+    bridge = TraceBridge(tracer)
+    assert len(tracer._listeners) == 1
+    bridge.detach()
+    assert tracer._listeners == []
@@ -0,0 +1,121 @@
+"""
+text_engine.py
+
+Движок нормализации текста постов. Все регулярные выражения компилируются один раз
+при импорте модуля. Текст каждого поста нормализуется за один проход, а результат
+(объединённый текст, очищенный текст и токены) кэшируется в самом посте под ключом
+NORMALIZED_KEY: эмбеддинги, кластеризация и генерация названий используют этот кэш
+и не повторяют очистку. Краткие содержания и RAKE используют те же предкомпилированные выражения.
+"""
+
+import re
+
+# Ключ, под которым нормализованные формы хранятся в словаре поста
+NORMALIZED_KEY = "_normalized"
+
+WHITESPACE_RE = re.compile(r'\s+')
+NON_ALNUM_RE = re.compile(r'[^a-zA-Zа-яА-Я0-9\s]+')
+SENTENCE_SPLIT_RE = re.compile(r'[.?!;\n]')
+MARKDOWN_LINK_RE = re.compile(r'\[(.*?)\]\(.*?\)')
+ASTERISKS_RE = re.compile(r'\*+')
+
+def clean_text(text):
+    """
+    Базовая очистка текста: схлопывает пробельные символы, удаляет всё, кроме букв и цифр,
+    и приводит строку к нижнему регистру.
+
+    :param text: Исходный текст.
+    :return: Очищенный текст.
+    """
+    text = WHITESPACE_RE.sub(' ', text)
+    text = NON_ALNUM_RE.sub('', text)
+    return text.lower().strip()
+
+class NormalizedText:
+    """
+    Нормализованные формы текста поста.
+
+    :ivar combined: Заголовок и selftext через пробел, без крайних пробелов.
+    :ivar clean: Очищенный текст (clean_text от combined).
+    :ivar tokens: Кортеж токенов очищенного текста.
+    """
+    __slots__ = ("source", "combined", "clean", "tokens")
+
+    def __init__(self, title, selftext):
+        self.source = (title, selftext)
+        self.combined = (title + " " + selftext).strip()
+        self.clean = clean_text(self.combined)
+        self.tokens = tuple(self.clean.split())
+
+def normalize_post(post):
+    """
+    Возвращает нормализованные формы текста поста, вычисляя их не более одного раза.
+
+    Кэш хранится в посте и сбрасывается автоматически, если заголовок или selftext изменились.
+
+    :param post: Словарь с данными поста.
+    :return: Экземпляр NormalizedText.
+    """
+    title = post.get('title', '') or ''
+    selftext = post.get('selftext', '') or ''
+    normalized = post.get(NORMALIZED_KEY)
+    if normalized is None or normalized.source != (title, selftext):
+        normalized = NormalizedText(title, selftext)
+        post[NORMALIZED_KEY] = normalized
+    return normalized
+
+def as_stopword_set(stop_words):
+    """
+    Приводит стоп-слова к frozenset для проверки принадлежности за O(1).
+
+    :param stop_words: Коллекция стоп-слов.
+    :return: frozenset стоп-слов (или исходное множество, если это уже set/frozenset).
+    """
+    if isinstance(stop_words, (set, frozenset)):
+        return stop_words
+    return frozenset(stop_words)
+
+def extract_phrases_rake(text, stop_words):
+    """
+    Простейшая реализация алгоритма RAKE для извлечения ключевых фраз.
+
+    Делит текст на предложения, формирует кандидатные фразы, исключая стоп-слова,
+    и оценивает каждую фразу по сумме длин слов в ней.
+
+    :param text: Исходный текст.
+    :param stop_words: Коллекция стоп-слов (список преобразуется в frozenset один раз за вызов).
+    :return: Список кортежей (фраза, оценка), отсортированных по убыванию оценки.
+    """
+    stop_words = as_stopword_set(stop_words)
+    phrase_scores = []
+    for sentence in SENTENCE_SPLIT_RE.split(text):
+        phrase = []
+        for word in sentence.split():
+            if word in stop_words:
+                if phrase:
+                    phrase_scores.append((" ".join(phrase), sum(len(w) for w in phrase)))
+                    phrase = []
+            else:
+                phrase.append(word)
+        if phrase:
+            phrase_scores.append((" ".join(phrase), sum(len(w) for w in phrase)))
+    phrase_scores.sort(key=lambda x: x[1], reverse=True)
+    return phrase_scores
+
+def remove_markdown_links(text):
+    """
+    Преобразует Markdown-ссылки вида [текст](url) в простой текст.
+
+    :param text: Исходный текст с Markdown-ссылками.
+    :return: Текст без Markdown-ссылок.
+    """
+    return MARKDOWN_LINK_RE.sub(r'\1', text)
+
+def strip_markdown(text):
+    """
+    Удаляет звёздочки форматирования Markdown и преобразует ссылки в простой текст.
+
+    :param text: Исходный текст.
+    :return: Текст без артефактов Markdown.
+    """
+    return MARKDOWN_LINK_RE.sub(r'\1', ASTERISKS_RE.sub('', text))
@@ -0,0 +1,127 @@
+"""
+time_window.py
+
+Скользящее временное окно постов для долгих сессий. Окно накапливает посты всех обновлений
+вместе с их эмбеддингами и хранит только посты, созданные (поле created, created_utc Reddit)
+за последние window_hours часов. Посты старше окна вытесняются вместе с эмбеддингами,
+поэтому расход памяти и стоимость кластеризации ограничены размером окна, а не длиной сессии.
+"""
+
+import threading
+import time
+import numpy as np
+
+from embedding_cache import post_key
+from post_table import created_column
+
+DEFAULT_WINDOW_HOURS = 24
+
+# Верхняя граница числа постов в окне: при переполнении вытесняются самые старые
+DEFAULT_MAX_POSTS = 20000
+
+class PostWindow:
+    """
+    Потокобезопасное окно постов с эмбеддингами в одной матрице float32.
+
+    Посты хранятся в порядке добавления; строка матрицы i и элемент i столбца времени
+    создания соответствуют посту i. Повторно полученный пост заменяет свою прежнюю версию (и эмбеддинг).
+    """
+    def __init__(self, window_hours=DEFAULT_WINDOW_HOURS, max_posts=DEFAULT_MAX_POSTS):
+        """
+        :param window_hours: Ширина окна в часах.
+        :param max_posts: Максимальное число постов в окне.
+        """
+        self.window_hours = window_hours
+        self.max_posts = max_posts
+        self.evicted = 0
+        self._posts = []
+        self._created = np.empty(0, dtype=np.float64)  # время создания постов окна (NaN — неизвестно)
+        self._embeddings = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._posts)
+
+    @property
+    def window_seconds(self):
+        return self.window_hours * 3600
+
+    def cutoff(self, now=None):
+        """
+        Возвращает время (Unix time), посты старше которого выпадают из окна.
+        """
+        return (now if now is not None else time.time()) - self.window_seconds
+
+    @staticmethod
+    def _expired(created, cutoff):
+        # Посты без времени создания считаются свежими: их возраст неизвестен
+        return np.nan_to_num(created, nan=np.inf) < cutoff
+
+    def expired_count(self, now=None):
+        """
+        Возвращает число постов, которые будут вытеснены при следующем обновлении окна.
+        """
+        with self._lock:
+            return int(self._expired(self._created, self.cutoff(now)).sum())
+
+    def merge(self, posts, embeddings, now=None):
+        """
+        Добавляет посты с эмбеддингами, вытесняет устаревшие и возвращает содержимое окна.
+
+        :param posts: Новые или обновлённые посты.
+        :param embeddings: Массив эмбеддингов формы (len(posts), dim).
+        :param now: Текущее время (Unix time) или None.
+        :return: Кортеж (posts, embeddings, evicted_posts): посты окна, новая матрица
+            их эмбеддингов и список выбывших постов — вытесненных по времени или размеру окна,
+            отклонённых новых постов старше окна и прежних версий постов, заменённых новыми.
+            Прежняя версия имеет тот же ключ, что и пост окна, заменивший её.
+        """
+        with self._lock:
+            incoming = {post_key(post) for post in posts}
+            keep = np.fromiter((post_key(post) not in incoming for post in self._posts),
+                               dtype=bool, count=len(self._posts))
+            cutoff = self.cutoff(now)
+            created = created_column(posts)
+            fresh = ~self._expired(created, cutoff)
+            expired = keep & self._expired(self._created, cutoff)
+            evicted_posts = [post for post, gone in zip(self._posts, expired) if gone]
+            # Тот же объект, полученный повторно (переиспользованный хвост ленты), не считается заменённым
+            incoming_objects = {id(post) for post in posts}
+            replaced = [post for post, kept in zip(self._posts, keep)
+                        if not kept and id(post) not in incoming_objects]
+            stale = [post for post, ok in zip(posts, fresh) if not ok]
+            keep &= ~expired
+
+            kept_posts = [post for post, kept in zip(self._posts, keep) if kept]
+            new_posts = [post for post, ok in zip(posts, fresh) if ok]
+            parts = []
+            if self._embeddings is not None and len(kept_posts):
+                parts.append(self._embeddings[keep])
+            if new_posts:
+                parts.append(np.asarray(embeddings, dtype=np.float32)[fresh])
+            self._posts = kept_posts + new_posts
+            self._created = np.concatenate([self._created[keep], created[fresh]])
+            self._embeddings = np.vstack(parts) if parts else None
+
+            overflow = len(self._posts) - self.max_posts
+            if overflow > 0:
+                order = np.argsort(np.nan_to_num(self._created, nan=0.0), kind="stable")
+                drop = np.zeros(len(self._posts), dtype=bool)
+                drop[order[:overflow]] = True
+                evicted_posts.extend(post for post, gone in zip(self._posts, drop) if gone)
+                self._posts = [post for post, gone in zip(self._posts, drop) if not gone]
+                self._created = self._created[~drop]
+                self._embeddings = self._embeddings[~drop]
+
+            self.evicted += len(evicted_posts)
+            if evicted_posts or stale:
+                print(f"Окно {self.window_hours} ч: постов {len(self._posts)}, вытеснено {len(evicted_posts)}, "
+                      f"отклонено старше окна {len(stale)}.")
+            embeddings = self._embeddings if self._embeddings is not None else np.empty((0, 0), dtype=np.float32)
+            return list(self._posts), embeddings, evicted_posts + stale + replaced
+
+    def clear(self):
+        with self._lock:
+            self._posts = []
+            self._created = np.empty(0, dtype=np.float64)
+            self._embeddings = None
@@ -0,0 +1,290 @@
+"""
+tracing.py
+
+Лёгкая трассировка этапов обновления ленты: вложенные интервалы (span) с таймером,
+изменением RSS, атрибутами (число постов, размер пакета) и счётчиками (попадания кэша,
+закодированные тексты). Завершённые интервалы пишутся в ротируемый журнал JSON Lines
+и передаются подписчикам (например, панели диагностики в GUI).
+
+Для разового подробного разбора есть ProfileCapture — захват cProfile одного обновления.
+"""
+
+import cProfile
+import functools
+import io
+import itertools
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+
+TRACE_LOG_DIR = "logs"
+TRACE_LOG_FILE = "trace.jsonl"
+TRACE_LOG_MAX_BYTES = 2 * 1024 * 1024
+TRACE_LOG_BACKUPS = 3
+
+def current_rss_bytes():
+    """
+    Возвращает текущий объём резидентной памяти процесса в байтах.
+
+    Используется psutil, если он установлен, иначе /proc/self/statm (Linux).
+    Если ни один способ недоступен, возвращается None.
+
+    :return: Размер RSS в байтах или None.
+    """
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+class Span:
+    """
+    Один измеряемый интервал. Атрибуты задаются при открытии или через set(),
+    счётчики накапливаются через add() (в том числе tracer.add() из вложенного кода).
+    """
+    __slots__ = ("name", "id", "parent", "root", "attrs", "counters", "start", "_start_perf", "_start_rss")
+
+    def __init__(self, name, span_id, parent, attrs):
+        self.name = name
+        self.id = span_id
+        self.parent = parent.id if parent is not None else None
+        self.root = parent.root if parent is not None else span_id
+        self.attrs = attrs
+        self.counters = {}
+        self.start = time.time()
+        self._start_perf = time.perf_counter()
+        self._start_rss = current_rss_bytes()
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add(self, counter, value=1):
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def finish(self):
+        rss = current_rss_bytes()
+        return {
+            "name": self.name,
+            "id": self.id,
+            "parent": self.parent,
+            "root": self.root,
+            "thread": threading.current_thread().name,
+            "start": round(self.start, 3),
+            "duration": round(time.perf_counter() - self._start_perf, 6),
+            "rss_delta": rss - self._start_rss if rss is not None and self._start_rss is not None else None,
+            "attrs": self.attrs,
+            "counters": self.counters,
+        }
+
+class Tracer:
+    """
+    Потокобезопасный трассировщик. Стек открытых интервалов хранится отдельно для каждого потока.
+    """
+    def __init__(self, log_dir=TRACE_LOG_DIR, enabled=True):
+        self.log_dir = log_dir
+        self.enabled = enabled
+        self._ids = itertools.count(1)
+        self._local = threading.local()
+        self._listeners = []
+        self._logger = None
+        self._lock = threading.Lock()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def current(self):
+        """
+        Возвращает открытый интервал текущего потока или None.
+        """
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    def span(self, name, **attrs):
+        """
+        Контекстный менеджер интервала: with tracer.span("embed", posts=100) as span: ...
+        """
+        return _SpanContext(self, name, attrs)
+
+    def add(self, counter, value=1):
+        """
+        Увеличивает счётчик открытого интервала текущего потока (если он есть).
+        """
+        span = self.current()
+        if span is not None:
+            span.add(counter, value)
+
+    def record(self, name, duration, **attrs):
+        """
+        Записывает уже измеренный интервал (для этапов, которые нельзя обернуть в with).
+
+        :param name: Имя интервала.
+        :param duration: Длительность в секундах.
+        """
+        if not self.enabled:
+            return
+        parent = self.current()
+        span_id = next(self._ids)
+        record = {
+            "name": name,
+            "id": span_id,
+            "parent": parent.id if parent is not None else None,
+            "root": parent.root if parent is not None else span_id,
+            "thread": threading.current_thread().name,
+            "start": round(time.time() - duration, 3),
+            "duration": round(duration, 6),
+            "rss_delta": None,
+            "attrs": attrs,
+            "counters": {},
+        }
+        self._emit(record)
+
+    def add_listener(self, callback):
+        """
+        Подписывает callback(record) на завершённые интервалы. Вызывается в потоке,
+        где интервал завершился.
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _open(self, name, attrs):
+        span = Span(name, next(self._ids), self.current(), attrs)
+        self._stack().append(span)
+        return span
+
+    def _close(self, span, error=None):
+        stack = self._stack()
+        if stack and stack[-1] is span:
+            stack.pop()
+        record = span.finish()
+        if error is not None:
+            record["error"] = error
+        self._emit(record)
+
+    def _emit(self, record):
+        self._write(record)
+        for callback in list(self._listeners):
+            try:
+                callback(record)
+            except Exception as e:
+                print(f"Ошибка обработчика трассировки: {e}")
+
+    def _write(self, record):
+        with self._lock:
+            if self._logger is None:
+                try:
+                    os.makedirs(self.log_dir, exist_ok=True)
+                    handler = RotatingFileHandler(os.path.join(self.log_dir, TRACE_LOG_FILE),
+                                                  maxBytes=TRACE_LOG_MAX_BYTES, backupCount=TRACE_LOG_BACKUPS,
+                                                  encoding="utf-8", delay=True)
+                except OSError as e:
+                    print(f"Не удалось открыть журнал трассировки: {e}")
+                    self.enabled = False
+                    return
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                logger = logging.getLogger("clusternews.trace")
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                logger.addHandler(handler)
+                self._logger = logger
+        self._logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+class _SpanContext:
+    __slots__ = ("tracer", "name", "attrs", "span")
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.span = None
+
+    def __enter__(self):
+        if not self.tracer.enabled:
+            return _NULL_SPAN
+        self.span = self.tracer._open(self.name, self.attrs)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.span is not None:
+            self.tracer._close(self.span, error=exc_type.__name__ if exc_type is not None else None)
+        return False
+
+class _NullSpan:
+    def set(self, **attrs):
+        pass
+
+    def add(self, counter, value=1):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+tracer = Tracer()
+
+def traced(name=None, items_arg=None):
+    """
+    Декоратор: выполняет функцию внутри интервала трассировки.
+
+    :param name: Имя интервала (по умолчанию — имя функции).
+    :param items_arg: Номер позиционного аргумента-коллекции, размер которой записывается
+        в атрибут items (например, 0 для списка постов).
+    """
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            attrs = {}
+            if items_arg is not None and len(args) > items_arg:
+                try:
+                    attrs["items"] = len(args[items_arg])
+                except TypeError:
+                    pass
+            with tracer.span(span_name, **attrs):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class ProfileCapture:
+    """
+    Захват cProfile для блока with (профилируется только текущий поток).
+    Результат сохраняется в файл .prof, а краткая сводка доступна через summary().
+    """
+    def __init__(self, label, log_dir=TRACE_LOG_DIR):
+        self.path = os.path.join(log_dir, f"profile-{label}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+        self.profiler = cProfile.Profile()
+
+    def __enter__(self):
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.disable()
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.profiler.dump_stats(self.path)
+        except OSError as e:
+            print(f"Не удалось сохранить профиль: {e}")
+        return False
+
+    def summary(self, limit=25):
+        """
+        Возвращает текст с limit самыми дорогими по накопленному времени функциями.
+        """
+        out = io.StringIO()
+        pstats.Stats(self.profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()